@@ -1,25 +1,26 @@
 import pandas as pd
 import streamlit as st
-import re
 from datetime import datetime
 from pycoingecko import CoinGeckoAPI
 from helpers.graficos import graficar_precio_historico, graficar_radar_scores, graficar_subida_maximo
 from helpers.score import (
-    ticker_map, obtener_pais_ticker, es_bono_argentino, calcular_score,
-    cargar_paises_te, agregar_proyecciones_forward, calcular_cagr_3y,
-    analizar_volumen, guardar_score_historico, predecir_retorno_ml
+    cargar_paises_te, calcular_cagr_3y, analizar_volumen,
+    guardar_score_historico
 )
-from helpers.yahoo import analizar_con_yfinance
-from helpers.alphavantage import analizar_con_alphavantage
-from helpers.coingecko import analizar_con_coingecko
+from helpers.historico import importar_csv_legados, ultimo_snapshot, cargar_manifest
+from helpers.backtesting import ejecutar_backtest
 from helpers.rava import obtener_precio_bono_rava
-from helpers.investpy_utils import analizar_con_investpy
-from helpers.fundamentales import obtener_info_fundamental
-from helpers.byma import obtener_precio_bono_byma
+from helpers.motor import analizar_y_puntuar, clave_analisis
+from helpers.score_vectorizado import agregar_justificaciones
+from helpers.indicadores import series_panel
+from helpers.modelo_ml import predecir_lote, version_modelo
+from helpers.traduccion import completar_traducciones, COLUMNA_PENDIENTE
 from helpers.logger import log_info, log_error
-from config import ES_CLOUD, ALPHA_VANTAGE_API_KEY, OPENAI_API_KEY
+from helpers.proveedores import llamar
+from helpers.circuito import estados_circuito
+from config import OPENAI_API_KEY, MAX_WORKERS
 import openai
-import glob
+import json
 import os
 import subprocess
 
@@ -27,18 +28,13 @@ log_info("La app inició correctamente")
 cargar_paises_te()
 st.set_page_config(page_title="Análisis Financiero IA", layout="wide")
 
-def recomendar(score_texto, crecimiento):
-    match = re.search(r"(\d+)/5", str(score_texto))
-    score_valor = int(match.group(1)) if match else 0
-    if score_valor >= 4:
-        return "✅ Comprar"
-    elif score_valor == 3 and crecimiento in ["🟢 Alto", "🟡 Moderado"]:
-        return "🙀 Revisar"
-    return "❌ Evitar"
+# Los CSV de corridas anteriores se migran una vez al archivo Parquet (helpers/historico.py).
+# cache_resource: una sola vez por proceso, no en cada rerun de la app
+@st.cache_resource(show_spinner=False)
+def importar_csv_legados_una_vez():
+    return importar_csv_legados()
 
-def obtener_csv_mas_reciente(patron="historicos/AnalisisFinal-*_export.csv"):
-    archivos = glob.glob(patron)
-    return sorted(archivos, key=os.path.getmtime, reverse=True)[0] if archivos else None
+importar_csv_legados_una_vez()
 
 if st.sidebar.button("🔁 Reentrenar modelo manualmente"):
     try:
@@ -47,6 +43,8 @@ if st.sidebar.button("🔁 Reentrenar modelo manualmente"):
     except Exception as e:
         st.sidebar.error(f"❌ Error al reentrenar el modelo: {e}")
 
+max_workers = st.sidebar.slider("⚙️ Workers de análisis concurrente", min_value=1, max_value=32, value=MAX_WORKERS)
+
 if "debug_logs" not in st.session_state:
     st.session_state.debug_logs = []
 
@@ -60,7 +58,7 @@ with col2:
     fecha_fin = st.date_input("Fecha de fin", value=datetime.today())
 
 uploaded_file = st.file_uploader("Cargar archivo CSV (solo tickers)", type=["csv"])
-archivo_por_defecto = obtener_csv_mas_reciente()
+snapshot_por_defecto = ultimo_snapshot(columnas=["Ticker"])
 
 if uploaded_file:
     df_input = pd.read_csv(uploaded_file)
@@ -68,12 +66,9 @@ if uploaded_file:
         st.error("❌ El archivo debe contener una columna llamada 'Ticker'.")
         st.stop()
     st.success("✅ Archivo CSV con tickers cargado manualmente")
-elif archivo_por_defecto:
-    df_input = pd.read_csv(archivo_por_defecto)
-    if "Ticker" not in df_input.columns:
-        st.error(f"❌ El archivo por defecto `{archivo_por_defecto}` no contiene la columna 'Ticker'.")
-        st.stop()
-    st.warning(f"⚠️ Usando archivo por defecto: `{archivo_por_defecto}`")
+elif not snapshot_por_defecto.empty and snapshot_por_defecto["Ticker"].notna().any():
+    df_input = snapshot_por_defecto[["Ticker"]].dropna()
+    st.warning(f"⚠️ Usando los tickers del último análisis guardado ({snapshot_por_defecto['Corrida'].iloc[0]:%Y-%m-%d %H:%M})")
 else:
     st.error("❌ No se cargó ningún archivo CSV válido.")
     st.stop()
@@ -91,7 +86,8 @@ if st.button("Consultar IA") and prompt.strip():
                 {"role": "assistant", "content": "Hola, encantado de ayudarte. ¿Qué activo, estrategia o análisis querés consultar?"},
                 {"role": "user", "content": prompt}
             ]
-            response = client.chat.completions.create(
+            response = llamar(
+                "openai", "chat", client.chat.completions.create,
                 model="gpt-4",
                 messages=messages,
                 temperature=0.7,
@@ -103,102 +99,100 @@ if st.button("Consultar IA") and prompt.strip():
             st.error(f"Error al contactar a OpenAI: {e}")
 
 
-cg = CoinGeckoAPI()
-errores_conexion, resultados = [], []
-criptos_disponibles = [c['id'] for c in cg.get_coins_list()]
-
-with st.spinner("Analizando activos..."):
-    for raw_ticker in df_input['Ticker']:
-        if pd.isna(raw_ticker) or not str(raw_ticker).strip():
-            continue
-        fuentes_probadas = []
-        raw_ticker = str(raw_ticker).strip()
-        ticker_clean = raw_ticker.upper()
-        ticker_real = ticker_map.get(ticker_clean, ticker_clean)
-        es_bono = es_bono_argentino(ticker_clean)
-        resultado = None
-
-        if not ES_CLOUD:
-            try:
-                fuentes_probadas.append("Yahoo Finance")
-                resultado = analizar_con_yfinance(ticker_real, fecha_inicio, fecha_fin)
-            except Exception as e:
-                errores_conexion.append(f"[Yahoo Finance] {ticker_clean}: {e}")
-
-        if not resultado and ALPHA_VANTAGE_API_KEY:
-            try:
-                fuentes_probadas.append("Alpha Vantage")
-                resultado = analizar_con_alphavantage(ticker_clean, fecha_inicio, fecha_fin)
-            except Exception as e:
-                errores_conexion.append(f"[Alpha Vantage] {ticker_clean}: {e}")
-
-        if not resultado and ticker_clean.lower() in criptos_disponibles:
-            try:
-                fuentes_probadas.append("CoinGecko")
-                resultado = analizar_con_coingecko(cg, ticker_clean.lower(), fecha_inicio, fecha_fin)
-            except Exception as e:
-                errores_conexion.append(f"[CoinGecko] {ticker_clean.lower()}: {e}")
+# --- Análisis del portafolio (cacheado entre reruns) ---
+# Streamlit re-ejecuta el script en cada interacción: el análisis se guarda en
+# st.session_state bajo una clave de tickers + fechas + fuentes y sólo se recalcula
+# cuando cambian los insumos o se pide explícitamente.
+MAX_ANALISIS_GUARDADOS = 3
+
+# Panel de proveedores: llamadas, latencias, bytes, caché y errores del análisis
+# mostrado (copia tomada al terminar la ejecución, no las métricas vivas del proceso)
+def mostrar_panel_proveedores(analisis):
+    metricas_prov = analisis.get("metricas_proveedores") or {}
+    http = analisis["metricas_motor"].get("http") or {}
+    with st.sidebar.expander(f"📡 Proveedores (análisis de las {analisis['calculado']})"):
+        if metricas_prov:
+            st.dataframe(pd.DataFrame([
+                {
+                    "Proveedor": proveedor,
+                    "Llamadas": m["llamadas"],
+                    "Errores": m["errores"],
+                    "p50 ms": m["latencia_p50_ms"],
+                    "p90 ms": m["latencia_p90_ms"],
+                    "Total s": m["segundos_total"],
+                    "Espera s": m["espera_cola_s"],
+                    "% tiempo": m["porcentaje_tiempo"],
+                    "KB": round(m["bytes"] / 1024, 1),
+                    "Caché": f"{m['ratio_cache']:.0%}" if m["ratio_cache"] is not None else "-",
+                }
+                for proveedor, m in metricas_prov.items()
+            ]), use_container_width=True, hide_index=True)
+            for host, h in http.items():
+                if h["reuso"] is not None:
+                    st.caption(f"🔗 {host}: {h['solicitudes']} solicitudes, {h['conexiones']} conexiones ({h['reuso']:.0%} reusadas)")
+            for proveedor, m in metricas_prov.items():
+                if m["errores_por_clase"]:
+                    st.caption(f"{proveedor}: " + ", ".join(f"{clase} x{n}" for clase, n in m["errores_por_clase"].items()))
+            st.download_button(
+                "⬇️ Exportar métricas (JSON)",
+                data=json.dumps(metricas_prov, ensure_ascii=False, indent=2).encode("utf-8"),
+                file_name=f"metricas_proveedores-{datetime.now():%Y-%m-%dT%H-%M}.json"
+            )
+        else:
+            st.caption("El análisis no hizo llamadas a proveedores.")
+        # El circuito sí es estado actual: indica qué proveedores se están salteando ahora
+        for proveedor, c in estados_circuito().items():
+            if c["estado"] != "cerrado":
+                st.warning(f"🔌 {proveedor}: circuito {c['estado']} (éxito reciente {c['exito']:.0%})")
+
+def ejecutar_analisis(tickers, fecha_inicio, fecha_fin, max_workers):
+    analisis = analizar_y_puntuar(tickers, fecha_inicio, fecha_fin, CoinGeckoAPI(), max_workers=max_workers)
+    analisis.update(calculado=datetime.now().strftime("%H:%M:%S"), guardado=False)
+    return analisis
+
+tickers_entrada = list(df_input['Ticker'])
+clave = clave_analisis(tickers_entrada, fecha_inicio, fecha_fin)
+analisis_guardados = st.session_state.setdefault("analisis", {})
+
+if st.sidebar.button("🔄 Recalcular análisis"):
+    analisis_guardados.pop(clave, None)
+
+if clave not in analisis_guardados:
+    with st.spinner("Analizando activos..."):
+        analisis_guardados[clave] = ejecutar_analisis(tickers_entrada, fecha_inicio, fecha_fin, max_workers)
+    while len(analisis_guardados) > MAX_ANALISIS_GUARDADOS:
+        analisis_guardados.pop(next(iter(analisis_guardados)))
+
+analisis = analisis_guardados[clave]
+metricas_motor = analisis["metricas_motor"]
+errores_conexion = analisis["errores_conexion"]
+panel_tecnico = analisis["panel_tecnico"]
+
+st.caption(
+    f"⏱️ {metricas_motor['tickers']} tickers analizados en {metricas_motor['tiempo_total']}s "
+    f"con {metricas_motor['workers']} workers (suma por ticker: {metricas_motor['tiempo_sumado']}s, "
+    f"aceleración x{metricas_motor['aceleracion']})"
+)
+if metricas_motor["yahoo_lote"]:
+    st.caption(f"📦 Descarga agrupada de Yahoo: {metricas_motor['yahoo_lote']} símbolos en {metricas_motor['tiempo_lote_yahoo']}s")
+stats_info = metricas_motor["info_yf"]
+st.sidebar.caption(
+    f"ℹ️ yfinance .info: {stats_info['solicitudes']} lecturas, {stats_info['llamadas_upstream']} descargas, "
+    f"{stats_info['evitadas']} evitadas ({stats_info['hits_disco']} desde disco)"
+)
+st.sidebar.caption(f"🗂️ Análisis `{clave}` calculado a las {analisis['calculado']}")
+# Antes de cualquier st.stop(): el panel hace falta sobre todo cuando fallaron todos los tickers
+mostrar_panel_proveedores(analisis)
 
-        if not resultado:
-            try:
-                pais = obtener_pais_ticker(ticker_clean)
-                fuentes_probadas.append(f"Investpy ({pais})")
-                resultado = analizar_con_investpy(ticker_clean, pais, fecha_inicio, fecha_fin)
-            except Exception as e:
-                errores_conexion.append(f"[Investpy] {ticker_clean}: {e}")
+# Predicción ML de todo el portafolio en un único predict; se rehace sólo si cambió el modelo
+if not analisis["df_result"].empty and analisis.get("version_ml", False) != version_modelo():
+    analisis["df_result"]["Retorno 12M ML (%)"], analisis["metricas_ml"] = predecir_lote(analisis["df_result"])
+    analisis["version_ml"] = analisis["metricas_ml"]["version"]
 
-        if not resultado and es_bono:
-            try:
-                fuentes_probadas.append("BYMA")
-                resultado = obtener_precio_bono_byma(ticker_clean)
-                if resultado:
-                    resultado["Tipo"] = "Bono"
-                    resultado["Advertencia"] = "⚠️ Solo precio disponible, sin métricas fundamentales"
-            except Exception as e:
-                errores_conexion.append(f"[BYMA] {ticker_clean}: {e}")
-
-        if resultado is None:
-            resultado = {
-                "Ticker": ticker_clean,
-                "Error": "❌ No se encontró información en ninguna fuente",
-                "Fuente": "Ninguna",
-                "Fuentes Probadas": ", ".join(fuentes_probadas),
-                "Advertencia": "⚠️ No se encontró información",
-                "Tipo": "Desconocido"
-            }
-
-        info_fundamental = obtener_info_fundamental(ticker_clean)
-        resultado = agregar_proyecciones_forward(resultado, ticker_map)
-        for k, v in info_fundamental.items():
-            if k not in resultado or resultado[k] is None:
-                resultado[k] = v
-
-        if "Tipo" not in resultado or resultado["Tipo"] == "Desconocido":
-            resultado["Tipo"] = "Bono" if es_bono else "Acción"
-
-        if "Sector" not in resultado or resultado["Sector"] is None:
-            resultado["Sector"] = ""
-
-        score_texto, score_numerico = calcular_score(resultado)
-        resultado["Score Final"] = score_texto
-        resultado["__orden_score"] = score_numerico
-        resultados.append(resultado)
-
-df_result = pd.DataFrame(resultados)
+df_result = analisis["df_result"]
 if df_result.empty:
     st.warning("⚠️ No se pudo generar ningún análisis con los tickers proporcionados.")
     st.stop()
-df_result = df_result.sort_values("__orden_score", ascending=False).drop(columns="__orden_score")
-df_result["Recomendación"] = df_result.apply(lambda row: recomendar(row["Score Final"], row.get("Crecimiento Futuro", "")), axis=1)
-
-columnas_prioritarias = [
-    "Ticker", "Score Final", "Recomendación", "% Subida a Máx", "Crecimiento Futuro",
-    "País", "Semáforo Riesgo", "Contexto Global", "Proyección 12M (%)", "Score Numérico Total"
-]
-columnas_restantes = [col for col in df_result.columns if col not in columnas_prioritarias]
-df_result = df_result[columnas_prioritarias + columnas_restantes]
-
-guardar_score_historico(df_result)
 
 tooltips = {
     "Ticker": "Código identificador del activo (ej: AAPL, AL30D, BTC).",
@@ -245,14 +239,29 @@ tooltips = {
 }
 
 
-df_para_tabla = df_result.drop(columns=['Hist']) if 'Hist' in df_result.columns else df_result
+def mostrar_tabla(contenedor, df):
+    df_para_tabla = agregar_justificaciones(df).drop(columns=['Hist', 'Reglas Score', COLUMNA_PENDIENTE], errors='ignore')
+    contenedor.dataframe(
+        df_para_tabla,
+        use_container_width=True,
+        column_config={k: st.column_config.TextColumn(k, help=v) for k, v in tooltips.items() if k in df_para_tabla.columns}
+    )
 
+tabla = st.empty()
+mostrar_tabla(tabla, df_result)
 
-st.dataframe(
-    df_para_tabla,
-    use_container_width=True,
-    column_config={k: st.column_config.TextColumn(k, help=v) for k, v in tooltips.items() if k in df_para_tabla.columns}
-)
+# Traducción diferida: la tabla ya está en pantalla, "Contexto" se completa en lote
+if COLUMNA_PENDIENTE in df_result.columns and df_result[COLUMNA_PENDIENTE].notna().any():
+    with st.spinner("Traduciendo resúmenes de empresas..."):
+        df_result = completar_traducciones(df_result)
+    mostrar_tabla(tabla, df_result)
+df_result = df_result.drop(columns=COLUMNA_PENDIENTE, errors='ignore')
+analisis["df_result"] = df_result
+
+# El histórico se guarda una vez por análisis, no en cada rerun
+if not analisis["guardado"]:
+    guardar_score_historico(df_result)
+    analisis["guardado"] = True
 
 # Simulador de inversión para el mejor activo
 top1 = df_result.iloc[0]
@@ -287,18 +296,42 @@ if st.button(f"Simular inversión en {top1['Ticker']}"):
 
 if st.checkbox("📊 Mostrar gráficos individuales por activo analizado"):
     st.subheader("Gráficos por activo")
-    for _, fila in df_result.iterrows():
+    series_tecnicas = series_panel(panel_tecnico)
+    for idx, fila in df_result.iterrows():
         st.markdown(f"---\n### {fila['Ticker']}")
         hist = fila.get("Hist")
         if isinstance(hist, dict): hist = pd.DataFrame(hist)
         elif not isinstance(hist, pd.DataFrame): hist = None
         try:
-            graficar_precio_historico(fila['Ticker'], hist)
+            graficar_precio_historico(fila['Ticker'], hist, indicadores=series_tecnicas.get(idx))
             graficar_subida_maximo(fila['Ticker'], fila.get('Actual'), fila.get('Máximo'))
-            graficar_radar_scores(fila['Ticker'], {k: v for k, v in fila.items() if isinstance(v, (int, float))})
+            graficar_radar_scores(fila['Ticker'], {k: v for k, v in fila.items() if isinstance(v, (int, float)) and k != 'Reglas Score'})
         except Exception as e:
             st.warning(f"Error al graficar {fila['Ticker']}: {e}")
 
+if st.checkbox("🧪 Backtesting de los snapshots históricos"):
+    st.subheader("🧪 ¿Los scores anticiparon el retorno?")
+    # Se recalcula sólo cuando entra un snapshot nuevo al archivo
+    clave_backtest = len(cargar_manifest()["archivos"])
+    if st.session_state.get("backtest", {}).get("clave") != clave_backtest:
+        with st.spinner("Calculando retornos de los snapshots guardados..."):
+            try:
+                st.session_state["backtest"] = {"clave": clave_backtest, **ejecutar_backtest(max_workers=max_workers)}
+            except Exception as e:
+                log_error(f"Backtesting: {e}")
+                st.session_state.pop("backtest", None)
+                st.warning(f"⚠️ No se pudo calcular el backtesting: {e}")
+    backtest = st.session_state.get("backtest")
+    if backtest:
+        st.caption(
+            f"{backtest['metricas']['observaciones']} observaciones (snapshot, ticker) de "
+            f"{backtest['metricas']['simbolos']} símbolos en {backtest['metricas']['segundos']}s"
+        )
+        st.markdown("**Por banda de score**")
+        st.dataframe(backtest["por_banda"], use_container_width=True)
+        st.markdown("**Por recomendación**")
+        st.dataframe(backtest["por_recomendacion"], use_container_width=True)
+
 st.subheader("📉 Métricas del Modelo de ML (Retorno 12M)")
 try:
     with open("modelo_rmse.txt", "r") as f:
@@ -306,6 +339,14 @@ try:
         st.success(f"📈 RMSE del modelo: {rmse_value}")
 except Exception as e:
     st.warning(f"No se pudo leer el RMSE: {e}")
+metricas_ml = analisis.get("metricas_ml", {})
+if metricas_ml.get("version"):
+    st.caption(
+        f"🧠 Modelo versión {metricas_ml['version']} · {metricas_ml['predichas']} predicciones en "
+        f"{metricas_ml['latencia_ms'] or 0} ms · {metricas_ml['sin_datos']} activos sin features completos"
+    )
+if metricas_ml.get("error"):
+    st.warning(f"⚠️ Modelo ML: {metricas_ml['error']}")
 try:
     st.image("modelo_histograma.png", caption="Distribución de errores del modelo (Predicción vs Real)", use_container_width=True)
 except Exception as e:
@@ -327,6 +368,7 @@ if errores_conexion:
 # Exportación CSV
 fecha_str = datetime.today().strftime("%Y-%m-%d")
 nombre_salida = f"AnalisisFinal-{fecha_str}_export.csv"
-df_result.to_csv(nombre_salida, index=False)
-csv = df_result.to_csv(index=False).encode('utf-8')
+df_export = agregar_justificaciones(df_result).drop(columns=['Hist', 'Reglas Score'], errors='ignore')
+csv = df_export.to_csv(index=False).encode('utf-8')
 st.download_button("🗕️ Descargar resultados en CSV", data=csv, file_name=nombre_salida)
+
@@ -1,8 +1,10 @@
-import streamlit as st
 import os
 
 def get_secret(name, default=""):
+    # streamlit se importa acá para que config (y los helpers que lo leen) se
+    # pueda usar sin streamlit instalado: CLI del benchmark y tests
     try:
+        import streamlit as st
         return st.secrets[name]
     except Exception:
         return os.getenv(name, default)
@@ -15,3 +17,117 @@ FMP_API_KEY = get_secret("FMP_API_KEY")
 OPENAI_API_KEY = get_secret("OPENAI_API_KEY")
 TRADINGECONOMICS_API_KEY = get_secret("TRADINGECONOMICS_API_KEY")
 
+# --- Motor de análisis concurrente ---
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "8"))
+
+# Máximo de llamadas simultáneas por proveedor (el resto espera su turno)
+LIMITES_PROVEEDOR = {
+    "yahoo": 4,
+    "alphavantage": 1,
+    "coingecko": 2,
+    "investpy": 1,
+    "byma": 2,
+    "rava": 2,
+    "fundamentales": 4,
+}
+
+# --- Caché en disco ---
+CACHE_DIR = os.getenv("CACHE_DIR", "/tmp/inversiones_cache")
+
+# TTL (segundos) del snapshot de yfinance .info entre ejecuciones; 0 = solo dentro de la ejecución
+INFO_CACHE_TTL = int(os.getenv("INFO_CACHE_TTL", "0"))
+
+# Cantidad de símbolos por request en la descarga agrupada de Yahoo
+YF_TAMANO_LOTE = int(os.getenv("YF_TAMANO_LOTE", "50"))
+
+# TTL (segundos) del snapshot de VIX y riesgo país compartido entre tickers
+CONTEXTO_MERCADO_TTL = int(os.getenv("CONTEXTO_MERCADO_TTL", "900"))
+# TTL (segundos) del snapshot si no se pudo obtener el VIX: se reintenta antes
+CONTEXTO_MERCADO_TTL_FALLA = int(os.getenv("CONTEXTO_MERCADO_TTL_FALLA", "60"))
+
+# --- Caché de TradingEconomics ---
+TE_TTL_PAISES_DIAS = float(os.getenv("TE_TTL_PAISES_DIAS", "7"))
+TE_TTL_INDICADORES_HORAS = float(os.getenv("TE_TTL_INDICADORES_HORAS", "12"))
+# Segundos máximos de espera con la caché vacía antes de usar la tabla de fallback
+TE_ESPERA_FRIO = float(os.getenv("TE_ESPERA_FRIO", "3"))
+
+# --- Índice de monedas de CoinGecko ---
+COINGECKO_TTL_INDICE_HORAS = float(os.getenv("COINGECKO_TTL_INDICE_HORAS", "24"))
+
+# --- Indicadores técnicos ---
+# Estado incremental persistido por ticker (O(1) por barra nueva) y verificación contra el cálculo completo
+INDICADORES_INCREMENTALES = os.getenv("INDICADORES_INCREMENTALES", "1") == "1"
+INDICADORES_VERIFICAR = os.getenv("INDICADORES_VERIFICAR", "0") == "1"
+
+# --- Traducción de resúmenes ---
+# Diferida: la tabla se muestra primero y "Contexto" se traduce después, en lote
+TRADUCCION_DIFERIDA = os.getenv("TRADUCCION_DIFERIDA", "1") == "1"
+TRADUCCION_WORKERS = int(os.getenv("TRADUCCION_WORKERS", "4"))
+
+# --- Proveedores externos: grabación / reproducción (helpers/proveedores.py) ---
+# "off" = en vivo, "record" = en vivo y graba fixtures, "replay" = sólo fixtures (sin red)
+PROVEEDORES_MODO = os.getenv("PROVEEDORES_MODO", "off")
+PROVEEDORES_FIXTURES = os.getenv("PROVEEDORES_FIXTURES", "fixtures/proveedores")
+# Latencia (segundos) y tasa de fallas (0-1) inyectadas en cada llamada, para benchmarks
+PROVEEDORES_LATENCIA = float(os.getenv("PROVEEDORES_LATENCIA", "0"))
+PROVEEDORES_TASA_FALLAS = float(os.getenv("PROVEEDORES_TASA_FALLAS", "0"))
+
+# --- Cadena de fuentes de precios (helpers/fallback.py) ---
+# Con PRECIOS_HEDGE, si una fuente no respondió en HEDGE_DEMORA segundos se lanza
+# la siguiente en paralelo y gana el primer resultado válido; sin él, la cadena es serial
+PRECIOS_HEDGE = os.getenv("PRECIOS_HEDGE", "1") == "1"
+HEDGE_DEMORA = float(os.getenv("HEDGE_DEMORA", "1.5"))
+HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", str(MAX_WORKERS * 2)))
+
+# --- Circuit breaker por proveedor (helpers/circuito.py) ---
+CIRCUITO_ACTIVO = os.getenv("CIRCUITO_ACTIVO", "1") == "1"
+# Fallas seguidas que abren el circuito; una llamada más lenta que CIRCUITO_LENTO (s) cuenta como falla
+CIRCUITO_FALLAS = int(os.getenv("CIRCUITO_FALLAS", "5"))
+CIRCUITO_LENTO = float(os.getenv("CIRCUITO_LENTO", "20"))
+# Segundos de enfriamiento antes de la llamada de prueba; se duplica con cada prueba fallida
+CIRCUITO_ENFRIAMIENTO = float(os.getenv("CIRCUITO_ENFRIAMIENTO", "60"))
+CIRCUITO_ENFRIAMIENTO_MAX = float(os.getenv("CIRCUITO_ENFRIAMIENTO_MAX", "600"))
+# Peso de la última llamada en los promedios de éxito y latencia
+CIRCUITO_ALFA = float(os.getenv("CIRCUITO_ALFA", "0.2"))
+
+# --- Límites de tasa por proveedor (helpers/planificador.py) ---
+# proveedor: (llamadas por minuto, ráfaga). Los que no figuran no se limitan.
+LIMITES_TASA = {
+    "alphavantage": (float(os.getenv("ALPHA_VANTAGE_POR_MINUTO", "5")), 1),
+    "rava": (40, 1),
+    "investpy": (30, 1),
+    "coingecko": (30, 3),
+    "tradingeconomics": (60, 2),
+    "finnhub": (60, 5),
+    "fmp": (60, 5),
+    "byma": (120, 5),
+}
+
+# --- Cliente HTTP compartido (helpers/sesiones_http.py) ---
+HTTP_TIMEOUT_CONEXION = float(os.getenv("HTTP_TIMEOUT_CONEXION", "5"))
+HTTP_TIMEOUT_LECTURA = float(os.getenv("HTTP_TIMEOUT_LECTURA", "15"))
+# Reintentos ante errores de conexión, 429 y 5xx, con espera HTTP_BACKOFF * 2^n segundos
+HTTP_REINTENTOS = int(os.getenv("HTTP_REINTENTOS", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+# Conexiones keep-alive por host
+HTTP_POOL = int(os.getenv("HTTP_POOL", "10"))
+
+# --- BYMA ---
+# Consultas de detalle en paralelo en la precarga de bonos (la API no acepta varios símbolos por pedido)
+BYMA_WORKERS = int(os.getenv("BYMA_WORKERS", "4"))
+# El token OAuth se renueva BYMA_MARGEN_TOKEN segundos antes de vencer (BYMA_TOKEN_TTL si la API no informa expires_in)
+BYMA_MARGEN_TOKEN = float(os.getenv("BYMA_MARGEN_TOKEN", "60"))
+BYMA_TOKEN_TTL = float(os.getenv("BYMA_TOKEN_TTL", "3600"))
+# Caché de market data: fresco por BYMA_CACHE_TTL segundos y servido vencido (con
+# refresco de fondo) por BYMA_CACHE_GRACIA segundos más; tamaño en memoria y en disco
+BYMA_CACHE_TTL = float(os.getenv("BYMA_CACHE_TTL", "600"))
+BYMA_CACHE_GRACIA = float(os.getenv("BYMA_CACHE_GRACIA", "1800"))
+BYMA_CACHE_MEMORIA = int(os.getenv("BYMA_CACHE_MEMORIA", "256"))
+BYMA_CACHE_MAX_ARCHIVOS = int(os.getenv("BYMA_CACHE_MAX_ARCHIVOS", "1000"))
+
+# --- Rava (historial de bonos) ---
+# Segundos que la serie guardada se usa sin volver a bajar la página
+RAVA_TTL = float(os.getenv("RAVA_TTL", "900"))
+# Si Rava no responde, la serie guardada se sigue usando hasta esta antigüedad
+# (segundos); pasada, se cae a IAMC. Un último cierre más viejo que esto se marca
+RAVA_MAX_VENCIDO = float(os.getenv("RAVA_MAX_VENCIDO", "259200"))
@@ -2,18 +2,21 @@ from alpha_vantage.timeseries import TimeSeries
 from datetime import datetime, time
 import pandas as pd
 from config import ALPHA_VANTAGE_API_KEY
+from helpers.proveedores import llamar
 import warnings
 
 
+def _diario(ticker):
+    ts = TimeSeries(key=ALPHA_VANTAGE_API_KEY, output_format='pandas')
+    return ts.get_daily_adjusted(symbol=ticker, outputsize='full')
+
 def analizar_con_alphavantage(ticker, fecha_inicio, fecha_fin):
     global errores_conexion
     try:
-        ts = TimeSeries(key=ALPHA_VANTAGE_API_KEY, output_format='pandas')
-
         fecha_inicio_dt = datetime.combine(fecha_inicio, time.min)
         fecha_fin_dt = datetime.combine(fecha_fin, time.min)
 
-        data, meta = ts.get_daily_adjusted(symbol=ticker, outputsize='full')
+        data, meta = llamar("alphavantage", "daily", _diario, ticker)
         data = data.sort_index()
         data = data[(data.index >= pd.to_datetime(fecha_inicio_dt)) & (data.index <= pd.to_datetime(fecha_fin_dt))]
 
@@ -0,0 +1,127 @@
+# helpers/backtesting.py
+import re
+import time
+import pandas as pd
+from helpers.historico import importar_csv_legados, cargar_snapshots
+from helpers.precios_store import obtener_historicos
+from helpers.score import resolver_ticker
+from config import MAX_WORKERS, YF_TAMANO_LOTE
+
+# Backtesting de los snapshots guardados: para cada (snapshot, ticker) se mide el
+# retorno real a varios horizontes con precios del store local y se agrupa por
+# banda de score y por recomendación. Todo con merges vectorizados, sin pedidos
+# por fila.
+
+HORIZONTES = {"1M": 30, "3M": 91, "6M": 182, "12M": 365}
+# Se toma el primer cierre dentro de los DIAS_TOLERANCIA días desde cada fecha
+DIAS_TOLERANCIA = 5
+COLUMNAS_SNAPSHOT = ["Ticker", "Tipo", "Actual", "Score Final", "Recomendación", "Score Numérico Total"]
+
+def _banda(score_final):
+    coincidencia = re.search(r"\((\d)/5", str(score_final))
+    return f"{coincidencia.group(1)}/5" if coincidencia else "N/A"
+
+def cargar_observaciones():
+    """Una fila por (fecha, ticker): la última corrida de cada día, sin bonos."""
+    importar_csv_legados()
+    df = cargar_snapshots(columnas=COLUMNAS_SNAPSHOT)
+    if df.empty:
+        return df
+    for col in COLUMNAS_SNAPSHOT:
+        if col not in df.columns:
+            df[col] = None
+    df = df[df["Ticker"].notna() & df["Tipo"].ne("Bono")]
+    df = df.sort_values("Corrida").drop_duplicates(subset=["Ticker", "Fecha"], keep="last")
+    df["Fecha"] = pd.to_datetime(df["Fecha"])
+    df["Simbolo"] = df["Ticker"].astype(str).map(resolver_ticker)
+    df["Banda Score"] = df["Score Final"].map(_banda)
+    return df.reset_index(drop=True)
+
+def _tabla_cierres(hists):
+    partes = [
+        pd.DataFrame({"Simbolo": simbolo, "Fecha Cierre": hist.index, "Cierre": hist["Close"].to_numpy()})
+        for simbolo, hist in hists.items() if "Close" in hist.columns
+    ]
+    if not partes:
+        # Tipos explícitos: un frame vacío de tipo object rompe merge_asof
+        return pd.DataFrame({
+            "Simbolo": pd.Series(dtype=object),
+            "Fecha Cierre": pd.Series(dtype="datetime64[ns]"),
+            "Cierre": pd.Series(dtype=float),
+        })
+    return pd.concat(partes, ignore_index=True).dropna(subset=["Cierre"]).sort_values("Fecha Cierre")
+
+def _cierre_en(df, columna_fecha, cierres, tolerancia_dias=DIAS_TOLERANCIA):
+    """Primer cierre de cada símbolo en [fecha, fecha + tolerancia), alineado con df."""
+    if cierres.empty:
+        # Sin precios (sin red, ES_CLOUD o circuito de Yahoo abierto): nada que alinear
+        return pd.Series(float("nan"), index=df.index, name="Cierre")
+    objetivos = df[["Simbolo", columna_fecha]].reset_index().sort_values(columna_fecha)
+    objetivos[columna_fecha] = objetivos[columna_fecha].astype(cierres["Fecha Cierre"].dtype)
+    unidos = pd.merge_asof(
+        objetivos, cierres, left_on=columna_fecha, right_on="Fecha Cierre", by="Simbolo",
+        direction="forward", tolerance=pd.Timedelta(days=tolerancia_dias - 1)
+    )
+    return unidos.set_index("index")["Cierre"].reindex(df.index)
+
+def calcular_retornos(observaciones, horizontes=HORIZONTES, max_workers=MAX_WORKERS):
+    """
+    Agrega "Precio Base" y "Retorno <h> (%)" por horizonte. Los horizontes que
+    todavía no se cumplieron quedan en NaN.
+    """
+    df = observaciones.copy()
+    if df.empty:
+        return df
+    hoy = pd.Timestamp.today().normalize()
+    inicio = df["Fecha"].min()
+    fin = min(df["Fecha"].max() + pd.Timedelta(days=max(horizontes.values()) + DIAS_TOLERANCIA), hoy + pd.Timedelta(days=1))
+    hists = obtener_historicos(sorted(df["Simbolo"].unique()), inicio, fin,
+                               tamano_lote=YF_TAMANO_LOTE, max_workers=max_workers)
+    cierres = _tabla_cierres(hists)
+
+    df["Precio Base"] = _cierre_en(df, "Fecha", cierres)
+    for nombre, dias in horizontes.items():
+        df["__fecha"] = df["Fecha"] + pd.Timedelta(days=dias)
+        precio = _cierre_en(df, "__fecha", cierres).where(df["__fecha"] <= hoy)
+        df[f"Retorno {nombre} (%)"] = (precio / df["Precio Base"] - 1) * 100
+    return df.drop(columns="__fecha")
+
+def resumir(retornos, por, horizontes=HORIZONTES):
+    """Por grupo y horizonte: observaciones, tasa de acierto (retorno > 0), media y mediana."""
+    filas = []
+    for nombre in horizontes:
+        columna = f"Retorno {nombre} (%)"
+        if columna not in retornos.columns:
+            continue
+        validos = retornos[retornos[columna].notna()]
+        if validos.empty:
+            continue
+        agrupado = validos.groupby(por)[columna].agg(
+            Observaciones="count",
+            **{"Tasa de Acierto (%)": lambda r: (r > 0).mean() * 100},
+            **{"Retorno Medio (%)": "mean", "Retorno Mediano (%)": "median"}
+        ).reset_index()
+        agrupado.insert(1, "Horizonte", nombre)
+        filas.append(agrupado)
+    if not filas:
+        return pd.DataFrame(columns=[por, "Horizonte", "Observaciones", "Tasa de Acierto (%)", "Retorno Medio (%)", "Retorno Mediano (%)"])
+    return pd.concat(filas, ignore_index=True).round(2)
+
+def ejecutar_backtest(horizontes=HORIZONTES, max_workers=MAX_WORKERS):
+    """
+    Returns:
+        dict: "retornos" (una fila por snapshot y ticker), "por_banda",
+        "por_recomendacion" y "metricas" (observaciones, símbolos, segundos).
+    """
+    inicio = time.perf_counter()
+    retornos = calcular_retornos(cargar_observaciones(), horizontes, max_workers)
+    return {
+        "retornos": retornos,
+        "por_banda": resumir(retornos, "Banda Score", horizontes),
+        "por_recomendacion": resumir(retornos, "Recomendación", horizontes),
+        "metricas": {
+            "observaciones": int(len(retornos)),
+            "simbolos": int(retornos["Simbolo"].nunique()) if not retornos.empty else 0,
+            "segundos": round(time.perf_counter() - inicio, 2),
+        },
+    }
@@ -0,0 +1,166 @@
+# helpers/benchmark.py
+"""
+Benchmark de punta a punta del pipeline de la app (sin Streamlit ni red).
+
+    python -m helpers.benchmark --tamanos 10 63 200 --latencia 0.02 --fallas 0.05
+
+Corre analizar_y_puntuar + traducción + modelo ML con los proveedores en modo
+replay (fixtures grabados con PROVEEDORES_MODO=record, o datos sintéticos para
+lo que no esté grabado) y reporta percentiles por etapa y por ticker.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import date, datetime
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+def percentiles(valores):
+    valores = np.asarray([v for v in valores if v is not None], dtype=float)
+    if valores.size == 0:
+        return {}
+    resumen = {f"p{p}": round(float(np.percentile(valores, p)), 4) for p in PERCENTILES}
+    resumen.update(media=round(float(valores.mean()), 4), max=round(float(valores.max()), 4), n=int(valores.size))
+    return resumen
+
+def tickers_base():
+    """Tickers del último análisis guardado (archivo Parquet o, si no hay, el CSV más nuevo)."""
+    import pandas as pd
+    from helpers.historico import ultimo_snapshot, CARPETA_HISTORICOS, PATRON_CSV_LEGADO
+    df = ultimo_snapshot(columnas=["Ticker"])
+    if df.empty:
+        archivos = sorted(glob.glob(os.path.join(CARPETA_HISTORICOS, PATRON_CSV_LEGADO)))
+        df = pd.read_csv(archivos[-1], usecols=["Ticker"]) if archivos else pd.DataFrame(columns=["Ticker"])
+    return list(dict.fromkeys(df["Ticker"].dropna().astype(str)))
+
+def portafolio(base, tamano):
+    """Los primeros tamano tickers de base, completados con tickers sintéticos."""
+    tickers = base[:tamano]
+    return tickers + [f"SINT{i:03d}" for i in range(tamano - len(tickers))]
+
+def _reiniciar_estado(cache_dir):
+    # Corrida en frío: sin caché en disco ni estado en memoria de la corrida anterior
+    from helpers import score, coingecko, circuito, byma
+    for entrada in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, entrada)
+        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    score._contexto_mercado = None
+    score.paises_disponibles_te = set()
+    coingecko._indice = None
+    circuito.reiniciar()
+    byma.invalidar_token()
+    byma._memoria.clear()
+
+def correr(tickers, fecha_inicio, fecha_fin, workers):
+    """Una ejecución del pipeline. Devuelve (tiempos por etapa, tiempos por ticker, errores, métricas por proveedor)."""
+    from pycoingecko import CoinGeckoAPI
+    from helpers.motor import analizar_y_puntuar
+    from helpers.traduccion import completar_traducciones
+    from helpers.modelo_ml import predecir_lote
+    from helpers.proveedores import metricas_proveedores
+
+    inicio = time.perf_counter()
+    analisis = analizar_y_puntuar(tickers, fecha_inicio, fecha_fin, CoinGeckoAPI(), max_workers=workers)
+    metricas = analisis["metricas_motor"]
+    df = analisis["df_result"]
+
+    inicio_traduccion = time.perf_counter()
+    df = completar_traducciones(df)
+    tiempo_traduccion = time.perf_counter() - inicio_traduccion
+
+    inicio_ml = time.perf_counter()
+    if not df.empty:
+        predecir_lote(df)
+    tiempo_ml = time.perf_counter() - inicio_ml
+
+    etapas = {
+        "precios_lote": metricas["tiempo_lote_yahoo"],
+        "lote_bonos": metricas["tiempo_lote_bonos"],
+        "contexto": metricas["tiempo_contexto"],
+        "tickers": metricas["tiempo_tickers"],
+        "indicadores": metricas["tiempo_indicadores"],
+        "score": metricas["tiempo_score"],
+        "traduccion": round(tiempo_traduccion, 3),
+        "modelo_ml": round(tiempo_ml, 3),
+        "total": round(time.perf_counter() - inicio, 3),
+    }
+    return etapas, metricas["tiempos_por_ticker"], len(analisis["errores_conexion"]), metricas_proveedores()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de análisis sin red")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10, 63, 200])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--modo", choices=["replay", "record", "off"], default="replay")
+    parser.add_argument("--fixtures", default=None, help="carpeta de fixtures (default: PROVEEDORES_FIXTURES)")
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos agregados a cada llamada a un proveedor")
+    parser.add_argument("--fallas", type=float, default=0.0, help="probabilidad de falla por llamada (0-1)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--desde", default="2020-01-01")
+    parser.add_argument("--hasta", default=date.today().isoformat())
+    parser.add_argument("--sin-limites", action="store_true", help="desactiva los límites de tasa (LIMITES_TASA)")
+    parser.add_argument("--caliente", action="store_true", help="conserva las cachés entre repeticiones")
+    parser.add_argument("--salida", default=None, help="archivo JSON con el reporte completo")
+    args = parser.parse_args(argv)
+
+    # Caché aislada: tiene que quedar fijada antes de importar config
+    cache_dir = tempfile.mkdtemp(prefix="bench_cache_")
+    os.environ["CACHE_DIR"] = cache_dir
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+    from helpers import proveedores, sinteticos, planificador
+    proveedores.configurar(modo=args.modo, fixtures=args.fixtures, latencia=args.latencia,
+                           tasa_fallas=args.fallas, semilla=args.semilla)
+    sinteticos.registrar()
+    planificador.configurar(activo=not args.sin_limites)
+
+    fecha_inicio = datetime.strptime(args.desde, "%Y-%m-%d").date()
+    fecha_fin = datetime.strptime(args.hasta, "%Y-%m-%d").date()
+    base = tickers_base()
+
+    reporte = {"config": vars(args), "resultados": []}
+    try:
+        for tamano in args.tamanos:
+            tickers = portafolio(base, tamano)
+            etapas, por_ticker, errores = {}, [], []
+            for repeticion in range(args.repeticiones):
+                if not args.caliente or repeticion == 0:
+                    _reiniciar_estado(cache_dir)
+                tiempos, tiempos_ticker, n_errores, proveedores_corrida = correr(tickers, fecha_inicio, fecha_fin, args.workers)
+                for etapa, segundos in tiempos.items():
+                    etapas.setdefault(etapa, []).append(segundos)
+                por_ticker.extend(t["segundos"] for t in tiempos_ticker)
+                errores.append(n_errores)
+
+            resultado = {
+                "tickers": tamano,
+                "etapas": {etapa: percentiles(valores) for etapa, valores in etapas.items()},
+                "por_ticker": percentiles(por_ticker),
+                "errores_por_corrida": errores,
+                "proveedores_ultima_corrida": proveedores_corrida,
+            }
+            reporte["resultados"].append(resultado)
+            print(f"\n=== {tamano} tickers · {args.repeticiones} repeticiones · {args.workers} workers ===")
+            for etapa, stats in resultado["etapas"].items():
+                print(f"  {etapa:<12} p50 {stats['p50']:>8.3f}s  p90 {stats['p90']:>8.3f}s  max {stats['max']:>8.3f}s")
+            stats = resultado["por_ticker"]
+            if stats:
+                print(f"  {'por ticker':<12} p50 {stats['p50']:>8.3f}s  p90 {stats['p90']:>8.3f}s  p99 {stats['p99']:>8.3f}s")
+            print(f"  errores de proveedores por corrida: {errores}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        print(f"\nReporte guardado en {args.salida}")
+    return reporte
+
+if __name__ == "__main__":
+    main()
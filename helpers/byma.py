@@ -1,14 +1,17 @@
 import requests
-import json
 import os
 import time
-import pandas as pd
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-
-CACHE_PATH = "/tmp/byma_cache"
-CACHE_TTL = 600  # segundos (10 minutos)
-
-os.makedirs(CACHE_PATH, exist_ok=True)
+from helpers.proveedores import llamar, registrar_cache
+from helpers import sesiones_http
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json, antiguedad
+from config import (
+    BYMA_WORKERS, BYMA_MARGEN_TOKEN, BYMA_TOKEN_TTL,
+    BYMA_CACHE_TTL, BYMA_CACHE_GRACIA, BYMA_CACHE_MEMORIA, BYMA_CACHE_MAX_ARCHIVOS
+)
 
 def log_debug(msg):
     print(msg)
@@ -18,81 +21,255 @@ def log_debug(msg):
     except:
         pass
 
+# --- Caché en dos niveles: LRU en memoria delante de un JSON por símbolo en disco ---
+# Dentro de CACHE_TTL el dato es fresco. Hasta CACHE_GRACIA segundos después se
+# sigue sirviendo (vencido) mientras un thread de fondo lo refresca, así la fila
+# del bono nunca espera a la red; pasado ese margen la consulta sí bloquea.
+CACHE_TTL = BYMA_CACHE_TTL
+CACHE_GRACIA = BYMA_CACHE_GRACIA
+
+_lock_cache = threading.Lock()
+_memoria = OrderedDict()  # símbolo -> (datos, guardado en epoch)
+_archivos = None  # cantidad de JSON en disco (se cuenta la primera vez)
+_refrescando = set()
+_pool_refresco = ThreadPoolExecutor(max_workers=2, thread_name_prefix="byma-refresco")
+
+def _ruta(symbol):
+    return ruta_cache("byma", f"{symbol.upper()}.json")
+
+def _a_memoria(symbol, datos, guardado):
+    # Con _lock_cache tomado
+    _memoria[symbol] = (datos, guardado)
+    _memoria.move_to_end(symbol)
+    while len(_memoria) > BYMA_CACHE_MEMORIA:
+        _memoria.popitem(last=False)
+
+def _leer_disco(symbol):
+    path = _ruta(symbol)
+    edad = antiguedad(path)
+    datos = leer_json(path) if edad is not None else None
+    return (datos, time.time() - edad) if datos is not None else None
+
+def _buscar(symbol):
+    """(datos, edad en segundos) del nivel más nuevo que lo tenga, o None."""
+    symbol = symbol.upper()
+    with _lock_cache:
+        entrada = _memoria.get(symbol)
+        if entrada is not None:
+            _memoria.move_to_end(symbol)
+    if entrada is None or time.time() - entrada[1] >= CACHE_TTL:
+        # Falta en memoria o está vencido: otro proceso puede haber escrito uno más nuevo
+        en_disco = _leer_disco(symbol)
+        if en_disco is not None and (entrada is None or en_disco[1] > entrada[1]):
+            entrada = en_disco
+            with _lock_cache:
+                _a_memoria(symbol, *entrada)
+    if entrada is None:
+        return None
+    return dict(entrada[0]), time.time() - entrada[1]
+
+def _evictar():
+    # Con _lock_cache tomado: borra los JSON más viejos hasta volver a BYMA_CACHE_MAX_ARCHIVOS
+    global _archivos
+    carpeta = os.path.dirname(_ruta("_"))
+    archivos = [os.path.join(carpeta, n) for n in os.listdir(carpeta) if n.endswith(".json")]
+    _archivos = len(archivos)
+    if _archivos <= BYMA_CACHE_MAX_ARCHIVOS:
+        return
+    archivos.sort(key=lambda p: antiguedad(p) or 0, reverse=True)
+    for path in archivos[:_archivos - BYMA_CACHE_MAX_ARCHIVOS]:
+        try:
+            os.remove(path)
+            _archivos -= 1
+        except OSError:
+            pass
+
 def obtener_cache(symbol):
-    path = os.path.join(CACHE_PATH, f"{symbol.upper()}.json")
-    if os.path.exists(path):
-        mtime = os.path.getmtime(path)
-        if time.time() - mtime < CACHE_TTL:
-            with open(path, "r") as f:
-                return json.load(f)
+    """
+    Dato cacheado del símbolo si es fresco o está dentro del margen de gracia (en
+    ese caso se agenda un refresco de fondo); None si no hay nada utilizable.
+    """
+    encontrado = _buscar(symbol)
+    if encontrado is None:
+        return None
+    datos, edad = encontrado
+    if edad < CACHE_TTL:
+        return datos
+    if edad < CACHE_TTL + CACHE_GRACIA:
+        refrescar_en_fondo([symbol])
+        return datos
     return None
 
 def guardar_cache(symbol, data):
-    path = os.path.join(CACHE_PATH, f"{symbol.upper()}.json")
-    with open(path, "w") as f:
-        json.dump(data, f)
+    symbol = symbol.upper()
+    path = _ruta(symbol)
+    nuevo = not os.path.exists(path)
+    guardar_json(path, data)
+    global _archivos
+    with _lock_cache:
+        _a_memoria(symbol, data, time.time())
+        if _archivos is None or (nuevo and _archivos + 1 > BYMA_CACHE_MAX_ARCHIVOS):
+            _evictar()
+        elif nuevo:
+            _archivos += 1
+
+def refrescar_en_fondo(symbols):
+    """Refresca los símbolos en un thread de fondo (uno solo en vuelo por símbolo)."""
+    with _lock_cache:
+        pendientes = [s.upper() for s in symbols if s.upper() not in _refrescando]
+        _refrescando.update(pendientes)
+    if not pendientes:
+        return
+
+    def _refrescar():
+        try:
+            for symbol in pendientes:
+                encontrado = _buscar(symbol)
+                # Otro thread (o proceso) pudo haberlo refrescado mientras tanto
+                if encontrado is None or encontrado[1] >= CACHE_TTL:
+                    _pedir(symbol)
+        finally:
+            with _lock_cache:
+                _refrescando.difference_update(pendientes)
+
+    log_debug(f"[BYMA] Refrescando en segundo plano: {', '.join(pendientes)}")
+    _pool_refresco.submit(_refrescar)
+
+# --- Token OAuth: se reusa hasta BYMA_MARGEN_TOKEN segundos antes de vencer ---
+_lock_token = threading.Lock()
+_token = {"valor": None, "vence": 0.0}
+
+def _token_upstream():
+    url = "https://api.byma.com.ar/token"
+    client_id = st.secrets["byma"]["client_id"]
+    client_secret = st.secrets["byma"]["client_secret"]
+
+    payload = {
+        "grant_type": "client_credentials",
+        "client_id": client_id,
+        "client_secret": client_secret
+    }
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    r = sesiones_http.post(url, data=payload, headers=headers)
+    r.raise_for_status()
+    return r.json()
 
 def obtener_token_byma():
+    # Con el lock tomado: si varios threads lo piden a la vez, sólo uno va a la API
+    with _lock_token:
+        if _token["valor"] and time.time() < _token["vence"] - BYMA_MARGEN_TOKEN:
+            return _token["valor"]
+        try:
+            log_debug("[BYMA Auth] Obteniendo token de acceso...")
+            token_data = llamar("byma", "token", _token_upstream)
+            _token["valor"] = token_data.get("access_token")
+            _token["vence"] = time.time() + float(token_data.get("expires_in") or BYMA_TOKEN_TTL)
+            return _token["valor"]
+        except Exception as e:
+            log_debug(f"[BYMA Auth] Error al obtener token: {e}")
+            return None
+
+def invalidar_token():
+    with _lock_token:
+        _token.update(valor=None, vence=0.0)
+
+def _con_token(operacion, fn, *args, clave):
+    """llamar() con el token vigente; ante un 401 renueva el token y reintenta una vez."""
+    for intento in range(2):
+        token = obtener_token_byma()
+        if not token:
+            raise Exception("Token no disponible")
+        try:
+            return llamar("byma", operacion, fn, *args, token, clave=clave)
+        except requests.exceptions.HTTPError as e:
+            if intento == 0 and e.response is not None and e.response.status_code == 401:
+                log_debug("[BYMA Auth] Token rechazado, se renueva")
+                invalidar_token()
+                continue
+            raise
+
+# --- Market data ---
+URL_DETALLE = "https://api.byma.com.ar/v1/marketdata/instruments/detail"
+
+def _detalle_upstream(symbol, token):
+    # 🔄 Endpoint correcto validado en la documentación oficial
+    url = f"{URL_DETALLE}?symbol={symbol}"
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/json"
+    }
+
+    r = sesiones_http.get(url, headers=headers)
+    r.raise_for_status()
+    return r.json()
+
+def _resultado(symbol, data):
+    precios = data.get("price") or {}
+    last_price = float(precios.get("last") or 0)
+    min_price = float(precios.get("low") or 0)
+    max_price = float(precios.get("high") or 0)
+    subida = round((max_price - last_price) / last_price * 100, 2) if last_price > 0 else None
+
+    # El detalle de BYMA no trae histórico: la fila queda sin "Hist" (sin gráfico ni indicadores)
+    return {
+        "Ticker": symbol.upper(),
+        "Actual": round(last_price, 2),
+        "Mínimo": round(min_price, 2),
+        "Máximo": round(max_price, 2),
+        "% Subida a Máx": subida,
+        "Fuente": "BYMA API privada"
+    }
+
+def _pedir(symbol):
+    """Consulta el detalle de un bono y lo deja en la caché. True si quedó cacheado."""
     try:
-        log_debug("[BYMA Auth] Obteniendo token de acceso...")
-        url = "https://api.byma.com.ar/token"
-        client_id = st.secrets["byma"]["client_id"]
-        client_secret = st.secrets["byma"]["client_secret"]
-
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": client_id,
-            "client_secret": client_secret
-        }
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-
-        r = requests.post(url, data=payload, headers=headers, timeout=10)
-        r.raise_for_status()
-        token_data = r.json()
-        return token_data.get("access_token")
+        guardar_cache(symbol, _resultado(symbol, _con_token("detalle", _detalle_upstream, symbol, clave=symbol)))
+        return True
     except Exception as e:
-        log_debug(f"[BYMA Auth] Error al obtener token: {e}")
-        return None
+        log_debug(f"[BYMA] Falló la consulta de {symbol}: {e}")
+        return False
+
+def precargar_bonos_byma(symbols, max_workers=BYMA_WORKERS):
+    """
+    Deja en la caché el market data de todos los bonos pedidos antes de que el
+    pool analice los tickers. BYMA no tiene un endpoint de varios símbolos: los
+    que no tienen dato utilizable se consultan de a uno, hasta max_workers en
+    paralelo y con el mismo token. Los vencidos dentro de la gracia se sirven
+    como están y se refrescan de fondo. Devuelve cuántos quedaron cacheados.
+    """
+    faltantes, vencidos = [], []
+    for symbol in dict.fromkeys(str(s).upper() for s in symbols):
+        encontrado = _buscar(symbol)
+        if encontrado is None or encontrado[1] >= CACHE_TTL + CACHE_GRACIA:
+            faltantes.append(symbol)
+        elif encontrado[1] >= CACHE_TTL:
+            vencidos.append(symbol)
+    if vencidos:
+        refrescar_en_fondo(vencidos)
+    if not faltantes:
+        return 0
+    # Un solo pedido de token antes de repartir: los workers lo encuentran vigente
+    if not obtener_token_byma():
+        log_debug("[BYMA] Precarga sin token: se consulta por bono")
+        return 0
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="byma") as pool:
+        cargados = sum(pool.map(_pedir, faltantes))
+    log_debug(f"[BYMA] Precarga: {cargados}/{len(faltantes)} bonos en {time.perf_counter() - inicio:.1f}s")
+    return cargados
 
 def obtener_precio_bono_byma(symbol):
     log_debug(f"[BYMA] 🔍 Buscando datos para {symbol} desde API privada BYMA")
     try:
         cached = obtener_cache(symbol)
+        registrar_cache("byma", cached is not None)
         if cached:
             log_debug(f"[BYMA] Usando cache local para {symbol}")
             return cached
 
-        token = obtener_token_byma()
-        if not token:
-            raise Exception("Token no disponible")
-
-        # 🔄 Endpoint correcto validado en la documentación oficial
-        url = f"https://api.byma.com.ar/v1/marketdata/instruments/detail?symbol={symbol.upper()}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json"
-        }
-
-        r = requests.get(url, headers=headers, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-
-        precios = data.get("price") or {}
-        last_price = float(precios.get("last") or 0)
-        min_price = float(precios.get("low") or 0)
-        max_price = float(precios.get("high") or 0)
-        subida = round((max_price - last_price) / last_price * 100, 2) if last_price > 0 else None
-
-        result = {
-            "Ticker": symbol.upper(),
-            "Actual": round(last_price, 2),
-            "Mínimo": round(min_price, 2),
-            "Máximo": round(max_price, 2),
-            "% Subida a Máx": subida,
-            "Fuente": "BYMA API privada",
-            "Hist": hist  # 👉 agregado para el gráfico histórico
-        }
-
+        data = _con_token("detalle", _detalle_upstream, symbol.upper(), clave=symbol.upper())
+        result = _resultado(symbol, data)
         guardar_cache(symbol, result)
         return result
 
@@ -0,0 +1,43 @@
+# helpers/cache_disco.py
+import os
+import json
+import time
+import tempfile
+from config import CACHE_DIR
+
+def ruta_cache(*partes):
+    """Devuelve un path dentro de CACHE_DIR, creando las carpetas intermedias."""
+    path = os.path.join(CACHE_DIR, *partes)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+def antiguedad(path):
+    """Segundos desde la última escritura del archivo, o None si no existe."""
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+def leer_json(path, ttl=None):
+    edad = antiguedad(path)
+    if edad is None or (ttl is not None and edad > ttl):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def guardar_json(path, datos):
+    # Escritura atómica: un proceso que lee nunca ve un archivo a medio escribir
+    carpeta = os.path.dirname(path) or "."
+    os.makedirs(carpeta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=carpeta, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, default=str)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -0,0 +1,156 @@
+# helpers/circuito.py
+import time
+import threading
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json, antiguedad
+from config import (
+    CIRCUITO_ACTIVO, CIRCUITO_FALLAS, CIRCUITO_ENFRIAMIENTO, CIRCUITO_ENFRIAMIENTO_MAX,
+    CIRCUITO_LENTO, CIRCUITO_ALFA
+)
+
+# Circuit breaker por proveedor, alimentado por proveedores.llamar:
+#   cerrado      -> las llamadas pasan; CIRCUITO_FALLAS fallas (o llamadas más
+#                   lentas que CIRCUITO_LENTO) seguidas lo abren
+#   abierto      -> las llamadas fallan al instante durante el enfriamiento
+#   semiabierto  -> pasado el enfriamiento se deja pasar una sola llamada de
+#                   prueba: si anda se cierra, si no se abre con el doble de espera
+# Sólo cuentan como falla los errores del proveedor (transporte, timeouts, 429,
+# 5xx; ver es_falla). Un error de datos (símbolo inexistente, sin fixture) es
+# una llamada que anduvo y no devolvió nada: no abre el circuito.
+# Además lleva un promedio exponencial (EWMA) de éxito y latencia que usa
+# fallback.ordenar para adaptar el orden de las fuentes.
+# El estado se persiste en CACHE_DIR/circuito/estado.json, así las fallas que
+# ve una sesión de Streamlit (o un proceso) protegen a las demás.
+
+CERRADO, ABIERTO, SEMIABIERTO = "cerrado", "abierto", "semiabierto"
+# Excepciones de requests/urllib3/http.client que indican un problema de red o
+# del servidor (se comparan por nombre para no importar cada librería acá)
+ERRORES_TRANSPORTE = {
+    "ConnectionError", "Timeout", "ReadTimeout", "ConnectTimeout", "SSLError", "ProxyError",
+    "ChunkedEncodingError", "MaxRetryError", "NewConnectionError", "ProtocolError",
+    "RemoteDisconnected", "IncompleteRead", "ProveedorSimuladoError",
+}
+# Cada cuánto se sincroniza con el disco si no hubo cambios de estado
+SINCRONIZAR_CADA = 5.0
+
+class CircuitoAbierto(Exception):
+    """El proveedor está en enfriamiento: la llamada no se hace."""
+
+_lock = threading.Lock()
+_estados = {}
+_sincronizado = 0.0
+
+def _estado_inicial():
+    return {
+        "estado": CERRADO, "fallas_seguidas": 0, "abierto_hasta": 0.0, "enfriamiento": CIRCUITO_ENFRIAMIENTO,
+        "prueba_en_curso": False, "exito": 1.0, "latencia_ms": None, "llamadas": 0, "actualizado": 0.0,
+    }
+
+def _ruta():
+    return ruta_cache("circuito", "estado.json")
+
+def _sincronizar(forzar_guardado=False):
+    # Trae del disco los proveedores que otro proceso actualizó más recientemente
+    # y escribe el estado propio. Se llama con _lock tomado.
+    global _sincronizado
+    ahora = time.time()
+    if not forzar_guardado and ahora - _sincronizado < SINCRONIZAR_CADA:
+        return
+    path = _ruta()
+    edad = antiguedad(path)
+    if edad is not None and ahora - edad > _sincronizado:
+        for proveedor, guardado in (leer_json(path) or {}).items():
+            propio = _estados.get(proveedor)
+            if propio is None or guardado.get("actualizado", 0) > propio["actualizado"]:
+                _estados[proveedor] = {**_estado_inicial(), **guardado, "prueba_en_curso": False}
+    try:
+        guardar_json(path, {p: {k: v for k, v in e.items() if k != "prueba_en_curso"} for p, e in _estados.items()})
+    except Exception as e:
+        print(f"[Circuito] No se pudo guardar el estado: {e}")
+    _sincronizado = time.time()
+
+def reiniciar():
+    """Vuelve todos los proveedores a cerrado (benchmarks, pruebas manuales)."""
+    global _sincronizado
+    with _lock:
+        _estados.clear()
+        _sincronizado = 0.0
+
+def permitir(proveedor):
+    """
+    Reserva el paso de una llamada. Lanza CircuitoAbierto si el proveedor está
+    en enfriamiento o si ya hay una llamada de prueba en curso.
+    """
+    if not CIRCUITO_ACTIVO:
+        return
+    with _lock:
+        _sincronizar()
+        e = _estados.setdefault(proveedor, _estado_inicial())
+        if e["estado"] == CERRADO:
+            return
+        ahora = time.time()
+        if e["estado"] == ABIERTO and ahora >= e["abierto_hasta"]:
+            e["estado"] = SEMIABIERTO
+        if e["estado"] == SEMIABIERTO and not e["prueba_en_curso"]:
+            e["prueba_en_curso"] = True
+            return
+        restante = max(0.0, e["abierto_hasta"] - ahora)
+    raise CircuitoAbierto(f"{proveedor} en enfriamiento ({restante:.0f}s restantes)")
+
+def liberar(proveedor):
+    """Devuelve una reserva de permitir() que no llegó a usarse (llamada cancelada)."""
+    with _lock:
+        e = _estados.get(proveedor)
+        if e is not None:
+            e["prueba_en_curso"] = False
+
+def es_falla(error):
+    """True si la excepción es del proveedor (red, timeout, 429, 5xx) y no de los datos pedidos."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    nombres = {clase.__name__ for clase in type(error).__mro__}
+    return bool(nombres & ERRORES_TRANSPORTE) or any("RateLimit" in n for n in nombres)
+
+def registrar(proveedor, segundos, ok):
+    """Resultado de una llamada que pasó por permitir()."""
+    if not CIRCUITO_ACTIVO:
+        return
+    falla = not ok or segundos > CIRCUITO_LENTO
+    with _lock:
+        e = _estados.setdefault(proveedor, _estado_inicial())
+        e["llamadas"] += 1
+        e["exito"] = (1 - CIRCUITO_ALFA) * e["exito"] + CIRCUITO_ALFA * (0.0 if falla else 1.0)
+        ms = segundos * 1000
+        e["latencia_ms"] = ms if e["latencia_ms"] is None else (1 - CIRCUITO_ALFA) * e["latencia_ms"] + CIRCUITO_ALFA * ms
+        e["actualizado"] = time.time()
+
+        estado_previo = e["estado"]
+        if not falla:
+            e.update(estado=CERRADO, fallas_seguidas=0, enfriamiento=CIRCUITO_ENFRIAMIENTO, prueba_en_curso=False)
+        else:
+            e["fallas_seguidas"] += 1
+            if estado_previo == SEMIABIERTO:
+                # Falló la prueba: de nuevo abierto, con el doble de espera
+                e["enfriamiento"] = min(e["enfriamiento"] * 2, CIRCUITO_ENFRIAMIENTO_MAX)
+            if estado_previo == SEMIABIERTO or e["fallas_seguidas"] >= CIRCUITO_FALLAS:
+                e.update(estado=ABIERTO, abierto_hasta=time.time() + e["enfriamiento"], prueba_en_curso=False)
+        if e["estado"] != estado_previo:
+            print(f"[Circuito] {proveedor}: {estado_previo} -> {e['estado']}")
+        _sincronizar(forzar_guardado=e["estado"] != estado_previo)
+
+def salud(proveedor):
+    """(disponible, tasa de éxito EWMA, latencia EWMA en ms o None)."""
+    with _lock:
+        e = _estados.get(proveedor)
+        if e is None:
+            return True, 1.0, None
+        disponible = e["estado"] != ABIERTO or time.time() >= e["abierto_hasta"]
+        return disponible, e["exito"], e["latencia_ms"]
+
+def estados_circuito():
+    """Copia del estado de todos los proveedores (para el panel de la app)."""
+    with _lock:
+        _sincronizar()
+        return {p: {k: v for k, v in e.items() if k != "prueba_en_curso"} for p, e in _estados.items()}
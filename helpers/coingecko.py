@@ -1,10 +1,118 @@
 # helpers/coingecko.py
 from datetime import datetime, time, timedelta
+import re
+import threading
 import warnings
+import pandas as pd
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json
+from helpers.proveedores import llamar, registrar_cache
+from config import COINGECKO_TTL_INDICE_HORAS
 
+# --- Índice de monedas (id y símbolo -> id) ---
+# get_coins_list trae más de 10k monedas: se baja una vez, se persiste en disco
+# con TTL y se consulta con dicts en memoria.
 
-def analizar_con_coingecko(coin_id):
-    global errores_conexion
+# Símbolos ambiguos que siempre resuelven a la moneda principal
+PREFERIDOS = {
+    "btc": "bitcoin", "eth": "ethereum", "usdt": "tether", "usdc": "usd-coin",
+    "bnb": "binancecoin", "sol": "solana", "xrp": "ripple", "ada": "cardano",
+    "doge": "dogecoin", "dot": "polkadot", "ltc": "litecoin", "trx": "tron",
+    "avax": "avalanche-2", "link": "chainlink", "matic": "matic-network",
+    "dai": "dai", "xlm": "stellar", "atom": "cosmos", "uni": "uniswap",
+}
+
+# Notación de Yahoo para los pares cripto (BTC-USD)
+SUFIJO_CRIPTO = "-usd"
+
+_lock = threading.Lock()
+_indice = None
+
+def _ruta_indice():
+    return ruta_cache("coingecko", "indice.json")
+
+def _slug(nombre):
+    return re.sub(r"[^a-z0-9]+", "-", str(nombre).lower()).strip("-")
+
+def _prioridad(moneda):
+    # Desempate determinístico entre monedas con el mismo símbolo: primero la que
+    # tiene id igual a su nombre, después el id más corto y por último el alfabético
+    return (moneda["id"] != _slug(moneda.get("name", "")), len(moneda["id"]), moneda["id"])
+
+def construir_indice(monedas):
+    """Arma {"ids": {id: símbolo}, "simbolos": {símbolo: id}} a partir de get_coins_list."""
+    ids, candidatos = {}, {}
+    for moneda in monedas:
+        coin_id = str(moneda.get("id") or "").lower()
+        simbolo = str(moneda.get("symbol") or "").lower()
+        if not coin_id:
+            continue
+        ids[coin_id] = simbolo
+        if simbolo:
+            candidatos.setdefault(simbolo, []).append({**moneda, "id": coin_id})
+
+    simbolos = {s: min(lista, key=_prioridad)["id"] for s, lista in candidatos.items()}
+    for simbolo, coin_id in PREFERIDOS.items():
+        if coin_id in ids:
+            simbolos[simbolo] = coin_id
+    return {"ids": ids, "simbolos": simbolos, "actualizado": datetime.now().isoformat(timespec="seconds")}
+
+def cargar_indice_coingecko(cg=None, ttl_horas=COINGECKO_TTL_INDICE_HORAS):
+    """
+    Índice vigente: memoria, luego disco dentro del TTL y recién entonces
+    get_coins_list. Si la descarga falla se usa el índice vencido que haya.
+    """
+    global _indice
+    ttl = ttl_horas * 3600
+    with _lock:
+        if _indice is not None and _indice["cargado"] + ttl > datetime.now().timestamp():
+            return _indice
+        path = _ruta_indice()
+        datos = leer_json(path, ttl=ttl)
+        registrar_cache("coingecko", datos is not None)
+        if datos is None and cg is not None:
+            try:
+                datos = construir_indice(llamar("coingecko", "coins_list", cg.get_coins_list))
+                guardar_json(path, datos)
+            except Exception as e:
+                print(f"[CoinGecko] No se pudo actualizar el índice de monedas: {e}")
+                datos = None
+        if datos is None:
+            # Índice vencido antes que ninguno
+            datos = leer_json(path)
+            if datos is None:
+                return _indice or {"ids": {}, "simbolos": {}, "cargado": 0}
+        _indice = {"ids": datos["ids"], "simbolos": datos["simbolos"], "cargado": datetime.now().timestamp()}
+        return _indice
+
+def resolver_coingecko(ticker, cg=None):
+    """Id de CoinGecko para un ticker (BTC o BTC-USD -> bitcoin) o un id directo; None si no es cripto."""
+    clave = str(ticker).strip().lower()
+    if clave.endswith(SUFIJO_CRIPTO):
+        clave = clave[:-len(SUFIJO_CRIPTO)]
+    indice = cargar_indice_coingecko(cg)
+    if clave in indice["simbolos"]:
+        return indice["simbolos"][clave]
+    if clave in indice["ids"]:
+        return clave
+    return None
+
+def es_cripto(ticker, ticker_real=None):
+    """
+    True sólo con una marca explícita de cripto: la notación de Yahoo (BTC-USD),
+    en el ticker o en su entrada de ticker_map (ticker_real). Un símbolo suelto
+    no alcanza aunque esté en PREFERIDOS o sea un id de CoinGecko: SOL, LINK,
+    ATOM, DOT o UNI también son acciones, y para ellas Yahoo va primero.
+    """
+    return any(str(t or "").strip().lower().endswith(SUFIJO_CRIPTO) for t in (ticker, ticker_real))
+
+# --- Precios ---
+def _market_chart(cg, coin_id, desde, hasta):
+    return cg.get_coin_market_chart_range_by_id(id=coin_id, vs_currency='usd', from_timestamp=desde, to_timestamp=hasta)
+
+def analizar_con_coingecko(cg, ticker, fecha_inicio, fecha_fin):
+    coin_id = resolver_coingecko(ticker, cg)
+    if coin_id is None:
+        return None
     try:
         # Convertir fecha_inicio y fecha_fin de date a datetime (para usar .timestamp)
         fecha_inicio_dt = datetime.combine(fecha_inicio, time.min)
@@ -13,21 +121,23 @@ def analizar_con_coingecko(coin_id):
         if (fecha_fin_dt - fecha_inicio_dt).days > 365:
             fecha_inicio_dt = fecha_fin_dt - timedelta(days=365)
 
-        data = cg.get_coin_market_chart_range_by_id(
-            id=coin_id,
-            vs_currency='usd',
-            from_timestamp=int(fecha_inicio_dt.timestamp()),
-            to_timestamp=int(fecha_fin_dt.timestamp())
+        data = llamar(
+            "coingecko", "market_chart", _market_chart, cg, coin_id,
+            int(fecha_inicio_dt.timestamp()), int(fecha_fin_dt.timestamp()),
+            clave=f"{coin_id}|{fecha_inicio_dt.date()}|{fecha_fin_dt.date()}"
         )
-        prices = [p[1] for p in data['prices']]
-        if not prices:
+        if not data.get('prices'):
             return None
-        min_price = min(prices)
-        max_price = max(prices)
-        current_price = prices[-1]
+        hist = pd.DataFrame(data['prices'], columns=["Date", "Close"])
+        hist["Date"] = pd.to_datetime(hist["Date"], unit="ms")
+        hist = hist.set_index("Date")
+        prices = hist["Close"]
+        min_price = prices.min()
+        max_price = prices.max()
+        current_price = prices.iloc[-1]
         subida = (max_price - current_price) / current_price * 100
         return {
-            "Ticker": coin_id,
+            "Ticker": str(ticker).upper(),
             "Fuente": "CoinGecko",
             "Mínimo": round(min_price, 2),
             "Máximo": round(max_price, 2),
@@ -39,3 +149,4 @@ def analizar_con_coingecko(coin_id):
         print(f"[CoinGecko] {coin_id}: {e}")
         print(f"[ERROR] CoinGecko falló para {coin_id} - {e}")
         warnings.warn(f"DEBUG: CoinGecko falló para {coin_id} - {e}")
+        return None
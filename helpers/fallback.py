@@ -0,0 +1,166 @@
+# helpers/fallback.py
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from helpers.circuito import salud
+from helpers.planificador import espera_estimada, cancelable
+from config import PRECIOS_HEDGE, HEDGE_DEMORA, HEDGE_WORKERS, CIRCUITO_ACTIVO
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+# Cadena de fuentes de precios con "hedging": se lanza la mejor fuente para el
+# tipo de instrumento y, si no respondió en HEDGE_DEMORA segundos (o falló), se
+# lanza la siguiente en paralelo. Gana el primer resultado válido; las fuentes
+# que todavía no arrancaron se cancelan, las que esperan semáforo o turno del
+# límite de tasa salen apenas otra gana, y las que ya están en la red terminan
+# en segundo plano con su resultado descartado. Nunca se lanza un hedge a un
+# proveedor cuya espera por límite de tasa supera la demora del hedge.
+
+# nombre: etiqueta para errores y "Fuentes Probadas"; clave: id en ORDEN_POR_TIPO;
+# proveedor: límite de concurrencia; fn: () -> dict | None
+Fuente = namedtuple("Fuente", "clave nombre proveedor fn")
+
+ORDEN_POR_TIPO = {
+    "bono": ["byma", "rava", "yahoo", "investpy"],
+    "cripto": ["coingecko", "yahoo", "alphavantage"],
+    "accion": ["yahoo", "alphavantage", "investpy"],
+}
+
+# Orden adaptativo: cada fuente arranca en su posición de ORDEN_POR_TIPO y se
+# corre PESO_EXITO lugares si su tasa de éxito reciente es 0 y un lugar por cada
+# LATENCIA_REFERENCIA_MS de latencia promedio o de espera por su límite de tasa.
+# Las de circuito abierto van al final.
+PESO_EXITO = 3.0
+LATENCIA_REFERENCIA_MS = 2000.0
+
+_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix="hedge")
+_lock = threading.Lock()
+
+def _contadores_en_cero():
+    return {"cadenas": 0, "lanzadas": 0, "por_demora": 0, "descartadas": 0, "sin_resultado": 0, "ganadoras": {}}
+
+_contadores = _contadores_en_cero()
+
+def iniciar_ejecucion():
+    global _contadores
+    with _lock:
+        _contadores = _contadores_en_cero()
+
+def estadisticas_fallback():
+    """Cadenas ejecutadas, fuentes lanzadas (y cuántas por demora), descartadas y ganadoras."""
+    with _lock:
+        return {**_contadores, "ganadoras": dict(_contadores["ganadoras"])}
+
+def _sumar(**valores):
+    with _lock:
+        for clave, n in valores.items():
+            _contadores[clave] += n
+
+def tipo_instrumento(ticker, es_bono, es_cripto):
+    # es_bono_argentino es amplio (todo lo que termina en D o empieza con AL...):
+    # un ticker con sufijo de mercado (ALUA.BA) se sigue tratando como acción
+    if es_bono and "." not in str(ticker):
+        return "bono"
+    return "cripto" if es_cripto else "accion"
+
+def ordenar(fuentes, tipo, adaptativo=CIRCUITO_ACTIVO):
+    """
+    Fuentes disponibles ({clave: Fuente}) en el orden preferido para el tipo,
+    ajustado por la salud reciente de cada proveedor (helpers/circuito).
+    """
+    base = [fuentes[clave] for clave in ORDEN_POR_TIPO[tipo] if clave in fuentes]
+    if not adaptativo:
+        return base
+
+    def _puntaje(item):
+        posicion, fuente = item
+        if fuente.proveedor is None:
+            # Sin llamada externa (p. ej. el histórico ya vino en la descarga agrupada)
+            return (False, posicion)
+        disponible, exito, latencia_ms = salud(fuente.proveedor)
+        demora_ms = (latencia_ms or 0) + espera_estimada(fuente.proveedor) * 1000
+        return (not disponible, posicion + (1 - exito) * PESO_EXITO + demora_ms / LATENCIA_REFERENCIA_MS)
+
+    return [fuente for _, fuente in sorted(enumerate(base), key=_puntaje)]
+
+def es_valido(resultado):
+    # Un precio en 0 (p. ej. BYMA sin operaciones) no gana la carrera
+    actual = resultado.get("Actual") if resultado else None
+    return actual is not None and actual == actual and actual > 0
+
+def obtener_primero(fuentes, limite=None, demora=None, errores=None, probadas=None, ticker=""):
+    """
+    Corre la lista ordenada de fuentes y devuelve (resultado, fuente) del primer
+    resultado válido, o (None, None). demora=None toma HEDGE_DEMORA; sin
+    PRECIOS_HEDGE cada fuente espera a que termine la anterior.
+
+    Args:
+        limite: context manager (proveedor, evento de cancelación), como motor.limite_proveedor.
+        errores, probadas: listas que se completan con los errores y las fuentes lanzadas.
+    """
+    if demora is None:
+        demora = HEDGE_DEMORA if PRECIOS_HEDGE else None
+    errores = errores if errores is not None else []
+    probadas = probadas if probadas is not None else []
+    pendientes = list(fuentes)
+    en_curso = {}
+    terminado = threading.Event()
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def _correr(fuente):
+        if terminado.is_set():
+            return None
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        try:
+            with cancelable(terminado):
+                if limite is None:
+                    return fuente.fn()
+                with limite(fuente.proveedor, terminado):
+                    # Puede haber ganado otra fuente mientras esperaba el semáforo
+                    if terminado.is_set():
+                        return None
+                    return fuente.fn()
+        except Exception as e:
+            # Las fallas de una fuente perdedora después de que otra ganó no se reportan
+            if not terminado.is_set():
+                errores.append(f"[{fuente.nombre}] {ticker}: {e}")
+            return None
+
+    def _siguiente():
+        # Sin nada en vuelo se lanza la próxima tal cual; como hedge, sólo una
+        # fuente que no vaya a quedar más de la demora esperando su límite de tasa
+        if not en_curso or demora is None:
+            return pendientes[0]
+        return next((f for f in pendientes if f.proveedor is None or espera_estimada(f.proveedor) <= demora), None)
+
+    _sumar(cadenas=1)
+    lanzar, por_demora = True, False
+    while True:
+        fuente = _siguiente() if lanzar and pendientes else None
+        if fuente is not None:
+            pendientes.remove(fuente)
+            probadas.append(fuente.nombre)
+            en_curso[_pool.submit(_correr, fuente)] = fuente
+            _sumar(lanzadas=1, por_demora=int(por_demora))
+        if not en_curso:
+            _sumar(sin_resultado=1)
+            return None, None
+
+        hechos, _ = wait(list(en_curso), timeout=demora if pendientes else None, return_when=FIRST_COMPLETED)
+        # Sin respuesta dentro de la demora (hedge) o fuente terminada sin resultado: lanzar la siguiente
+        lanzar, por_demora = True, not hechos
+        for futuro in hechos:
+            fuente = en_curso.pop(futuro)
+            resultado = futuro.result()
+            if es_valido(resultado):
+                terminado.set()
+                for perdedor in en_curso:
+                    perdedor.cancel()
+                with _lock:
+                    _contadores["descartadas"] += len(en_curso)
+                    _contadores["ganadoras"][fuente.clave] = _contadores["ganadoras"].get(fuente.clave, 0) + 1
+                return resultado, fuente
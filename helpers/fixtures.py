@@ -0,0 +1,121 @@
+# helpers/fixtures.py
+import os
+import json
+import threading
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+# Formato en disco de los fixtures de helpers/proveedores: un JSON por llamada y
+# un Parquet al lado por cada DataFrame/Series de la respuesta. Ninguno de los
+# dos ejecuta código al leerse (a diferencia de pickle), así que los fixtures se
+# pueden compartir y reproducir en CI. Los tipos que no entran en este formato
+# (p. ej. objetos de un SDK) no se graban: la llamada en vivo sigue igual.
+#
+# Valores especiales en el JSON: {"__tipo__": ...} con "tuple", "dict" (claves no
+# texto), "fecha", "dataframe"/"series" (archivo Parquet) y "error" (excepción
+# grabada; se vuelve a lanzar como ErrorGrabado con el nombre de la clase original).
+
+TIPO = "__tipo__"
+
+class FormatoNoSoportado(TypeError):
+    """La respuesta tiene un tipo que no se puede guardar como JSON/Parquet."""
+
+class ErrorGrabado(Exception):
+    """Excepción reproducida desde un fixture (la clase real se conserva en el nombre)."""
+
+class _Respuesta:
+    # Lo mínimo de requests.Response que miran circuito.es_falla y los helpers
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.text = ""
+
+def _clase_error(nombre):
+    # Subclase con el nombre original: circuito.es_falla clasifica por nombre de clase
+    return type(nombre, (ErrorGrabado,), {})
+
+def _codificar(valor, base, archivos):
+    if valor is None or isinstance(valor, (bool, str)):
+        return valor
+    if isinstance(valor, (int, float)):
+        return valor
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, (pd.Timestamp, datetime, date)):
+        return {TIPO: "fecha", "valor": pd.Timestamp(valor).isoformat()}
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        archivo = f"{base}-{len(archivos)}.parquet"
+        if isinstance(valor, pd.DataFrame):
+            archivos.append((archivo, valor))
+            return {TIPO: "dataframe", "archivo": archivo}
+        archivos.append((archivo, valor.to_frame(name="valor")))
+        return {TIPO: "series", "archivo": archivo, "nombre": _codificar(valor.name, base, archivos)}
+    if isinstance(valor, tuple):
+        return {TIPO: "tuple", "items": [_codificar(v, base, archivos) for v in valor]}
+    if isinstance(valor, list):
+        return [_codificar(v, base, archivos) for v in valor]
+    if isinstance(valor, dict):
+        if all(isinstance(k, str) for k in valor) and TIPO not in valor:
+            return {k: _codificar(v, base, archivos) for k, v in valor.items()}
+        return {TIPO: "dict", "items": [[_codificar(k, base, archivos), _codificar(v, base, archivos)] for k, v in valor.items()]}
+    raise FormatoNoSoportado(f"{type(valor).__name__} no se puede grabar como fixture")
+
+def _decodificar(valor, carpeta):
+    if isinstance(valor, list):
+        return [_decodificar(v, carpeta) for v in valor]
+    if not isinstance(valor, dict):
+        return valor
+    tipo = valor.get(TIPO)
+    if tipo is None:
+        return {k: _decodificar(v, carpeta) for k, v in valor.items()}
+    if tipo == "fecha":
+        return pd.Timestamp(valor["valor"])
+    if tipo in ("dataframe", "series"):
+        frame = pd.read_parquet(os.path.join(carpeta, valor["archivo"]))
+        if tipo == "dataframe":
+            return frame
+        return frame["valor"].rename(_decodificar(valor.get("nombre"), carpeta))
+    if tipo == "tuple":
+        return tuple(_decodificar(v, carpeta) for v in valor["items"])
+    if tipo == "dict":
+        return {_decodificar(k, carpeta): _decodificar(v, carpeta) for k, v in valor["items"]}
+    raise ValueError(f"Tipo de fixture desconocido: {tipo}")
+
+def _codificar_error(error):
+    respuesta = getattr(error, "response", None)
+    return {
+        TIPO: "error", "clase": type(error).__name__, "mensaje": str(error),
+        "status": getattr(respuesta, "status_code", None),
+    }
+
+def grabar(path, clave, resultado=None, error=None):
+    """Escribe el fixture (JSON en path + Parquet al lado). FormatoNoSoportado si no se puede."""
+    carpeta = os.path.dirname(path)
+    base = os.path.splitext(os.path.basename(path))[0]
+    archivos = []
+    datos = {
+        "clave": clave,
+        "resultado": _codificar(resultado, base, archivos),
+        "error": _codificar_error(error) if error is not None else None,
+    }
+    os.makedirs(carpeta, exist_ok=True)
+    sufijo = f".{threading.get_ident()}.tmp"
+    # Primero los Parquet y al final el JSON: un JSON presente siempre tiene sus archivos
+    for archivo, frame in archivos:
+        destino = os.path.join(carpeta, archivo)
+        frame.to_parquet(destino + sufijo)
+        os.replace(destino + sufijo, destino)
+    with open(path + sufijo, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(path + sufijo, path)
+
+def leer(path):
+    """Resultado grabado en path; si se grabó una excepción, la lanza (ErrorGrabado)."""
+    with open(path, encoding="utf-8") as f:
+        datos = json.load(f)
+    error = datos.get("error")
+    if error is not None:
+        excepcion = _clase_error(error["clase"])(error["mensaje"])
+        excepcion.response = _Respuesta(error["status"]) if error.get("status") is not None else None
+        raise excepcion
+    return _decodificar(datos["resultado"], os.path.dirname(path))
@@ -1,8 +1,14 @@
-import yfinance as yf
-import requests
-from deep_translator import GoogleTranslator
-from config import FINNHUB_API_KEY, FMP_API_KEY
-from helpers.score import es_bono_argentino, obtener_riesgo_pais, obtener_pais_ticker
+from config import FINNHUB_API_KEY, FMP_API_KEY, TRADUCCION_DIFERIDA
+from helpers.traduccion import traduccion_cacheada, traducir, COLUMNA_PENDIENTE
+from helpers.score import es_bono_argentino, obtener_riesgo_pais, obtener_pais_ticker, resolver_ticker, obtener_vix
+from helpers.info_yf import obtener_info
+from helpers.proveedores import llamar
+from helpers import sesiones_http
+
+def _json_si_ok(url):
+    # Devuelve el JSON de la respuesta, o None si el status no es 2xx
+    r = sesiones_http.get(url)
+    return r.json() if r.ok else None
 
 def obtener_info_fundamental(ticker):
     es_bono = es_bono_argentino(ticker)
@@ -18,7 +24,7 @@ def obtener_info_fundamental(ticker):
 
     # --- YFINANCE ---
     try:
-        info = yf.Ticker(ticker).info
+        info = obtener_info(resolver_ticker(ticker))
         resultado.update({
             "País": info.get("country"),
             "PEG Ratio": info.get("pegRatio"),
@@ -69,9 +75,9 @@ def obtener_info_fundamental(ticker):
     try:
         if FINNHUB_API_KEY:
             url = f"https://finnhub.io/api/v1/stock/metric?symbol={ticker}&metric=all&token={FINNHUB_API_KEY}"
-            r = requests.get(url)
-            if r.ok:
-                data = r.json().get("metric", {})
+            respuesta = llamar("finnhub", "metricas", _json_si_ok, url, clave=ticker)
+            if respuesta is not None:
+                data = respuesta.get("metric", {})
                 fcf_yield = data.get("freeCashFlowYieldAnnual")
                 if isinstance(fcf_yield, (int, float)):
                     resultado["FCF Yield"] = fcf_yield
@@ -82,9 +88,9 @@ def obtener_info_fundamental(ticker):
     try:
         if FMP_API_KEY:
             url = f"https://financialmodelingprep.com/api/v3/key-metrics-ttm/{ticker}?apikey={FMP_API_KEY}"
-            r = requests.get(url)
-            if r.ok and isinstance(r.json(), list) and r.json():
-                data = r.json()[0]
+            respuesta = llamar("fmp", "metricas", _json_si_ok, url, clave=ticker)
+            if isinstance(respuesta, list) and respuesta:
+                data = respuesta[0]
                 resultado.update({
                     "EV/EBITDA": data.get("evToEbitda") or resultado["EV/EBITDA"],
                     "Debt/Equity": data.get("debtEquityRatio") or resultado["Debt/Equity"],
@@ -98,15 +104,24 @@ def obtener_info_fundamental(ticker):
 
     # --- TRADUCCIÓN ---
     try:
-        if resultado.get("Contexto"):
-            resultado["Contexto"] = GoogleTranslator(source='auto', target='es').translate(resultado["Contexto"])
+        original = resultado.get("Contexto")
+        if original:
+            cacheado = traduccion_cacheada(original)
+            if cacheado is not None:
+                resultado["Contexto"] = cacheado
+            elif TRADUCCION_DIFERIDA:
+                # Se traduce después, en lote, cuando la tabla ya está en pantalla
+                resultado[COLUMNA_PENDIENTE] = original
+            else:
+                resultado["Contexto"] = traducir(original)
     except Exception as e:
         print(f"[traducción] {ticker} -> {e}")
 
     # --- VIX ---
     try:
-        vix = yf.Ticker("^VIX").history("1d")["Close"].iloc[-1]
-        resultado["VIX"] = round(vix, 2)
+        vix = obtener_vix()
+        if vix is not None:
+            resultado["VIX"] = round(vix, 2)
     except Exception as e:
         print(f"[VIX] {ticker} -> {e}")
 
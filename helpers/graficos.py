@@ -3,7 +3,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
-def graficar_precio_historico(nombre, df):
+def graficar_precio_historico(nombre, df, indicadores=None):
     if df is None:
         st.warning(f"No hay dataframe para {nombre}.")
         return
@@ -33,6 +33,13 @@ def graficar_precio_historico(nombre, df):
     actual = df['Close'].iloc[-1]
     fecha_actual = df.index[-1].strftime("%Y-%m-%d")
     ax.axhline(actual, color='red', linestyle='--', label=f'Precio Actual ({actual:.2f})')
+
+    # Indicadores del panel técnico (últimas barras), si están disponibles
+    if isinstance(indicadores, pd.DataFrame) and not indicadores.empty:
+        ax.plot(indicadores.index, indicadores['EMA50'], label='EMA50', linewidth=1, color='orange')
+        ax.plot(indicadores.index, indicadores['EMA200'], label='EMA200', linewidth=1, color='purple')
+        ax.fill_between(indicadores.index, indicadores['Bollinger Lower'], indicadores['Bollinger Upper'],
+                        color='gray', alpha=0.2, label='Bandas Bollinger')
     ax.set_title(f'Histórico de precios: {nombre} (hasta {fecha_actual})')
     ax.set_xlabel('Fecha')
     ax.set_ylabel('Precio')
@@ -0,0 +1,151 @@
+# helpers/historico.py
+import os
+import re
+import glob
+import json
+import threading
+from datetime import datetime
+import pandas as pd
+from helpers.cache_disco import leer_json, guardar_json
+
+# Archivo histórico de snapshots del análisis en Parquet, particionado por fecha:
+#   historicos/parquet/fecha=YYYY-MM-DD/corrida-HHMMSS-ffffff.parquet
+# más un manifest.json con fecha, corrida, filas, tickers y columnas de cada
+# archivo. Las consultas eligen archivos por el manifest (sin glob ni stat) y
+# leen sólo las columnas pedidas.
+
+# Relativa al repo y no al directorio de trabajo: la app, el entrenamiento y el
+# benchmark leen el mismo archivo se lancen desde donde se lancen
+CARPETA_HISTORICOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "historicos")
+CARPETA_ARCHIVO = os.path.join(CARPETA_HISTORICOS, "parquet")
+PATRON_CSV_LEGADO = "AnalisisFinal-*_export.csv"
+
+# Columnas que no se archivan: objetos en memoria, auxiliares de la UI y el
+# Contexto (descripción larga de la empresa, traducida): se repetiría igual en
+# cada snapshot y ningún consumidor del archivo la lee
+COLUMNAS_EXCLUIDAS = ["Hist", "Contexto", "__contexto_original", "__orden_score"]
+
+_lock = threading.Lock()
+
+def _ruta_manifest(carpeta=CARPETA_ARCHIVO):
+    return os.path.join(carpeta, "manifest.json")
+
+def cargar_manifest(carpeta=CARPETA_ARCHIVO):
+    return leer_json(_ruta_manifest(carpeta)) or {"archivos": []}
+
+def _sanear(df):
+    """Deja el DataFrame con tipos que Parquet puede guardar de forma estable."""
+    df = df.drop(columns=[c for c in COLUMNAS_EXCLUIDAS if c in df.columns])
+    df = df.loc[:, [not str(c).startswith("Unnamed:") for c in df.columns]]
+    for col in df.columns:
+        if df[col].dtype != object:
+            continue
+        numerica = pd.to_numeric(df[col], errors="coerce")
+        if numerica.notna().sum() == df[col].notna().sum():
+            df[col] = numerica
+        else:
+            # Listas/dicts (p. ej. justificaciones) como JSON, el resto como texto
+            df[col] = df[col].map(
+                lambda v: None if v is None or (isinstance(v, float) and pd.isna(v))
+                else json.dumps(v, ensure_ascii=False, default=str) if isinstance(v, (list, dict))
+                else str(v)
+            )
+    return df.reset_index(drop=True)
+
+def guardar_snapshot(df, momento=None, origen=None, carpeta=CARPETA_ARCHIVO):
+    """
+    Agrega un snapshot al archivo (append: un Parquet nuevo por corrida) y lo
+    registra en el manifest. Devuelve el path relativo del archivo escrito.
+    """
+    momento = momento or datetime.now()
+    fecha = momento.strftime("%Y-%m-%d")
+    df = _sanear(df)
+    df.insert(0, "Corrida", pd.Timestamp(momento))
+    df.insert(0, "Fecha", pd.Timestamp(fecha))
+
+    # Con microsegundos: dos corridas en el mismo segundo no se pisan el archivo
+    relativo = os.path.join(f"fecha={fecha}", f"corrida-{momento.strftime('%H%M%S-%f')}.parquet")
+    path = os.path.join(carpeta, relativo)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock:
+        tmp = f"{path}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+
+        manifest = cargar_manifest(carpeta)
+        manifest["archivos"] = [a for a in manifest["archivos"] if a["path"] != relativo]
+        manifest["archivos"].append({
+            "path": relativo,
+            "fecha": fecha,
+            "corrida": momento.isoformat(timespec="seconds"),
+            "filas": int(len(df)),
+            "tickers": sorted(df["Ticker"].dropna().astype(str).unique().tolist()) if "Ticker" in df.columns else [],
+            "columnas": list(df.columns),
+            "origen": origen,
+        })
+        manifest["archivos"].sort(key=lambda a: a["corrida"])
+        guardar_json(_ruta_manifest(carpeta), manifest)
+    print(f"[Histórico] Snapshot guardado en {path} ({len(df)} filas)")
+    return relativo
+
+def _leer(archivos, columnas=None, carpeta=CARPETA_ARCHIVO):
+    partes = []
+    for archivo in archivos:
+        cols = None
+        if columnas is not None:
+            cols = [c for c in dict.fromkeys(["Fecha", "Corrida"] + list(columnas)) if c in archivo["columnas"]]
+        try:
+            partes.append(pd.read_parquet(os.path.join(carpeta, archivo["path"]), columns=cols))
+        except Exception as e:
+            print(f"[Histórico] No se pudo leer {archivo['path']}: {e}")
+    if not partes:
+        return pd.DataFrame(columns=["Fecha", "Corrida"] + list(columnas or []))
+    return pd.concat(partes, ignore_index=True)
+
+def ultimo_snapshot(columnas=None, carpeta=CARPETA_ARCHIVO):
+    """Snapshot más reciente (sólo las columnas pedidas)."""
+    archivos = cargar_manifest(carpeta)["archivos"]
+    return _leer(archivos[-1:], columnas, carpeta)
+
+def historia_ticker(ticker, columnas=None, carpeta=CARPETA_ARCHIVO):
+    """Todas las filas de un ticker a lo largo de las fechas, ordenadas por corrida."""
+    ticker = str(ticker).upper()
+    archivos = [a for a in cargar_manifest(carpeta)["archivos"] if ticker in a["tickers"]]
+    df = _leer(archivos, None if columnas is None else ["Ticker"] + list(columnas), carpeta)
+    if df.empty:
+        return df
+    return df[df["Ticker"].astype(str).str.upper() == ticker].sort_values("Corrida").reset_index(drop=True)
+
+def cargar_snapshots(columnas=None, desde=None, hasta=None, carpeta=CARPETA_ARCHIVO):
+    """Todos los snapshots del rango de fechas [desde, hasta] en un único DataFrame."""
+    archivos = cargar_manifest(carpeta)["archivos"]
+    if desde is not None:
+        archivos = [a for a in archivos if a["fecha"] >= pd.Timestamp(desde).strftime("%Y-%m-%d")]
+    if hasta is not None:
+        archivos = [a for a in archivos if a["fecha"] <= pd.Timestamp(hasta).strftime("%Y-%m-%d")]
+    return _leer(archivos, columnas, carpeta)
+
+# --- Migración de los CSV anteriores ---
+def _momento_desde_nombre(archivo):
+    # AnalisisFinal-2025-05-22T14-33_export.csv o AnalisisFinal-2025-05-22_export.csv
+    coincidencia = re.search(r"AnalisisFinal-(\d{4}-\d{2}-\d{2})(?:T(\d{2})-(\d{2}))?", os.path.basename(archivo))
+    if not coincidencia:
+        return None
+    fecha, hora, minuto = coincidencia.groups()
+    return datetime.strptime(f"{fecha} {hora or '00'}:{minuto or '00'}", "%Y-%m-%d %H:%M")
+
+def importar_csv_legados(carpeta_csv=CARPETA_HISTORICOS, carpeta=CARPETA_ARCHIVO):
+    """Pasa al archivo los AnalisisFinal-*_export.csv que todavía no estén en el manifest."""
+    importados = {a.get("origen") for a in cargar_manifest(carpeta)["archivos"]}
+    nuevos = 0
+    for archivo in sorted(glob.glob(os.path.join(carpeta_csv, PATRON_CSV_LEGADO))):
+        nombre = os.path.basename(archivo)
+        momento = _momento_desde_nombre(archivo)
+        if nombre in importados or momento is None:
+            continue
+        try:
+            guardar_snapshot(pd.read_csv(archivo), momento=momento, origen=nombre, carpeta=carpeta)
+            nuevos += 1
+        except Exception as e:
+            print(f"[Histórico] No se pudo importar {archivo}: {e}")
+    return nuevos
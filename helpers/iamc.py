@@ -1,13 +1,14 @@
 
 # helpers/iamc.py
 import pandas as pd
+from helpers.proveedores import llamar
 
 def obtener_precio_bono_iamc(ticker):
     # Esta función simula lectura desde un archivo CSV descargado manualmente de IAMC
     # Podés automatizar esto con pandas.read_csv desde un path local o remoto
     try:
         iamc_path = "./iamc_cotizaciones.csv"  # debe existir con columnas: 'Ticker', 'Precio'
-        df = pd.read_csv(iamc_path)
+        df = llamar("iamc", "cotizaciones", pd.read_csv, iamc_path)
         row = df[df['Ticker'].str.upper() == ticker.upper()]
         if row.empty:
             return None
@@ -0,0 +1,188 @@
+# helpers/indicadores.py
+import numpy as np
+import pandas as pd
+from helpers.score import (
+    calcular_rsi, calcular_macd, calcular_ema, calcular_bollinger,
+    actualizar_estado_indicadores, estado_indicadores_inicial, valores_estado_indicadores
+)
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json
+
+# Motor de indicadores técnicos para todo el portafolio a la vez. Los cierres de
+# todos los tickers se alinean en una matriz fecha x ticker y los calcular_* de
+# helpers/score.py se aplican sobre la matriz completa (reciben {"Close": matriz}).
+
+# Barras necesarias para leer el último valor de cada indicador. EMA/MACD usan
+# adjust=False: con 10x el span de la EMA más larga (200) el peso de la historia
+# descartada es < 1e-8, así que el resultado coincide con el cálculo completo.
+LOOKBACK_RSI = 14 + 1
+LOOKBACK_BOLLINGER = 20
+LOOKBACK_EMA = 200 * 10
+VENTANA_CALCULO = max(LOOKBACK_RSI, LOOKBACK_BOLLINGER, LOOKBACK_EMA)
+VENTANA_GRAFICO = 252
+
+COLUMNAS_INDICADORES = ["Close", "RSI", "MACD", "Signal", "EMA50", "EMA200", "Bollinger Lower", "Bollinger Upper"]
+TOLERANCIA_VERIFICACION = 1e-6
+
+def _a_frame(hist):
+    if isinstance(hist, dict):
+        hist = pd.DataFrame(hist)
+    if not isinstance(hist, pd.DataFrame) or hist.empty or "Close" not in hist.columns:
+        return None
+    return hist
+
+def panel_cierres(hists):
+    """Matriz fecha x clave con el cierre de cada histórico (Series/dict clave -> Hist)."""
+    columnas = {}
+    for clave, hist in dict(hists).items():
+        hist = _a_frame(hist)
+        if hist is None:
+            continue
+        cierre = pd.to_numeric(hist["Close"], errors="coerce").copy()
+        indice = pd.to_datetime(cierre.index, errors="coerce")
+        if getattr(indice, "tz", None) is not None:
+            indice = indice.tz_localize(None)
+        cierre.index = indice
+        cierre = cierre[cierre.index.notna() & ~cierre.index.duplicated(keep="last")]
+        columnas[clave] = cierre
+    if not columnas:
+        return pd.DataFrame()
+    return pd.concat(columnas, axis=1).sort_index()
+
+def _alinear_al_final(cierres, n):
+    """
+    Toma las últimas n barras válidas de cada columna y las alinea abajo: la fila -1
+    es el último cierre de cada ticker aunque los calendarios difieran (cripto vs.
+    acciones). Devuelve la matriz y las fechas correspondientes.
+    """
+    valores = np.full((n, cierres.shape[1]), np.nan)
+    fechas = {}
+    for j, clave in enumerate(cierres.columns):
+        serie = cierres[clave].dropna().iloc[-n:]
+        if serie.empty:
+            continue
+        valores[n - len(serie):, j] = serie.to_numpy()
+        fechas[clave] = serie.index
+    return pd.DataFrame(valores, columns=cierres.columns), fechas
+
+def calcular_panel(hists, ventana_grafico=VENTANA_GRAFICO, simbolos=None, verificar=False):
+    """
+    Calcula RSI, MACD, EMA50/200 y Bollinger para todos los históricos juntos.
+
+    Con simbolos (Series/dict clave -> ticker), "ultimos" sale del estado
+    incremental persistido de cada ticker en vez del cálculo sobre la matriz, y
+    las series para gráficos se calculan recién cuando se piden (ver
+    series_panel).
+
+    Returns:
+        dict: "cierres" (fecha x clave), "ultimos" (clave x indicador, último valor,
+        para el score) y "series" (clave -> DataFrame con las últimas
+        ventana_grafico barras, para los gráficos).
+    """
+    cierres = panel_cierres(hists)
+    if cierres.empty:
+        return {"cierres": cierres, "ultimos": pd.DataFrame(columns=COLUMNAS_INDICADORES), "series": {}}
+    if simbolos is not None:
+        simbolos = dict(simbolos)
+        ultimos = pd.DataFrame.from_dict({
+            clave: indicadores_incrementales(simbolos[clave], cierres[clave], verificar=verificar)
+            for clave in cierres.columns if clave in simbolos
+        }, orient="index", columns=COLUMNAS_INDICADORES).astype(float)
+        return {"cierres": cierres, "ultimos": ultimos, "series": None}
+    return _calcular_matriz(cierres, ventana_grafico)
+
+def series_panel(panel, ventana_grafico=VENTANA_GRAFICO):
+    """Series para gráficos de un panel calculado en modo incremental (se calculan una vez)."""
+    if panel["series"] is None:
+        panel["series"] = _calcular_matriz(panel["cierres"], ventana_grafico)["series"] if not panel["cierres"].empty else {}
+    return panel["series"]
+
+def _calcular_matriz(cierres, ventana_grafico):
+    """Cálculo vectorizado sobre la matriz de cierres, limitado a VENTANA_CALCULO barras."""
+    matriz, fechas = _alinear_al_final(cierres, min(VENTANA_CALCULO, len(cierres)))
+    panel = {"Close": matriz}
+    panel = calcular_ema(panel)
+    panel = calcular_bollinger(panel)
+    panel["RSI"] = calcular_rsi(panel)
+    panel["MACD"], panel["Signal"] = calcular_macd(panel)
+
+    ultimos = pd.DataFrame({col: panel[col].iloc[-1] for col in COLUMNAS_INDICADORES})
+    # El RSI es el último valor no nulo (los primeros 14 quedan en NaN)
+    ultimos["RSI"] = panel["RSI"].ffill().iloc[-1]
+
+    series = {}
+    for clave, idx_fechas in fechas.items():
+        n = min(ventana_grafico, len(idx_fechas))
+        series[clave] = pd.DataFrame(
+            {col: panel[col][clave].iloc[-n:].to_numpy() for col in COLUMNAS_INDICADORES},
+            index=idx_fechas[-n:]
+        )
+    return {"cierres": cierres, "ultimos": ultimos, "series": series}
+
+# --- Modo incremental con estado persistido por ticker ---
+def _ruta_estado(simbolo):
+    nombre = str(simbolo).upper().replace("/", "_").replace(":", "_")
+    return ruta_cache("indicadores", f"{nombre}.json")
+
+def verificar_estado(estado, cierres):
+    """Compara el estado incremental con el cálculo completo. Devuelve las diferencias."""
+    df = pd.DataFrame({"Close": cierres.to_numpy()})
+    df = calcular_ema(df)
+    df = calcular_bollinger(df)
+    df["RSI"] = calcular_rsi(df)
+    df["MACD"], df["Signal"] = calcular_macd(df)
+    completo = df.iloc[-1].to_dict()
+    completo["RSI"] = df["RSI"].dropna().iloc[-1] if df["RSI"].notna().any() else None
+
+    obtenido = valores_estado_indicadores(estado)
+    diferencias = {}
+    for col in COLUMNAS_INDICADORES:
+        esperado, valor = completo[col], obtenido[col]
+        if esperado is None or pd.isna(esperado):
+            if valor is not None:
+                diferencias[col] = (esperado, valor)
+        elif valor is None or abs(valor - esperado) > TOLERANCIA_VERIFICACION * max(1.0, abs(esperado)):
+            diferencias[col] = (esperado, valor)
+    return diferencias
+
+def indicadores_incrementales(simbolo, cierres, verificar=False):
+    """
+    Últimos valores de los indicadores de un ticker usando su estado persistido:
+    sólo se procesan las barras posteriores a la última vista. Si el histórico
+    cambió hacia atrás (p. ej. precios ajustados por dividendos) o la ventana es
+    otra (cambió la primera barra o la cantidad de barras hasta la última vista,
+    p. ej. otra fecha de inicio) se reconstruye.
+    """
+    cierres = cierres.dropna()
+    if cierres.empty:
+        return {col: None for col in COLUMNAS_INDICADORES}
+    fechas = cierres.index.strftime("%Y-%m-%d")
+    path = _ruta_estado(simbolo)
+    estado = leer_json(path)
+
+    reutilizable = False
+    # El estado depende de toda la historia recorrida: sólo sirve para la misma ventana
+    if estado and estado.get("primera") == fechas[0] and estado.get("fecha") in set(fechas):
+        pos = fechas.get_loc(estado["fecha"])
+        anterior = cierres.iloc[pos]
+        reutilizable = (
+            estado.get("barras") == pos + 1
+            and abs(anterior - estado["cierre"]) <= TOLERANCIA_VERIFICACION * max(1.0, abs(anterior))
+        )
+
+    if reutilizable:
+        for fecha, cierre in zip(fechas[pos + 1:], cierres.iloc[pos + 1:]):
+            estado = actualizar_estado_indicadores(estado, cierre, fecha)
+    else:
+        estado = estado_indicadores_inicial(pd.DataFrame({"Close": cierres.to_numpy()}, index=fechas))
+        estado["primera"] = fechas[0]
+
+    try:
+        guardar_json(path, estado)
+    except OSError as e:
+        print(f"[Indicadores] No se pudo persistir el estado de {simbolo}: {e}")
+
+    if verificar:
+        diferencias = verificar_estado(estado, cierres)
+        if diferencias:
+            print(f"[Indicadores] {simbolo}: el estado incremental difiere del cálculo completo {diferencias}")
+    return valores_estado_indicadores(estado)
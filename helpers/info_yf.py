@@ -0,0 +1,100 @@
+# helpers/info_yf.py
+import threading
+import yfinance as yf
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json
+from helpers.proveedores import llamar, registrar_cache
+from config import INFO_CACHE_TTL
+
+# Snapshot de yf.Ticker(...).info compartido por todos los helpers.
+# Alcance de ejecución: un dict en memoria que se limpia con iniciar_ejecucion().
+# Alcance entre ejecuciones (opcional): JSON en disco con TTL INFO_CACHE_TTL.
+
+_lock = threading.Lock()
+_ejecucion = {}
+_en_curso = {}
+_contadores = {}
+
+def _contadores_en_cero():
+    return {"solicitudes": 0, "hits_ejecucion": 0, "hits_disco": 0, "llamadas_upstream": 0, "errores": 0}
+
+_contadores = _contadores_en_cero()
+
+def iniciar_ejecucion():
+    """Descarta el snapshot de la ejecución anterior y reinicia los contadores."""
+    global _contadores
+    with _lock:
+        _ejecucion.clear()
+        _contadores = _contadores_en_cero()
+
+def estadisticas_info():
+    with _lock:
+        stats = dict(_contadores)
+    stats["evitadas"] = stats["hits_ejecucion"] + stats["hits_disco"]
+    return stats
+
+def _info_upstream(simbolo):
+    return yf.Ticker(simbolo).info
+
+def _resolver(simbolo):
+    # Devuelve el info o relanza el error original, igual que yf.Ticker(...).info
+    info, error = _ejecucion[simbolo]
+    if error is not None:
+        raise error
+    return info
+
+def obtener_info(simbolo, ttl=INFO_CACHE_TTL):
+    """
+    Devuelve el dict .info de yfinance para un símbolo ya resuelto (post ticker_map).
+    Llamadas concurrentes al mismo símbolo esperan a una única descarga.
+    """
+    simbolo = simbolo.upper()
+    with _lock:
+        _contadores["solicitudes"] += 1
+        if simbolo in _ejecucion:
+            _contadores["hits_ejecucion"] += 1
+            registrar_cache("yahoo", True)
+            return _resolver(simbolo)
+        evento = _en_curso.get(simbolo)
+        propietario = evento is None
+        if propietario:
+            evento = _en_curso[simbolo] = threading.Event()
+
+    if not propietario:
+        evento.wait()
+        with _lock:
+            _contadores["hits_ejecucion"] += 1
+            registrar_cache("yahoo", True)
+            return _resolver(simbolo)
+
+    info, error = None, None
+    try:
+        path = ruta_cache("info_yf", f"{simbolo.replace('/', '_')}.json")
+        if ttl and ttl > 0:
+            info = leer_json(path, ttl=ttl)
+        if info is not None:
+            with _lock:
+                _contadores["hits_disco"] += 1
+            registrar_cache("yahoo", True)
+        else:
+            with _lock:
+                _contadores["llamadas_upstream"] += 1
+            registrar_cache("yahoo", False)
+            info = llamar("yahoo", "info", _info_upstream, simbolo) or {}
+            if ttl and ttl > 0:
+                try:
+                    guardar_json(path, info)
+                except OSError as e:
+                    print(f"[info_yf] No se pudo persistir {simbolo}: {e}")
+    except Exception as e:
+        error = e
+        with _lock:
+            _contadores["errores"] += 1
+    finally:
+        with _lock:
+            _ejecucion[simbolo] = (info, error)
+            _en_curso.pop(simbolo, None)
+        evento.set()
+
+    if error is not None:
+        raise error
+    return info
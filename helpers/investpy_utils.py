@@ -1,9 +1,14 @@
 import investpy
+import pandas as pd
 from datetime import datetime, time
 import warnings
-import time as time_module  # para sleep
+from helpers.proveedores import llamar
+from helpers.circuito import CircuitoAbierto
 
-def analizar_con_investpy(nombre, pais, fecha_inicio, fecha_fin, reintentos=2, espera=1.5):
+def _historico(nombre, pais, desde, hasta):
+    return investpy.get_stock_historical_data(stock=nombre, country=pais, from_date=desde, to_date=hasta)
+
+def analizar_con_investpy(nombre, pais, fecha_inicio, fecha_fin, reintentos=2):
     """
     Analiza un activo usando Investpy, devolviendo métricas básicas y el histórico.
 
@@ -12,8 +17,8 @@ def analizar_con_investpy(nombre, pais, fecha_inicio, fecha_fin, reintentos=2, e
         pais (str): País del activo (ej: 'argentina')
         fecha_inicio (datetime.date): Fecha de inicio
         fecha_fin (datetime.date): Fecha de fin
-        reintentos (int): Cantidad de reintentos si falla la descarga
-        espera (float): Segundos entre reintentos
+        reintentos (int): Cantidad de reintentos si falla la descarga (el espaciado
+            entre llamadas lo pone el límite de tasa de "investpy" en LIMITES_TASA)
 
     Returns:
         dict | None: Diccionario con métricas y dataframe 'Hist' o None si falla.
@@ -23,11 +28,9 @@ def analizar_con_investpy(nombre, pais, fecha_inicio, fecha_fin, reintentos=2, e
             fecha_inicio_dt = datetime.combine(fecha_inicio, time.min)
             fecha_fin_dt = datetime.combine(fecha_fin, time.min)
 
-            df = investpy.get_stock_historical_data(
-                stock=nombre,
-                country=pais,
-                from_date=fecha_inicio_dt.strftime('%d/%m/%Y'),
-                to_date=fecha_fin_dt.strftime('%d/%m/%Y')
+            df = llamar(
+                "investpy", "historico", _historico, nombre, pais,
+                fecha_inicio_dt.strftime('%d/%m/%Y'), fecha_fin_dt.strftime('%d/%m/%Y')
             )
 
             if df.empty or 'Close' not in df.columns:
@@ -60,7 +63,6 @@ def analizar_con_investpy(nombre, pais, fecha_inicio, fecha_fin, reintentos=2, e
         except Exception as e:
             print(f"[Investpy] Error al intentar obtener {nombre} ({pais}) - Intento {intento}: {e}")
             warnings.warn(f"[Investpy] Falló intento {intento} para {nombre} - {e}")
-            if intento < reintentos:
-                time_module.sleep(espera)
-            else:
+            # Con el circuito abierto reintentar no sirve: falla al instante hasta el enfriamiento
+            if intento == reintentos or isinstance(e, CircuitoAbierto):
                 return None
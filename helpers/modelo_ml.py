@@ -0,0 +1,85 @@
+# helpers/modelo_ml.py
+import os
+import time
+import threading
+from datetime import datetime
+import joblib
+import numpy as np
+import pandas as pd
+
+# Servicio del modelo de retorno a 12M: se carga una vez por proceso y sólo se
+# vuelve a leer cuando cambia el mtime del pickle (p. ej. después de reentrenar).
+
+ARCHIVO_MODELO = "modelo_retorno.pkl"
+
+# Mismo orden de columnas con el que entrena helpers/entrenar_modelo.py
+FEATURES = [
+    "Beta", "ROE", "ROIC", "PEG Ratio", "FCF Yield", "P/E Ratio", "P/B Ratio",
+    "Dividend Yield", "Debt/Equity", "EV/EBITDA", "Forward EPS",
+    "Forward Revenue Growth", "Margen Futuro", "Score Numérico Total"
+]
+
+_lock = threading.Lock()
+_cargado = {"path": None, "mtime": None, "modelo": None, "version": None}
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+def version_modelo(path=ARCHIVO_MODELO):
+    """Versión del pickle en disco (fecha de modificación), o None si no existe."""
+    mtime = _mtime(path)
+    return datetime.fromtimestamp(mtime).strftime("%Y-%m-%d %H:%M:%S") if mtime is not None else None
+
+def obtener_modelo(path=ARCHIVO_MODELO):
+    """Devuelve (modelo, versión). Relee el pickle sólo si cambió desde la última carga."""
+    mtime = _mtime(path)
+    if mtime is None:
+        return None, None
+    with _lock:
+        if _cargado["path"] != path or _cargado["mtime"] != mtime:
+            modelo = joblib.load(path)
+            _cargado.update(path=path, mtime=mtime, modelo=modelo, version=version_modelo(path))
+            print(f"[Modelo ML] Cargado {path} (versión {_cargado['version']})")
+        return _cargado["modelo"], _cargado["version"]
+
+def predecir_lote(df, path=ARCHIVO_MODELO):
+    """
+    Predice "Retorno 12M ML (%)" para todas las filas de df en un único predict.
+    Las filas con algún feature faltante o no numérico quedan en NaN (el modelo
+    no imputa en inferencia).
+
+    Returns:
+        tuple: (Series alineada con df, metricas) con versión, latencia en ms,
+        filas predichas, filas sin datos completos, features ausentes y error.
+    """
+    predicciones = pd.Series(np.nan, index=df.index, dtype=float)
+    metricas = {
+        "version": None, "latencia_ms": None, "predichas": 0,
+        "sin_datos": len(df), "features_ausentes": [f for f in FEATURES if f not in df.columns], "error": None,
+    }
+    try:
+        modelo, metricas["version"] = obtener_modelo(path)
+    except Exception as e:
+        metricas["error"] = f"No se pudo cargar el modelo: {e}"
+        return predicciones, metricas
+    if modelo is None:
+        metricas["error"] = f"No existe {path}"
+        return predicciones, metricas
+
+    X = df.reindex(columns=FEATURES).apply(pd.to_numeric, errors="coerce")
+    completas = X.notna().all(axis=1)
+    metricas["sin_datos"] = int((~completas).sum())
+    if not completas.any():
+        return predicciones, metricas
+
+    inicio = time.perf_counter()
+    try:
+        predicciones[completas] = np.round(modelo.predict(X[completas]), 2)
+        metricas["predichas"] = int(completas.sum())
+    except Exception as e:
+        metricas["error"] = f"Falló la predicción: {e}"
+    metricas["latencia_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+    return predicciones, metricas
@@ -0,0 +1,321 @@
+# helpers/motor.py
+import time
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import pandas as pd
+from helpers.score import (
+    ticker_map, obtener_pais_ticker, es_bono_argentino,
+    agregar_proyecciones_forward, resolver_ticker, construir_contexto_mercado
+)
+from helpers.yahoo import analizar_con_yfinance
+from helpers.precios_store import obtener_historicos_lote
+from helpers.alphavantage import analizar_con_alphavantage
+from helpers.coingecko import analizar_con_coingecko, cargar_indice_coingecko, resolver_coingecko, es_cripto
+from helpers.investpy_utils import analizar_con_investpy
+from helpers.fundamentales import obtener_info_fundamental
+from helpers.byma import obtener_precio_bono_byma, precargar_bonos_byma
+from helpers.rava import obtener_precio_bono_rava
+from helpers.fallback import (
+    Fuente, ordenar, obtener_primero, tipo_instrumento,
+    iniciar_ejecucion as iniciar_ejecucion_fallback, estadisticas_fallback
+)
+from helpers.info_yf import iniciar_ejecucion as iniciar_ejecucion_info, estadisticas_info
+from helpers.proveedores import iniciar_ejecucion_metricas, metricas_proveedores
+from helpers.planificador import TurnoCancelado
+from helpers.sesiones_http import estadisticas_http
+from helpers.indicadores import calcular_panel
+from helpers.score_vectorizado import puntuar_portafolio
+from config import (
+    ES_CLOUD, ALPHA_VANTAGE_API_KEY, MAX_WORKERS, LIMITES_PROVEEDOR, YF_TAMANO_LOTE,
+    INDICADORES_INCREMENTALES, INDICADORES_VERIFICAR, PRECIOS_HEDGE
+)
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:
+    add_script_run_ctx = get_script_run_ctx = None
+
+# --- Clave de caché del análisis ---
+def configuracion_fuentes():
+    """Parámetros que cambian qué fuentes se consultan (y por lo tanto el resultado)."""
+    return {
+        "es_cloud": bool(ES_CLOUD),
+        "alpha_vantage": bool(ALPHA_VANTAGE_API_KEY),
+        "hedge": bool(PRECIOS_HEDGE),
+    }
+
+def clave_analisis(tickers, fecha_inicio, fecha_fin, fuentes=None):
+    """
+    Hash estable de los insumos de analizar_portafolio: lista de tickers (en orden),
+    rango de fechas y configuración de fuentes. Misma clave = mismo análisis.
+    """
+    contenido = {
+        "tickers": [str(t).strip().upper() for t in tickers if not pd.isna(t) and str(t).strip()],
+        "desde": str(fecha_inicio),
+        "hasta": str(fecha_fin),
+        "fuentes": fuentes if fuentes is not None else configuracion_fuentes(),
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+# --- Límites de concurrencia por proveedor ---
+_semaforos = {p: threading.BoundedSemaphore(n) for p, n in LIMITES_PROVEEDOR.items()}
+
+@contextmanager
+def limite_proveedor(proveedor, cancelado=None):
+    """Semáforo del proveedor; si cancelado se activa mientras espera, lanza TurnoCancelado."""
+    sem = _semaforos.get(proveedor)
+    if sem is None:
+        yield
+        return
+    if cancelado is None:
+        sem.acquire()
+    else:
+        while not sem.acquire(timeout=0.05):
+            if cancelado.is_set():
+                raise TurnoCancelado(f"{proveedor}: espera del semáforo cancelada")
+    try:
+        yield
+    finally:
+        sem.release()
+
+# --- Pipeline completo de un ticker ---
+def _como_bono(resultado, fuente=None):
+    if resultado:
+        resultado.setdefault("Fuente", fuente)
+        resultado["Tipo"] = "Bono"
+        aviso = "⚠️ Solo precio disponible, sin métricas fundamentales"
+        # Se conserva el aviso de la fuente (p. ej. el último cierre de un precio viejo)
+        previo = resultado.get("Advertencia")
+        resultado["Advertencia"] = f"{previo} · {aviso}" if previo else aviso
+    return resultado
+
+def analizar_ticker(raw_ticker, fecha_inicio, fecha_fin, cg, hist_lote=None):
+    """
+    Ejecuta la cadena de fuentes de precios (helpers/fallback: orden por tipo de
+    instrumento, con hedge), fundamentales y proyecciones para un único ticker.
+    Si hist_lote (símbolo -> histórico) viene de la descarga agrupada, Yahoo no
+    se vuelve a consultar individualmente: los símbolos que el lote no trajo
+    pasan directo al resto de la cadena.
+
+    Returns:
+        tuple: (resultado, errores_conexion, segundos)
+    """
+    inicio = time.perf_counter()
+    errores = []
+    fuentes_probadas = []
+    ticker_clean = raw_ticker.upper()
+    ticker_real = ticker_map.get(ticker_clean, ticker_clean)
+    es_bono = es_bono_argentino(ticker_clean)
+    cripto = es_cripto(ticker_clean, ticker_real)
+
+    # Fuentes disponibles para este ticker; el orden depende del tipo de instrumento
+    fuentes = {}
+    sin_lote = not ES_CLOUD and hist_lote is not None and ticker_real not in hist_lote
+    if not ES_CLOUD and hist_lote is not None:
+        if not sin_lote:
+            fuentes["yahoo"] = Fuente("yahoo", "Yahoo Finance (lote)", None,
+                                      lambda: analizar_con_yfinance(ticker_real, fecha_inicio, fecha_fin, hist=hist_lote[ticker_real]))
+    elif not ES_CLOUD:
+        fuentes["yahoo"] = Fuente("yahoo", "Yahoo Finance", "yahoo",
+                                  lambda: analizar_con_yfinance(ticker_real, fecha_inicio, fecha_fin))
+    if ALPHA_VANTAGE_API_KEY:
+        fuentes["alphavantage"] = Fuente("alphavantage", "Alpha Vantage", "alphavantage",
+                                         lambda: analizar_con_alphavantage(ticker_clean, fecha_inicio, fecha_fin))
+    # Sólo con marca de cripto (BTC-USD): el índice de CoinGecko tiene símbolos que chocan con acciones (SOL, LINK, ...)
+    if cripto and resolver_coingecko(ticker_real):
+        fuentes["coingecko"] = Fuente("coingecko", "CoinGecko", "coingecko",
+                                      lambda: analizar_con_coingecko(cg, ticker_real, fecha_inicio, fecha_fin))
+    pais = obtener_pais_ticker(ticker_clean)
+    fuentes["investpy"] = Fuente("investpy", f"Investpy ({pais})", "investpy",
+                                 lambda: analizar_con_investpy(ticker_clean, pais, fecha_inicio, fecha_fin))
+    if es_bono:
+        fuentes["byma"] = Fuente("byma", "BYMA", "byma", lambda: _como_bono(obtener_precio_bono_byma(ticker_clean)))
+        fuentes["rava"] = Fuente("rava", "Rava", "rava", lambda: _como_bono(obtener_precio_bono_rava(ticker_clean), "Rava"))
+
+    tipo = tipo_instrumento(ticker_clean, es_bono, cripto)
+    resultado, _ = obtener_primero(
+        ordenar(fuentes, tipo), limite=limite_proveedor,
+        errores=errores, probadas=fuentes_probadas, ticker=ticker_clean
+    )
+
+    if resultado is None:
+        # La falta en la descarga agrupada sólo se reporta si ninguna otra fuente trajo precio
+        if sin_lote:
+            errores.insert(0, f"[Yahoo Finance] {ticker_clean}: sin datos en la descarga agrupada")
+        resultado = {
+            "Ticker": ticker_clean,
+            "Error": "❌ No se encontró información en ninguna fuente",
+            "Fuente": "Ninguna",
+            "Fuentes Probadas": ", ".join(fuentes_probadas),
+            "Advertencia": "⚠️ No se encontró información",
+            "Tipo": "Desconocido"
+        }
+
+    try:
+        with limite_proveedor("fundamentales"):
+            info_fundamental = obtener_info_fundamental(ticker_clean)
+            resultado = agregar_proyecciones_forward(resultado, ticker_map)
+        for k, v in info_fundamental.items():
+            if k not in resultado or resultado[k] is None:
+                resultado[k] = v
+
+        if "Tipo" not in resultado or resultado["Tipo"] == "Desconocido":
+            resultado["Tipo"] = "Bono" if es_bono else "Acción"
+
+        if "Sector" not in resultado or resultado["Sector"] is None:
+            resultado["Sector"] = ""
+    except Exception as e:
+        errores.append(f"[Fundamentales] {ticker_clean}: {e}")
+
+    # El score se calcula después para todo el portafolio junto (score_vectorizado)
+    return resultado, errores, time.perf_counter() - inicio
+
+# --- Ejecución concurrente de todo el portafolio ---
+def analizar_portafolio(tickers, fecha_inicio, fecha_fin, cg,
+                        max_workers=MAX_WORKERS, descarga_lote=True):
+    """
+    Analiza todos los tickers en un pool acotado de workers. El orden de los
+    resultados respeta el orden de entrada, sin importar cuál termina primero.
+    Con descarga_lote, los históricos de Yahoo se bajan antes en requests
+    multi-símbolo.
+
+    Returns:
+        tuple: (resultados, errores_conexion, metricas) donde metricas incluye
+        el tiempo de reloj total, la suma de tiempos por ticker y tiempos_por_ticker
+        (lista en el orden de entrada: un ticker repetido aparece una vez por posición).
+    """
+    tickers = [str(t).strip() for t in tickers if not pd.isna(t) and str(t).strip()]
+    max_workers = max(1, int(max_workers))
+
+    iniciar_ejecucion_info()
+    iniciar_ejecucion_metricas()
+    iniciar_ejecucion_fallback()
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def _inicializar_worker():
+        # Permite que los helpers que escriben en st.session_state funcionen desde el pool
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    inicio = time.perf_counter()
+    # Índice de CoinGecko (disco con TTL): los workers sólo hacen lookups en memoria
+    try:
+        with limite_proveedor("coingecko"):
+            cargar_indice_coingecko(cg)
+    except Exception as e:
+        print(f"[CoinGecko] Índice de monedas no disponible: {e}")
+
+    hist_lote, tiempo_lote = None, 0.0
+    if descarga_lote and not ES_CLOUD:
+        inicio_lote = time.perf_counter()
+        simbolos = [resolver_ticker(t) for t in tickers]
+        try:
+            hist_lote = obtener_historicos_lote(simbolos, fecha_inicio, fecha_fin, tamano_lote=YF_TAMANO_LOTE)
+        except Exception as e:
+            print(f"[Yahoo Finance] Descarga agrupada no disponible, se consulta por ticker: {e}")
+        tiempo_lote = time.perf_counter() - inicio_lote
+
+    # Market data de BYMA de todos los bonos (queda en la caché). Rava no se precarga:
+    # la cadena de fuentes la consulta sólo para los bonos que BYMA no trajo
+    inicio_byma = time.perf_counter()
+    bonos = [t.upper() for t in tickers if tipo_instrumento(t, es_bono_argentino(t), False) == "bono"]
+    if bonos:
+        try:
+            with limite_proveedor("byma"):
+                precargar_bonos_byma(bonos)
+        except Exception as e:
+            print(f"[BYMA] Precarga no disponible, se consulta por bono: {e}")
+    tiempo_byma = time.perf_counter() - inicio_byma
+
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=_inicializar_worker) as pool:
+        # Contexto de mercado: VIX y riesgo de todos los países del portafolio de una vez
+        inicio_contexto = time.perf_counter()
+        paises = set(pool.map(obtener_pais_ticker, tickers))
+        construir_contexto_mercado(paises)
+        tiempo_contexto = time.perf_counter() - inicio_contexto
+
+        inicio_tickers = time.perf_counter()
+        salidas = list(pool.map(
+            lambda t: analizar_ticker(t, fecha_inicio, fecha_fin, cg, hist_lote),
+            tickers
+        ))
+        tiempo_tickers = time.perf_counter() - inicio_tickers
+    tiempo_total = time.perf_counter() - inicio
+
+    resultados, errores_conexion, tiempos = [], [], []
+    for ticker, (resultado, errores, segundos) in zip(tickers, salidas):
+        resultados.append(resultado)
+        errores_conexion.extend(errores)
+        tiempos.append({"ticker": ticker.upper(), "segundos": round(segundos, 3)})
+
+    tiempo_sumado = sum(segundos for _, _, segundos in salidas)
+    metricas = {
+        "tickers": len(tickers),
+        "workers": max_workers,
+        "tiempo_total": round(tiempo_total, 2),
+        "tiempo_sumado": round(tiempo_sumado, 2),
+        "aceleracion": round(tiempo_sumado / tiempo_total, 2) if tiempo_total > 0 else None,
+        "tiempos_por_ticker": tiempos,
+        "tiempo_lote_yahoo": round(tiempo_lote, 2),
+        "tiempo_lote_bonos": round(tiempo_byma, 2),
+        "tiempo_contexto": round(tiempo_contexto, 2),
+        "tiempo_tickers": round(tiempo_tickers, 2),
+        "yahoo_lote": f"{len(hist_lote)}/{len(set(resolver_ticker(t) for t in tickers))}" if hist_lote is not None else None,
+        "info_yf": estadisticas_info(),
+        "fallback": estadisticas_fallback(),
+        "http": estadisticas_http(),
+    }
+    return resultados, errores_conexion, metricas
+
+# --- Análisis completo: precios + fundamentales, indicadores y score ---
+COLUMNAS_PRIORITARIAS = [
+    "Ticker", "Score Final", "Recomendación", "% Subida a Máx", "Crecimiento Futuro",
+    "País", "Semáforo Riesgo", "Contexto Global", "Proyección 12M (%)", "Score Numérico Total"
+]
+
+def analizar_y_puntuar(tickers, fecha_inicio, fecha_fin, cg, max_workers=MAX_WORKERS):
+    """
+    Etapa de análisis de la app sin UI: analizar_portafolio, panel de indicadores
+    y score vectorizado, con el resultado ordenado por estrellas.
+
+    Returns:
+        dict: df_result, panel_tecnico, errores_conexion, metricas_motor (con los
+        tiempos de indicadores y score agregados) y metricas_proveedores (copia
+        tomada al terminar: las métricas vivas son del proceso y las pisa la
+        próxima ejecución de cualquier sesión).
+    """
+    resultados, errores_conexion, metricas = analizar_portafolio(
+        tickers, fecha_inicio, fecha_fin, cg, max_workers=max_workers
+    )
+
+    df_result = pd.DataFrame(resultados)
+    panel_tecnico = None
+    metricas["tiempo_indicadores"] = metricas["tiempo_score"] = 0.0
+    if not df_result.empty:
+        # Indicadores técnicos de todo el panel (alimentan el score y los gráficos)
+        inicio = time.perf_counter()
+        panel_tecnico = calcular_panel(
+            df_result["Hist"] if "Hist" in df_result.columns else {},
+            simbolos=df_result["Ticker"] if INDICADORES_INCREMENTALES else None,
+            verificar=INDICADORES_VERIFICAR
+        )
+        metricas["tiempo_indicadores"] = round(time.perf_counter() - inicio, 3)
+
+        # Score, estrellas, recomendación y targets de todo el portafolio en una pasada
+        inicio = time.perf_counter()
+        df_result = puntuar_portafolio(df_result, indicadores=panel_tecnico["ultimos"])
+        df_result = df_result.sort_values("__orden_score", ascending=False).drop(columns="__orden_score")
+        columnas_restantes = [col for col in df_result.columns if col not in COLUMNAS_PRIORITARIAS]
+        df_result = df_result[COLUMNAS_PRIORITARIAS + columnas_restantes]
+        metricas["tiempo_score"] = round(time.perf_counter() - inicio, 3)
+
+    return {
+        "df_result": df_result,
+        "panel_tecnico": panel_tecnico,
+        "errores_conexion": errores_conexion,
+        "metricas_motor": metricas,
+        "metricas_proveedores": metricas_proveedores(),
+    }
@@ -0,0 +1,107 @@
+# helpers/planificador.py
+import time
+import threading
+from contextlib import contextmanager
+from config import LIMITES_TASA
+
+# Límite de tasa por proveedor con un token bucket (LIMITES_TASA en config.py:
+# llamadas por minuto y ráfaga). proveedores.llamar pide turno antes de cada
+# llamada: si el balde está vacío, el thread espera sólo lo que le falta a su
+# turno, sin tomar ningún lock mientras duerme, así las llamadas a otros
+# proveedores siguen corriendo. Los turnos se reservan en orden de llegada
+# (los tokens pueden quedar negativos: cada uno es una llamada en cola).
+# La espera se puede cancelar: fallback corre cada fuente dentro de cancelable()
+# y, si otra fuente ya ganó, la llamada en cola devuelve su turno y sale.
+
+class TurnoCancelado(Exception):
+    """Se canceló la espera de turno (la llamada ya no hace falta)."""
+
+_lock = threading.Lock()
+_baldes = {}
+_activo = True
+_local = threading.local()
+
+@contextmanager
+def cancelable(evento):
+    """Las esperas de turno de este thread terminan con TurnoCancelado si evento se activa."""
+    previo = getattr(_local, "cancelado", None)
+    _local.cancelado = evento
+    try:
+        yield
+    finally:
+        _local.cancelado = previo
+
+def cancelado_actual():
+    """Evento de cancelación del thread actual (None fuera de cancelable())."""
+    return getattr(_local, "cancelado", None)
+
+def _balde(proveedor):
+    limite = LIMITES_TASA.get(proveedor)
+    if limite is None:
+        return None
+    balde = _baldes.get(proveedor)
+    if balde is None:
+        por_minuto, rafaga = limite
+        balde = _baldes[proveedor] = {
+            "tasa": por_minuto / 60.0, "capacidad": float(rafaga), "tokens": float(rafaga),
+            "ultimo": time.monotonic(), "en_cola": 0,
+        }
+    return balde
+
+def configurar(activo=None, limites=None):
+    """Activa/desactiva los límites o reemplaza algunos ({proveedor: (por_minuto, ráfaga)})."""
+    global _activo
+    with _lock:
+        if activo is not None:
+            _activo = bool(activo)
+        if limites:
+            LIMITES_TASA.update(limites)
+            for proveedor in limites:
+                _baldes.pop(proveedor, None)
+
+def esperar_turno(proveedor, cancelado=None):
+    """
+    Bloquea hasta que el proveedor tenga un token libre. Devuelve los segundos
+    esperados. Si cancelado (por defecto el de cancelable()) se activa durante la
+    espera, devuelve el token y lanza TurnoCancelado.
+    """
+    cancelado = cancelado if cancelado is not None else cancelado_actual()
+    with _lock:
+        balde = _balde(proveedor) if _activo else None
+        if balde is None:
+            return 0.0
+        ahora = time.monotonic()
+        balde["tokens"] = min(balde["capacidad"], balde["tokens"] + (ahora - balde["ultimo"]) * balde["tasa"])
+        balde["ultimo"] = ahora
+        balde["tokens"] -= 1
+        espera = -balde["tokens"] / balde["tasa"] if balde["tokens"] < 0 else 0.0
+        if espera > 0:
+            balde["en_cola"] += 1
+    if espera <= 0:
+        return 0.0
+    if cancelado is None:
+        time.sleep(espera)
+        interrumpida = False
+    else:
+        interrumpida = cancelado.wait(espera)
+    with _lock:
+        balde["en_cola"] -= 1
+        if interrumpida:
+            balde["tokens"] += 1
+    if interrumpida:
+        raise TurnoCancelado(f"{proveedor}: espera de turno cancelada")
+    return espera
+
+def espera_estimada(proveedor):
+    """Segundos que esperaría hoy una llamada nueva al proveedor (0 si no tiene límite)."""
+    with _lock:
+        balde = _balde(proveedor) if _activo else None
+        if balde is None:
+            return 0.0
+        tokens = min(balde["capacidad"], balde["tokens"] + (time.monotonic() - balde["ultimo"]) * balde["tasa"])
+        return max(0.0, (1 - tokens) / balde["tasa"])
+
+def estado_colas():
+    """Llamadas esperando turno en este momento, por proveedor."""
+    with _lock:
+        return {p: b["en_cola"] for p, b in _baldes.items()}
@@ -0,0 +1,222 @@
+# helpers/precios_store.py
+import os
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import yfinance as yf
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json
+from helpers.proveedores import llamar, registrar_cache
+
+# Store local de OHLCV diario: un Parquet por símbolo más un JSON con el rango
+# [desde, hasta) ya consultado a Yahoo. Cualquier pedido dentro de ese rango se
+# sirve sin red; fuera de él sólo se descargan los tramos faltantes.
+
+_lock = threading.Lock()
+_locks_simbolo = {}
+
+def _lock_simbolo(simbolo):
+    with _lock:
+        return _locks_simbolo.setdefault(simbolo, threading.Lock())
+
+def _rutas(simbolo):
+    nombre = simbolo.upper().replace("/", "_").replace(":", "_")
+    return ruta_cache("precios", f"{nombre}.parquet"), ruta_cache("precios", f"{nombre}.json")
+
+def _a_fecha(valor):
+    fecha = pd.Timestamp(valor)
+    if fecha.tzinfo is not None:
+        fecha = fecha.tz_localize(None)
+    return fecha.normalize()
+
+def _normalizar(hist):
+    hist = hist.copy()
+    indice = pd.to_datetime(hist.index)
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    hist.index = indice.normalize()
+    hist.index.name = "Date"
+    hist = hist[~hist.index.duplicated(keep="last")]
+    return hist.sort_index()
+
+def cargar_store(simbolo):
+    """Devuelve (DataFrame | None, meta) con lo persistido para el símbolo."""
+    path_parquet, path_meta = _rutas(simbolo)
+    meta = leer_json(path_meta) or {}
+    if not meta or not os.path.exists(path_parquet):
+        return None, {}
+    try:
+        return pd.read_parquet(path_parquet), meta
+    except Exception as e:
+        print(f"[Store precios] {simbolo}: archivo ilegible, se descarta ({e})")
+        return None, {}
+
+def guardar_store(simbolo, hist, desde, hasta):
+    path_parquet, path_meta = _rutas(simbolo)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path_parquet), suffix=".tmp")
+    os.close(fd)
+    try:
+        hist.to_parquet(tmp)
+        os.replace(tmp, path_parquet)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    guardar_json(path_meta, {
+        "desde": desde.strftime("%Y-%m-%d"),
+        "hasta": hasta.strftime("%Y-%m-%d"),
+        "ultima_barra": hist.index.max().strftime("%Y-%m-%d") if not hist.empty else None,
+        "filas": int(len(hist)),
+    })
+
+def _history(simbolo, inicio, fin):
+    return yf.Ticker(simbolo).history(start=inicio, end=fin)
+
+def _descargar(simbolo, inicio, fin):
+    hist = llamar("yahoo", "history", _history, simbolo, inicio.strftime("%Y-%m-%d"), fin.strftime("%Y-%m-%d"))
+    return _normalizar(hist) if hist is not None and not hist.empty else None
+
+def tramos_faltantes(meta, hist, inicio, fin):
+    """Rangos [inicio, fin) que no están cubiertos por el store."""
+    if hist is None or not meta:
+        return [(inicio, fin)]
+    desde, hasta = _a_fecha(meta["desde"]), _a_fecha(meta["hasta"])
+    tramos = []
+    if inicio < desde:
+        tramos.append((inicio, desde))
+    if fin > hasta:
+        # Se vuelve a pedir la última barra por si quedó incompleta
+        ultima = hist.index.max() if not hist.empty else hasta
+        tramos.append((min(ultima, hasta), fin))
+    return tramos
+
+def fusionar(simbolo, hist, meta, piezas):
+    """
+    Combina lo descargado con lo persistido y actualiza el rango cubierto.
+    piezas: [((inicio, fin), DataFrame | None)] por tramo pedido. Sólo los tramos
+    que trajeron datos amplían [desde, hasta): uno vacío puede ser un fallo
+    transitorio y se vuelve a pedir la próxima vez.
+    """
+    piezas = [(tramo, p) for tramo, p in piezas if p is not None and not p.empty]
+    if not piezas:
+        # Nada nuevo: el store (si existe) queda como estaba
+        return hist
+    combinado = _normalizar(pd.concat([hist] + [p for _, p in piezas]))
+    hoy = pd.Timestamp.today().normalize()
+    desde = _a_fecha(meta["desde"]) if meta else None
+    hasta = _a_fecha(meta["hasta"]) if meta else None
+    for a, b in (tramo for tramo, _ in piezas):
+        # Nunca se marca como cubierto el día en curso: la barra de hoy puede cambiar
+        b = min(b, hoy)
+        desde = a if desde is None else min(desde, a)
+        hasta = b if hasta is None else max(hasta, b)
+    guardar_store(simbolo, combinado, desde, hasta)
+    return combinado
+
+def obtener_historico(simbolo, fecha_inicio, fecha_fin):
+    """
+    Histórico diario de Yahoo para [fecha_inicio, fecha_fin), igual que
+    yf.Ticker(simbolo).history(start, end), pero servido desde el store local y
+    descargando sólo los tramos que falten.
+    """
+    simbolo = simbolo.upper()
+    inicio, fin = _a_fecha(fecha_inicio), _a_fecha(fecha_fin)
+    with _lock_simbolo(simbolo):
+        hist, meta = cargar_store(simbolo)
+        tramos = tramos_faltantes(meta, hist, inicio, fin)
+        registrar_cache("yahoo", not tramos)
+        if tramos:
+            piezas = [((a, b), _descargar(simbolo, a, b)) for a, b in tramos if a < b]
+            hist = fusionar(simbolo, hist, meta, piezas)
+        if hist is None or hist.empty:
+            return pd.DataFrame()
+        return hist[(hist.index >= inicio) & (hist.index < fin)]
+
+def _separar_lote(data, simbolos):
+    """Divide la respuesta de yf.download en un DataFrame por símbolo."""
+    if data is None or data.empty:
+        return {}
+    if not isinstance(data.columns, pd.MultiIndex):
+        return {simbolos[0]: data} if len(simbolos) == 1 else {}
+    por_simbolo = {}
+    for simbolo in simbolos:
+        if simbolo not in data.columns.get_level_values(0):
+            continue
+        hist = data[simbolo].dropna(how="all")
+        if not hist.empty and "Close" in hist.columns and hist["Close"].notna().any():
+            por_simbolo[simbolo] = _normalizar(hist)
+    return por_simbolo
+
+def _download(simbolos, inicio, fin):
+    return yf.download(
+        simbolos, start=inicio, end=fin,
+        group_by="ticker", auto_adjust=True, actions=True, threads=True, progress=False
+    )
+
+def _descargar_lote(simbolos, inicio, fin):
+    data = llamar("yahoo", "download", _download, list(simbolos), inicio.strftime("%Y-%m-%d"), fin.strftime("%Y-%m-%d"))
+    return _separar_lote(data, simbolos)
+
+def obtener_historicos_lote(simbolos, fecha_inicio, fecha_fin, tamano_lote=50):
+    """
+    Versión agrupada de obtener_historico: los símbolos que necesitan el mismo
+    tramo se piden juntos a yf.download en lotes de tamano_lote.
+
+    Returns:
+        dict: símbolo -> histórico [fecha_inicio, fecha_fin). Los símbolos que el
+        lote no pudo traer no aparecen en el dict.
+    """
+    inicio, fin = _a_fecha(fecha_inicio), _a_fecha(fecha_fin)
+    simbolos = list(dict.fromkeys(s.upper() for s in simbolos))
+
+    estado, grupos = {}, {}
+    for simbolo in simbolos:
+        hist, meta = cargar_store(simbolo)
+        tramos = tuple((a, b) for a, b in tramos_faltantes(meta, hist, inicio, fin) if a < b)
+        registrar_cache("yahoo", not tramos)
+        estado[simbolo] = (hist, meta, tramos)
+        if tramos:
+            grupos.setdefault(tramos, []).append(simbolo)
+
+    descargados, fallidos = {}, set()
+    for tramos, miembros in grupos.items():
+        for i in range(0, len(miembros), max(1, tamano_lote)):
+            lote = miembros[i:i + tamano_lote]
+            for a, b in tramos:
+                try:
+                    for simbolo, hist in _descargar_lote(lote, a, b).items():
+                        descargados.setdefault(simbolo, []).append(((a, b), hist))
+                except Exception as e:
+                    fallidos.update(lote)
+                    print(f"[Store precios] Falló el lote {lote[0]}..{lote[-1]} ({len(lote)}): {e}")
+
+    resultado = {}
+    for simbolo, (hist, meta, tramos) in estado.items():
+        with _lock_simbolo(simbolo):
+            if tramos and simbolo not in fallidos:
+                hist = fusionar(simbolo, hist, meta, descargados.get(simbolo, []))
+            if hist is None or hist.empty:
+                continue
+            resultado[simbolo] = hist[(hist.index >= inicio) & (hist.index < fin)]
+    return resultado
+
+def obtener_historicos(simbolos, fecha_inicio, fecha_fin, tamano_lote=50, max_workers=8):
+    """
+    obtener_historicos_lote más un pool de workers para los símbolos que el lote
+    no trajo (se reintentan uno por uno con obtener_historico).
+    """
+    hists = obtener_historicos_lote(simbolos, fecha_inicio, fecha_fin, tamano_lote=tamano_lote)
+    faltantes = [s for s in dict.fromkeys(s.upper() for s in simbolos) if s not in hists]
+
+    def _individual(simbolo):
+        try:
+            return simbolo, obtener_historico(simbolo, fecha_inicio, fecha_fin)
+        except Exception as e:
+            print(f"[Store precios] {simbolo}: {e}")
+            return simbolo, None
+
+    if faltantes:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            for simbolo, hist in pool.map(_individual, faltantes):
+                if hist is not None and not hist.empty:
+                    hists[simbolo] = hist
+    return hists
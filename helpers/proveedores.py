@@ -0,0 +1,262 @@
+# helpers/proveedores.py
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+from helpers import circuito, planificador, sesiones_http
+from helpers.fixtures import grabar as grabar_fixture, leer as leer_fixture, FormatoNoSoportado
+from config import PROVEEDORES_MODO, PROVEEDORES_FIXTURES, PROVEEDORES_LATENCIA, PROVEEDORES_TASA_FALLAS
+
+# Punto único por el que pasan todas las llamadas a proveedores externos
+# (Yahoo, Alpha Vantage, CoinGecko, Investpy, TradingEconomics, Finnhub, FMP,
+# BYMA, Rava, IAMC, traductor). Permite:
+#   - "record": llamar en vivo y guardar cada respuesta como fixture
+#   - "replay": responder sólo desde fixtures (o generadores sintéticos), sin red
+#   - inyectar latencia y fallas para medir el pipeline bajo distintas condiciones
+# Los fixtures se guardan como JSON + Parquet (ver helpers/fixtures.py): leerlos
+# no ejecuta código. Las respuestas que no entran en ese formato no se graban.
+
+class ProveedorSimuladoError(Exception):
+    """Falla inyectada por la tasa de fallas configurada."""
+
+class FixtureFaltante(Exception):
+    """Modo replay sin fixture ni generador para la llamada."""
+
+_lock = threading.Lock()
+_config = {
+    "modo": PROVEEDORES_MODO,
+    "fixtures": PROVEEDORES_FIXTURES,
+    "latencia": PROVEEDORES_LATENCIA,
+    "tasa_fallas": PROVEEDORES_TASA_FALLAS,
+}
+_azar = random.Random(0)
+_generadores = {}
+
+# --- Métricas por proveedor de la ejecución en curso ---
+# Límites (ms) de los buckets del histograma de latencias; el último es "> 5000"
+BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_MUESTRAS = 10000
+_lock_metricas = threading.Lock()
+_metricas = {}
+
+def _metricas_vacias():
+    return {
+        "llamadas": 0, "errores": 0, "errores_por_clase": {}, "operaciones": {},
+        "segundos": 0.0, "latencias_ms": [], "histograma": [0] * (len(BUCKETS_MS) + 1),
+        "bytes": 0, "cache_hits": 0, "cache_misses": 0, "cortadas": 0,
+        "espera": 0.0, "espera_max": 0.0, "en_cola": 0,
+    }
+
+def iniciar_ejecucion_metricas():
+    """Pone en cero las métricas (se llama al arrancar cada análisis)."""
+    with _lock_metricas:
+        _metricas.clear()
+    sesiones_http.iniciar_ejecucion()
+
+def _tamano(resultado):
+    """Bytes aproximados de una respuesta (texto, JSON, DataFrame o tupla de ellos)."""
+    try:
+        if resultado is None:
+            return 0
+        if isinstance(resultado, (bytes, bytearray)):
+            return len(resultado)
+        if isinstance(resultado, str):
+            return len(resultado.encode("utf-8"))
+        if isinstance(resultado, (tuple, list)) and resultado and not isinstance(resultado[0], dict):
+            return sum(_tamano(r) for r in resultado)
+        if hasattr(resultado, "memory_usage"):
+            uso = resultado.memory_usage(deep=True)
+            return int(uso.sum() if hasattr(uso, "sum") else uso)
+        if hasattr(resultado, "content"):
+            return len(resultado.content)
+        if hasattr(resultado, "model_dump_json"):
+            return len(resultado.model_dump_json().encode("utf-8"))
+        return len(json.dumps(resultado, default=str).encode("utf-8"))
+    except Exception:
+        return 0
+
+def _registrar(proveedor, operacion, segundos, resultado=None, error=None, espera=0.0):
+    ms = segundos * 1000
+    bucket = next((i for i, limite in enumerate(BUCKETS_MS) if ms <= limite), len(BUCKETS_MS))
+    tamano = _tamano(resultado) if error is None else 0
+    with _lock_metricas:
+        m = _metricas.setdefault(proveedor, _metricas_vacias())
+        m["llamadas"] += 1
+        m["operaciones"][operacion] = m["operaciones"].get(operacion, 0) + 1
+        m["segundos"] += segundos
+        m["histograma"][bucket] += 1
+        m["bytes"] += tamano
+        if espera > 0:
+            m["en_cola"] += 1
+            m["espera"] += espera
+            m["espera_max"] = max(m["espera_max"], espera)
+        if len(m["latencias_ms"]) < MAX_MUESTRAS:
+            m["latencias_ms"].append(ms)
+        if error is not None:
+            clase = type(error).__name__
+            m["errores"] += 1
+            m["errores_por_clase"][clase] = m["errores_por_clase"].get(clase, 0) + 1
+
+def _registrar_cortada(proveedor):
+    with _lock_metricas:
+        _metricas.setdefault(proveedor, _metricas_vacias())["cortadas"] += 1
+
+def registrar_cache(proveedor, acierto, cantidad=1):
+    """Lo llaman las cachés locales: acierto=True si evitaron una llamada al proveedor."""
+    with _lock_metricas:
+        m = _metricas.setdefault(proveedor, _metricas_vacias())
+        m["cache_hits" if acierto else "cache_misses"] += cantidad
+
+def metricas_proveedores():
+    """
+    Resumen por proveedor: llamadas, errores (por clase), latencia p50/p90/p99 y
+    total, espera en la cola del límite de tasa, % del tiempo de proveedores,
+    histograma, bytes y ratio de aciertos de caché.
+    """
+    with _lock_metricas:
+        copia = {p: {**m, "latencias_ms": list(m["latencias_ms"]), "histograma": list(m["histograma"]),
+                     "errores_por_clase": dict(m["errores_por_clase"]), "operaciones": dict(m["operaciones"])}
+                 for p, m in _metricas.items()}
+    total = sum(m["segundos"] for m in copia.values()) or 1.0
+    etiquetas = [f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+    resumen = {}
+    for proveedor, m in sorted(copia.items(), key=lambda x: -x[1]["segundos"]):
+        latencias = sorted(m["latencias_ms"])
+        def _p(q):
+            return round(latencias[min(len(latencias) - 1, int(q * len(latencias)))], 1) if latencias else None
+        consultas_cache = m["cache_hits"] + m["cache_misses"]
+        resumen[proveedor] = {
+            "llamadas": m["llamadas"],
+            "operaciones": m["operaciones"],
+            "errores": m["errores"],
+            "errores_por_clase": m["errores_por_clase"],
+            "cortadas_circuito": m["cortadas"],
+            "latencia_p50_ms": _p(0.5),
+            "latencia_p90_ms": _p(0.9),
+            "latencia_p99_ms": _p(0.99),
+            "segundos_total": round(m["segundos"], 3),
+            "llamadas_en_cola": m["en_cola"],
+            "espera_cola_s": round(m["espera"], 3),
+            "espera_max_s": round(m["espera_max"], 3),
+            "porcentaje_tiempo": round(m["segundos"] / total * 100, 1),
+            "histograma_ms": dict(zip(etiquetas, m["histograma"])),
+            "bytes": m["bytes"],
+            "cache_hits": m["cache_hits"],
+            "cache_misses": m["cache_misses"],
+            "ratio_cache": round(m["cache_hits"] / consultas_cache, 3) if consultas_cache else None,
+        }
+    return resumen
+
+def configurar(modo=None, fixtures=None, latencia=None, tasa_fallas=None, semilla=None):
+    """
+    Cambia la configuración en tiempo de ejecución. latencia y tasa_fallas aceptan
+    un número para todos los proveedores o un dict proveedor -> valor.
+    """
+    with _lock:
+        for clave, valor in (("modo", modo), ("fixtures", fixtures), ("latencia", latencia), ("tasa_fallas", tasa_fallas)):
+            if valor is not None:
+                _config[clave] = valor
+        if semilla is not None:
+            _azar.seed(semilla)
+
+def configuracion():
+    with _lock:
+        return dict(_config)
+
+def registrar_generador(proveedor, operacion, fn):
+    """En replay, fn(*args, **kwargs) responde las llamadas que no tienen fixture grabado."""
+    _generadores[(proveedor, operacion)] = fn
+
+def _por_proveedor(valor, proveedor):
+    if isinstance(valor, dict):
+        return float(valor.get(proveedor, valor.get("default", 0)) or 0)
+    return float(valor or 0)
+
+def _clave(args, kwargs):
+    return json.dumps([list(args), kwargs], default=str, sort_keys=True, ensure_ascii=False)
+
+def _ruta_fixture(proveedor, operacion, clave):
+    nombre = hashlib.sha1(clave.encode("utf-8")).hexdigest()
+    return os.path.join(_config["fixtures"], proveedor, operacion, f"{nombre}.json")
+
+def _grabar_seguro(path, clave, resultado=None, error=None):
+    # Un fixture que no se puede escribir no tiene que romper la llamada en vivo
+    try:
+        grabar_fixture(path, clave, resultado=resultado, error=error)
+    except FormatoNoSoportado as e:
+        print(f"[Proveedores] Sin fixture para {path}: {e}")
+    except Exception as e:
+        print(f"[Proveedores] No se pudo grabar {path}: {e}")
+
+def _reproducir(proveedor, operacion, clave, args, kwargs):
+    path = _ruta_fixture(proveedor, operacion, clave)
+    if os.path.exists(path):
+        return leer_fixture(path)
+    generador = _generadores.get((proveedor, operacion))
+    if generador is None:
+        raise FixtureFaltante(f"Sin fixture para {proveedor}/{operacion}: {clave[:120]}")
+    return generador(*args, **kwargs)
+
+def _inyectar(proveedor, operacion):
+    with _lock:
+        latencia = _por_proveedor(_config["latencia"], proveedor)
+        falla = _azar.random() < _por_proveedor(_config["tasa_fallas"], proveedor)
+    if latencia > 0:
+        time.sleep(latencia)
+    if falla:
+        raise ProveedorSimuladoError(f"Falla simulada en {proveedor}/{operacion}")
+
+def llamar(proveedor, operacion, fn, *args, clave=None, **kwargs):
+    """
+    Ejecuta fn(*args, **kwargs) en nombre de proveedor/operacion. Los args tienen
+    que identificar la llamada (se usan como clave del fixture si no se pasa clave)
+    y el resultado se graba como JSON + Parquet (helpers/fixtures.py). Cada llamada queda
+    registrada en las métricas del proveedor (ver metricas_proveedores) y en su
+    circuit breaker: con el circuito abierto lanza circuito.CircuitoAbierto sin llamar.
+    Antes de llamar espera turno en el límite de tasa del proveedor (LIMITES_TASA);
+    esa espera se reporta aparte y no cuenta en la latencia.
+    """
+    try:
+        circuito.permitir(proveedor)
+    except circuito.CircuitoAbierto:
+        _registrar_cortada(proveedor)
+        raise
+    try:
+        espera = planificador.esperar_turno(proveedor)
+    except planificador.TurnoCancelado:
+        circuito.liberar(proveedor)
+        raise
+    inicio = time.perf_counter()
+    try:
+        resultado = _ejecutar(proveedor, operacion, fn, args, kwargs, clave)
+    except Exception as e:
+        segundos = time.perf_counter() - inicio
+        # Un error de datos (símbolo inválido, sin fixture) no cuenta contra el circuito
+        circuito.registrar(proveedor, segundos, ok=not circuito.es_falla(e))
+        _registrar(proveedor, operacion, segundos, error=e, espera=espera)
+        raise
+    segundos = time.perf_counter() - inicio
+    circuito.registrar(proveedor, segundos, ok=True)
+    _registrar(proveedor, operacion, segundos, resultado=resultado, espera=espera)
+    return resultado
+
+def _ejecutar(proveedor, operacion, fn, args, kwargs, clave):
+    modo = _config["modo"]
+    clave = clave if clave is not None else _clave(args, kwargs)
+    _inyectar(proveedor, operacion)
+
+    if modo == "replay":
+        return _reproducir(proveedor, operacion, clave, args, kwargs)
+    if modo != "record":
+        return fn(*args, **kwargs)
+
+    path = _ruta_fixture(proveedor, operacion, clave)
+    try:
+        resultado = fn(*args, **kwargs)
+    except Exception as e:
+        _grabar_seguro(path, clave, error=e)
+        raise
+    _grabar_seguro(path, clave, resultado=resultado)
+    return resultado
@@ -1,59 +1,157 @@
 # helpers/rava.py
 
-import time
-import requests
-from bs4 import BeautifulSoup
+import threading
+from datetime import datetime, timedelta
+import pandas as pd
+from lxml import html as lxml_html
 from helpers.iamc import obtener_precio_bono_iamc
+from helpers.proveedores import llamar, registrar_cache
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json, antiguedad
+from helpers import sesiones_http
+from config import RAVA_TTL, RAVA_MAX_VENCIDO
 
-def obtener_precio_bono_rava(ticker):
-    try:
-        time.sleep(1.5)
-        url = f"https://www.rava.com/perfil/{ticker}/historial"
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/113.0.0.0"
-        }
-        r = requests.get(url, headers=headers, timeout=10, verify=False)
+# Scraper del historial de Rava. La cortesía con el sitio la pone el límite de
+# tasa de "rava" en LIMITES_TASA. Sólo se consulta desde la cadena de fuentes
+# (fallback), cuando BYMA no trajo el bono: nunca antes del pool de tickers.
+# De cada página se leen con XPath sólo las columnas fecha y cierre de la tabla;
+# la serie parseada se guarda por ticker y en las corridas siguientes sólo se
+# parsean las filas más nuevas que la última fecha guardada.
 
-        if r.status_code != 200 or "Forbidden" in r.text:
-            print(f"[Rava] {ticker}: {r.status_code} - Acceso denegado")
-            return obtener_precio_bono_iamc(ticker)
+# Columnas (base 1) de la tabla de historial: Fecha | Apertura | Máximo | Mínimo | Cierre
+COLUMNA_FECHA = 1
+COLUMNA_CIERRE = 5
 
-        soup = BeautifulSoup(r.text, 'html.parser')
-        tabla = soup.find("table")
+_locks = {}
+_lock = threading.Lock()
 
-        if not tabla:
-            print(f"[Rava] {ticker}: tabla no encontrada")
-            return obtener_precio_bono_iamc(ticker)
+def _historial_upstream(ticker):
+    url = f"https://www.rava.com/perfil/{ticker}/historial"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/113.0.0.0"
+    }
+    r = sesiones_http.get(url, headers=headers, verify=False)
+    return r.status_code, r.text
+
+def _lock_ticker(ticker):
+    with _lock:
+        return _locks.setdefault(ticker, threading.Lock())
+
+def _ruta_serie(ticker):
+    return ruta_cache("rava", f"{ticker}.json")
+
+def _numero(texto):
+    # "$ 1.234,56" -> 1234.56 ; "65.40" -> 65.4
+    texto = texto.strip().replace("$", "").replace(" ", "")
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    return float(texto)
 
-        rows = tabla.find_all("tr")[1:]
-        precios = []
+def _fecha(texto):
+    texto = texto.strip()
+    for formato in ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(texto, formato).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
 
-        for row in rows:
-            cols = row.find_all("td")
-            if len(cols) >= 5:
-                try:
-                    cierre = float(cols[4].text.strip().replace("$", "").replace(",", "."))
-                    precios.append(cierre)
-                except:
-                    continue
+def _celdas(fila):
+    return (fila.xpath(f"string(td[{COLUMNA_FECHA}])"), fila.xpath(f"string(td[{COLUMNA_CIERRE}])"))
 
-        if not precios:
+def parsear_historial(html, desde=None):
+    """
+    [[fecha ISO, cierre], ...] de más vieja a más nueva, sólo con fechas >= desde
+    (la del día de desde se vuelve a leer: puede haber cambiado el cierre).
+    Recorre las filas desde la punta más nueva y corta al pasar desde.
+    """
+    arbol = lxml_html.fromstring(html)
+    filas = arbol.xpath(f"(//table)[1]//tr[count(td) >= {COLUMNA_CIERRE}]")
+    if not filas:
+        return None
+    # La tabla puede venir en cualquier orden: se mira la fecha de las puntas
+    primera, ultima = _fecha(_celdas(filas[0])[0]), _fecha(_celdas(filas[-1])[0])
+    if primera and ultima and primera > ultima:
+        filas = filas[::-1]
+
+    serie = []
+    for fila in reversed(filas):
+        fecha_txt, cierre_txt = _celdas(fila)
+        fecha = _fecha(fecha_txt)
+        if fecha is None:
+            continue
+        if desde is not None and fecha < desde:
+            break
+        try:
+            serie.append([fecha, _numero(cierre_txt)])
+        except ValueError:
+            continue
+    return serie[::-1]
+
+def obtener_serie_rava(ticker, ttl=RAVA_TTL, max_vencido=RAVA_MAX_VENCIDO):
+    """
+    Serie de cierres del ticker: la guardada si tiene menos de ttl segundos; si
+    no, baja la página y agrega sólo las filas nuevas. Si Rava no responde o la
+    página no tiene la tabla, la guardada mientras tenga menos de max_vencido
+    segundos; si no, None.
+    """
+    ticker = ticker.upper()
+    path = _ruta_serie(ticker)
+    # Un solo thread por ticker baja y actualiza la serie
+    with _lock_ticker(ticker):
+        guardada = leer_json(path)
+        edad = antiguedad(path)
+        registrar_cache("rava", guardada is not None and edad is not None and edad < ttl)
+        if guardada is not None and edad is not None and edad < ttl:
+            return guardada["serie"]
+        # Respaldo si la página no sirve: la serie guardada, sólo si no está demasiado vieja
+        respaldo = guardada["serie"] if guardada and edad is not None and edad < max_vencido else None
+
+        status, html = llamar("rava", "historial", _historial_upstream, ticker)
+        if status != 200 or "Forbidden" in html:
+            print(f"[Rava] {ticker}: {status} - Acceso denegado")
+            return respaldo or None
+
+        serie = guardada["serie"] if guardada else []
+        nuevas = parsear_historial(html, desde=serie[-1][0] if serie else None)
+        if nuevas is None:
+            print(f"[Rava] {ticker}: tabla no encontrada")
+            return respaldo or None
+        if nuevas:
+            serie = [fila for fila in serie if fila[0] < nuevas[0][0]] + nuevas
+        guardar_json(path, {"ticker": ticker, "serie": serie})
+        return serie
+
+def obtener_precio_bono_rava(ticker):
+    try:
+        serie = obtener_serie_rava(ticker)
+        if not serie:
             print(f"[Rava] {ticker}: no se extrajo ningún precio")
             return obtener_precio_bono_iamc(ticker)
 
-        min_price = min(precios)
-        max_price = max(precios)
-        current_price = precios[-1]
-        subida = (max_price - current_price) / current_price * 100
+        hist = pd.DataFrame(serie, columns=["Date", "Close"])
+        hist["Date"] = pd.to_datetime(hist["Date"])
+        hist = hist.set_index("Date")
+        precios = hist["Close"]
+
+        min_price = float(precios.min())
+        max_price = float(precios.max())
+        current_price = float(precios.iloc[-1])
+        subida = (max_price - current_price) / current_price * 100 if current_price > 0 else None
+        ultima = hist.index[-1]
+        vencido = datetime.now() - ultima > timedelta(seconds=RAVA_MAX_VENCIDO)
 
-        return {
+        resultado = {
             "Ticker": ticker.upper(),
             "Actual": round(current_price, 2),
             "Mínimo": round(min_price, 2),
             "Máximo": round(max_price, 2),
-            "% Subida a Máx": round(subida, 2),
+            "% Subida a Máx": round(subida, 2) if subida is not None else None,
+            "Fuente": "Rava",
             "Hist": hist  # 👉 agregado para el gráfico histórico
         }
+        if vencido:
+            resultado["Advertencia"] = f"⚠️ Último cierre de Rava: {ultima:%Y-%m-%d}"
+        return resultado
 
     except Exception as e:
         print(f"[ERROR] Rava falló para {ticker} - {e}")
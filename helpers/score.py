@@ -1,13 +1,21 @@
 import re
 import yfinance as yf
 import tradingeconomics as te
-import requests
 import pandas as pd
 import numpy as np
-import os
-import joblib
-from datetime import datetime
-from config import TRADINGECONOMICS_API_KEY
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from config import (
+    TRADINGECONOMICS_API_KEY, CONTEXTO_MERCADO_TTL, CONTEXTO_MERCADO_TTL_FALLA,
+    TE_TTL_PAISES_DIAS, TE_TTL_INDICADORES_HORAS, TE_ESPERA_FRIO
+)
+from helpers.info_yf import obtener_info
+from helpers.modelo_ml import predecir_lote
+from helpers.historico import guardar_snapshot
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json, antiguedad
+from helpers.proveedores import llamar, registrar_cache
+from helpers import sesiones_http
 
 # --- Fallback por país (actualizado al 23/05/2025) ---
 riesgo_pais_por_pais = {
@@ -83,6 +91,10 @@ ticker_map = {
 
 paises_disponibles_te = set()
 
+# --- Símbolo real en Yahoo (post ticker_map) ---
+def resolver_ticker(ticker):
+    return ticker_map.get(ticker.upper(), ticker.upper())
+
 # --- Función para detectar bonos argentinos ---
 def es_bono_argentino(ticker):
     ticker = ticker.upper()
@@ -124,31 +136,17 @@ def analizar_volumen(df):
 
 # --- Guardar scoring histórico para backtesting ---
 def guardar_score_historico(df_result):
-    fecha_actual = datetime.now().strftime("%Y-%m-%d")
-    nombre_archivo = f"AnalisisFinal-{fecha_actual}_export.csv"
-    path = os.path.join("historicos", nombre_archivo)
-    os.makedirs("historicos", exist_ok=True)
-    df_result.to_csv(path, index=False)
-    print(f"Score guardado en {path}")
+    # Snapshot en el archivo Parquet particionado por fecha (helpers/historico.py)
+    return guardar_snapshot(df_result)
 
 # --- Predicción de retorno con ML ---
 def predecir_retorno_ml(resultado):
-    try:
-        modelo = joblib.load("modelo_retorno.pkl")
-        features = [
-            resultado.get("Beta"), resultado.get("ROE"), resultado.get("ROIC"),
-            resultado.get("PEG Ratio"), resultado.get("FCF Yield"),
-            resultado.get("P/E Ratio"), resultado.get("P/B Ratio"),
-            resultado.get("Dividend Yield"), resultado.get("Debt/Equity"),
-            resultado.get("EV/EBITDA"), resultado.get("Forward EPS"),
-            resultado.get("Forward Revenue Growth"), resultado.get("Margen Futuro"),
-            resultado.get("Score Numérico Total")
-        ]
-        if None in features:
-            return None
-        return round(modelo.predict([features])[0], 2)
-    except:
-        return None
+    """Predicción para un único resultado; para el portafolio completo usar modelo_ml.predecir_lote."""
+    predicciones, metricas = predecir_lote(pd.DataFrame([resultado]))
+    if metricas["error"]:
+        print(f"[Modelo ML] {metricas['error']}")
+    valor = predicciones.iloc[0]
+    return None if pd.isna(valor) else valor
 
 # --- Indicadores técnicos ---
 def calcular_rsi(df, window=14):
@@ -179,81 +177,278 @@ def calcular_bollinger(df, window=20):
     df['Bollinger Upper'] = sma + 2 * std
     return df
 
+# --- Indicadores en modo incremental ---
+# Estado chico por ticker (EMAs, ventana de ganancias/pérdidas para el RSI y de
+# cierres para Bollinger) que se actualiza en O(1) por cada barra nueva y da los
+# mismos valores que calcular_rsi / calcular_macd / calcular_ema / calcular_bollinger.
+def _ema_paso(anterior, valor, span):
+    if anterior is None:
+        return valor
+    alpha = 2 / (span + 1)
+    return alpha * valor + (1 - alpha) * anterior
+
+def actualizar_estado_indicadores(estado, cierre, fecha=None, window_rsi=14, window_bb=20):
+    """Aplica una barra nueva al estado (None para empezar uno vacío) y lo devuelve."""
+    cierre = float(cierre)
+    if estado is None:
+        estado = {
+            "ema12": None, "ema26": None, "signal": None, "ema50": None, "ema200": None,
+            "ganancias": [], "perdidas": [], "cierres_bb": [], "cierre": None,
+            "rsi": None, "fecha": None, "barras": 0
+        }
+    if estado["cierre"] is not None:
+        delta = cierre - estado["cierre"]
+        estado["ganancias"] = (estado["ganancias"] + [max(delta, 0.0)])[-window_rsi:]
+        estado["perdidas"] = (estado["perdidas"] + [max(-delta, 0.0)])[-window_rsi:]
+        if len(estado["ganancias"]) == window_rsi:
+            avg_gain = sum(estado["ganancias"]) / window_rsi
+            avg_loss = sum(estado["perdidas"]) / window_rsi
+            if avg_loss > 0:
+                estado["rsi"] = 100 - (100 / (1 + avg_gain / avg_loss))
+            elif avg_gain > 0:
+                estado["rsi"] = 100.0
+    estado["cierres_bb"] = (estado["cierres_bb"] + [cierre])[-window_bb:]
+    estado["ema12"] = _ema_paso(estado["ema12"], cierre, 12)
+    estado["ema26"] = _ema_paso(estado["ema26"], cierre, 26)
+    estado["signal"] = _ema_paso(estado["signal"], estado["ema12"] - estado["ema26"], 9)
+    estado["ema50"] = _ema_paso(estado["ema50"], cierre, 50)
+    estado["ema200"] = _ema_paso(estado["ema200"], cierre, 200)
+    estado["cierre"] = cierre
+    estado["fecha"] = str(fecha) if fecha is not None else None
+    estado["barras"] += 1
+    return estado
+
+def estado_indicadores_inicial(df):
+    """Construye el estado recorriendo todo el histórico (una sola vez por ticker)."""
+    estado = None
+    for fecha, cierre in df["Close"].dropna().items():
+        estado = actualizar_estado_indicadores(estado, cierre, fecha)
+    return estado
+
+def valores_estado_indicadores(estado, window_bb=20):
+    """Últimos valores de cada indicador, con las mismas columnas que el cálculo completo."""
+    valores = {
+        "Close": estado["cierre"], "RSI": estado["rsi"],
+        "MACD": estado["ema12"] - estado["ema26"], "Signal": estado["signal"],
+        "EMA50": estado["ema50"], "EMA200": estado["ema200"],
+        "Bollinger Lower": None, "Bollinger Upper": None
+    }
+    ventana = estado["cierres_bb"]
+    if len(ventana) == window_bb:
+        sma = sum(ventana) / window_bb
+        std = (sum((c - sma) ** 2 for c in ventana) / (window_bb - 1)) ** 0.5
+        valores["Bollinger Lower"] = sma - 2 * std
+        valores["Bollinger Upper"] = sma + 2 * std
+    return valores
+
 # --- Contexto y país ---
-def cargar_paises_te():
-    global paises_disponibles_te
-    paises_disponibles_te = set()
-    try:
+# Caché en disco de TradingEconomics con stale-while-revalidate: un dato vencido se
+# sirve igual mientras se refresca en segundo plano; sin caché y con la API lenta se
+# usa la tabla riesgo_pais_por_pais sin esperar más de TE_ESPERA_FRIO segundos.
+_pool_te = ThreadPoolExecutor(max_workers=2, thread_name_prefix="te")
+_refrescos_te = {}
+_refrescos_lock = threading.Lock()
+_te_logueado = False
+
+def _login_te():
+    global _te_logueado
+    if not _te_logueado:
         print("[INFO] Iniciando sesión en TradingEconomics...")
-        te.login(TRADINGECONOMICS_API_KEY)
-
-        url = f"https://api.tradingeconomics.com/country?c={TRADINGECONOMICS_API_KEY}"
-        response = requests.get(url)
-
-        if response.status_code == 200:
-            data = response.json()
-            if isinstance(data, list) and all("country" in p for p in data):
-                paises_disponibles_te = {p["country"].lower() for p in data}
-                print(f"[INFO] Países disponibles cargados desde TradingEconomics: {len(paises_disponibles_te)}")
-            else:
-                print("[WARN] Respuesta inválida al cargar países desde TradingEconomics.")
-        else:
-            print(f"[ERROR] Fallo al obtener países desde TradingEconomics. Código: {response.status_code}")
+        llamar("tradingeconomics", "login", te.login, TRADINGECONOMICS_API_KEY, clave="login")
+        _te_logueado = True
+
+def _refrescar_te(clave, fn, *args):
+    """Lanza fn en segundo plano, sin duplicar un refresco que ya está en curso."""
+    with _refrescos_lock:
+        futuro = _refrescos_te.get(clave)
+        if futuro is None or futuro.done():
+            futuro = _refrescos_te[clave] = _pool_te.submit(fn, *args)
+        return futuro
+
+def _esperar_te(futuro, descripcion):
+    try:
+        return futuro.result(timeout=TE_ESPERA_FRIO)
+    except FuturesTimeout:
+        print(f"[WARN] TradingEconomics lento para {descripcion}. Usando fallback mientras termina.")
     except Exception as e:
-        print(f"[ERROR] Excepción al cargar países desde TradingEconomics: {e}")
+        print(f"[ERROR] Excepción al consultar TradingEconomics ({descripcion}): {e}")
+    return None
 
+def _paises_upstream():
+    url = f"https://api.tradingeconomics.com/country?c={TRADINGECONOMICS_API_KEY}"
+    response = sesiones_http.get(url)
+    if response.status_code != 200:
+        raise Exception(f"Fallo al obtener países desde TradingEconomics. Código: {response.status_code}")
+    return response.json()
+
+def _descargar_paises_te():
+    _login_te()
+    data = llamar("tradingeconomics", "paises", _paises_upstream)
+    if not isinstance(data, list) or not all("country" in p for p in data):
+        raise Exception("Respuesta inválida al cargar países desde TradingEconomics.")
+    paises = sorted({p["country"].lower() for p in data})
+    guardar_json(ruta_cache("te", "paises.json"), paises)
+    print(f"[INFO] Países disponibles cargados desde TradingEconomics: {len(paises)}")
+    return set(paises)
+
+def cargar_paises_te():
+    global paises_disponibles_te
+    path = ruta_cache("te", "paises.json")
+    cacheados = leer_json(path)
+    registrar_cache("tradingeconomics", bool(cacheados))
+    if cacheados:
+        paises_disponibles_te = set(cacheados)
+        if antiguedad(path) > TE_TTL_PAISES_DIAS * 86400:
+            _refrescar_te("paises", _actualizar_paises_te)
+        return
+
+    with _refrescos_lock:
+        en_curso = "paises" in _refrescos_te and not _refrescos_te["paises"].done()
+    if en_curso:
+        # Ya hay una descarga esperando: no se vuelve a bloquear, se usa el fallback
+        return
+    paises = _esperar_te(_refrescar_te("paises", _actualizar_paises_te), "lista de países")
+    paises_disponibles_te = paises or set()
+
+def _actualizar_paises_te():
+    global paises_disponibles_te
+    paises = _descargar_paises_te()
+    paises_disponibles_te = paises
+    return paises
+
+def _indicadores_upstream(paises):
+    return te.getIndicatorData(country=list(paises), output_type="df")
+
+def _descargar_indicadores_te(paises):
+    """Una consulta para todos los países; persiste un frame por país."""
+    _login_te()
+    df = llamar("tradingeconomics", "indicadores", _indicadores_upstream, sorted(paises))
+    if df is None or df.empty:
+        return {}
+    if len(paises) == 1 or "Country" not in df.columns:
+        grupos = {paises[0]: df} if len(paises) == 1 else {}
+    else:
+        grupos = {str(p).lower(): g for p, g in df.groupby("Country")}
+    for pais, grupo in grupos.items():
+        guardar_json(ruta_cache("te", "indicadores", f"{pais}.json"), grupo.to_dict(orient="records"))
+    return grupos
+
+def _indicadores_cacheados_te(pais):
+    path = ruta_cache("te", "indicadores", f"{pais}.json")
+    registros = leer_json(path)
+    if registros is None:
+        return None, False
+    vencido = antiguedad(path) > TE_TTL_INDICADORES_HORAS * 3600
+    return pd.DataFrame(registros), vencido
 
 def obtener_pais_ticker(ticker):
-    ticker_ = ticker_map.get(ticker.upper(), ticker.upper())
+    ticker_ = resolver_ticker(ticker)
     try:
-        info = yf.Ticker(ticker_).info
+        info = obtener_info(ticker_)
         pais = info.get("country", "").lower()
         return mapa_paises_yf.get(pais, pais) or "default"
     except:
         return "default"
 
-def obtener_riesgo_pais(pais):
-    pais = pais.lower()
+def _riesgo_desde_indicadores(pais, df):
+    """Extrae el riesgo país de los indicadores de TE, o None si no hay dato usable."""
+    if df is None or df.empty:
+        print(f"[WARN] DataFrame vacío para {pais} desde TradingEconomics.")
+        return None
+    # Buscar por categorías relevantes
+    df_riesgo = df[df["Category"].str.lower().str.contains("risk|embi|bond")]
+    if df_riesgo.empty:
+        print(f"[WARN] No se encontró categoría 'risk|embi|bond' para {pais}. Usando fallback.")
+        return None
+    valor = df_riesgo.iloc[0]["Value"]
+    if pd.isna(valor):
+        print(f"[WARN] Valor nulo para riesgo país de {pais}. Usando fallback.")
+        return None
+    return round(float(valor))
 
-    # Asegurar que los países estén cargados
+def _riesgos_te(paises):
+    """Resuelve el riesgo país de varios países desde la caché de TradingEconomics."""
+    riesgos = {p: riesgo_pais_por_pais.get(p, riesgo_pais_por_pais["default"]) for p in paises}
     if not paises_disponibles_te:
         cargar_paises_te()
-
-    # Verificación de disponibilidad
-    if pais not in paises_disponibles_te:
-        print(f"[INFO] {pais} no disponible en TradingEconomics. Usando fallback.")
-        return riesgo_pais_por_pais.get(pais, riesgo_pais_por_pais["default"])
-
-    # Intentar obtener datos del indicador
-    try:
-        df = te.getIndicatorData(country=pais, output_type="df")
-
-        if df.empty:
-            print(f"[WARN] DataFrame vacío para {pais} desde TradingEconomics.")
-            return riesgo_pais_por_pais.get(pais, riesgo_pais_por_pais["default"])
-
-        # Mostrar primeros indicadores para debug
-        print(f"[DEBUG] Indicadores disponibles para {pais}:")
-        print(df[["Category", "Value"]].head(10))
-
-        # Buscar por categorías relevantes
-        df_riesgo = df[df["Category"].str.lower().str.contains("risk|embi|bond")]
-        if not df_riesgo.empty:
-            valor = df_riesgo.iloc[0]["Value"]
-            if pd.notna(valor):
-                valor = round(float(valor))
-                print(f"[INFO] Riesgo país actualizado para {pais}: {valor}")
-                return valor
-            else:
-                print(f"[WARN] Valor nulo para riesgo país de {pais}. Usando fallback.")
+    disponibles = sorted(p for p in paises if p in paises_disponibles_te)
+    if not disponibles:
+        return riesgos
+
+    frames, frios, vencidos = {}, [], []
+    for pais in disponibles:
+        df, vencido = _indicadores_cacheados_te(pais)
+        if df is None:
+            frios.append(pais)
         else:
-            print(f"[WARN] No se encontró categoría 'risk|embi|bond' para {pais}. Usando fallback.")
-
+            frames[pais] = df
+            if vencido:
+                vencidos.append(pais)
+
+    registrar_cache("tradingeconomics", True, len(frames))
+    registrar_cache("tradingeconomics", False, len(frios))
+    if vencidos:
+        _refrescar_te(("indicadores",) + tuple(vencidos), _descargar_indicadores_te, vencidos)
+    if frios:
+        futuro = _refrescar_te(("indicadores",) + tuple(frios), _descargar_indicadores_te, frios)
+        frames.update(_esperar_te(futuro, f"{len(frios)} países") or {})
+
+    for pais in disponibles:
+        valor = _riesgo_desde_indicadores(pais, frames.get(pais))
+        if valor is not None:
+            riesgos[pais] = valor
+    return riesgos
+
+# --- Snapshot de contexto de mercado (VIX + riesgo país), compartido por la ejecución ---
+# El snapshot no se modifica una vez publicado: las descargas se hacen sin el
+# lock y bajo el lock sólo se reemplaza la referencia.
+_contexto_lock = threading.Lock()
+_contexto_mercado = None
+
+def _history_periodo(simbolo, periodo):
+    return yf.Ticker(simbolo).history(periodo)
+
+def _descargar_vix():
+    try:
+        hist = llamar("yahoo", "history_periodo", _history_periodo, "^VIX", "5d")
+        return float(hist["Close"].dropna().iloc[-1])
     except Exception as e:
-        print(f"[ERROR] Fallo al consultar riesgo país para {pais}: {e}")
+        print(f"[VIX] No se pudo obtener el VIX: {e}")
+        return None
+
+def construir_contexto_mercado(paises=(), ttl=CONTEXTO_MERCADO_TTL):
+    """
+    Arma (o reutiliza si no venció el TTL) el snapshot con el VIX y el riesgo país
+    de todos los países indicados. Los países que falten se resuelven juntos.
+    """
+    global _contexto_mercado
+    paises = {str(p).lower() for p in paises if p}
+    with _contexto_lock:
+        ctx = _contexto_mercado
+    # Sin VIX el snapshot dura poco: se vuelve a intentar en la próxima consulta
+    vigente = ctx is not None and time.time() - ctx["creado"] <= (
+        ttl if ctx["vix"] is not None else min(ttl, CONTEXTO_MERCADO_TTL_FALLA))
+    faltantes = paises - set(ctx["riesgos"]) if vigente else paises
+    if vigente and not faltantes:
+        return ctx
+
+    nuevo = dict(ctx) if vigente else {"vix": _descargar_vix(), "riesgos": {}, "creado": time.time()}
+    nuevo["riesgos"] = {**nuevo["riesgos"], **(_riesgos_te(faltantes) if faltantes else {})}
+    with _contexto_lock:
+        actual = _contexto_mercado
+        if actual is not None and actual is not ctx and actual["creado"] >= nuevo["creado"]:
+            # Otro thread publicó un snapshot igual o más nuevo mientras tanto: se suman los países
+            nuevo = {**actual, "riesgos": {**nuevo["riesgos"], **actual["riesgos"]}}
+        _contexto_mercado = nuevo
+    return nuevo
+
+def obtener_vix():
+    return construir_contexto_mercado()["vix"]
 
-    # Fallback final
-    return riesgo_pais_por_pais.get(pais, riesgo_pais_por_pais["default"])
+def obtener_riesgo_pais(pais):
+    pais = (pais or "default").lower()
+    riesgos = construir_contexto_mercado([pais])["riesgos"]
+    return riesgos.get(pais, riesgo_pais_por_pais.get(pais, riesgo_pais_por_pais["default"]))
 
 
 
@@ -276,7 +471,7 @@ def penalizacion_sectorial(pais, sector):
 
 def obtener_contexto_mundial(ticker):
     try:
-        vix = yf.Ticker("^VIX").history("5d")["Close"].dropna().iloc[-1]
+        vix = obtener_vix()
         pais = obtener_pais_ticker(ticker)
         riesgo = obtener_riesgo_pais(pais)
         if vix < 18 and riesgo < 500:
@@ -293,7 +488,7 @@ def agregar_proyecciones_forward(resultado, ticker_map):
     ticker = resultado.get("Ticker", "")
     ticker_ = ticker_map.get(ticker.upper(), ticker.upper())
     try:
-        info = yf.Ticker(ticker_).info
+        info = obtener_info(ticker_)
         forward_eps = info.get("forwardEps")
         forward_rev_growth = info.get("revenueGrowth")
         margin_future = info.get("netMargins")
@@ -319,145 +514,27 @@ def agregar_proyecciones_forward(resultado, ticker_map):
     return resultado
 
 # --- Cálculo de Score ---
+# Campos que puntuar_portafolio agrega a cada fila
+CAMPOS_SCORE = [
+    "Contexto Global", "Target Base 12M", "Target Alcista 12M", "Target Conservador",
+    "Proyección 12M (%)", "Score Numérico Total", "Justificación Score",
+]
+
 def calcular_score(resultado):
+    """
+    Score de un solo resultado: envoltorio de score_vectorizado.puntuar_portafolio
+    (el motor que usa la app) sobre una tabla de una fila. Completa resultado con
+    los mismos campos y devuelve (texto, estrellas); ("N/A", 0) para bonos.
+    """
     if resultado.get("Tipo") == "Bono":
         return "N/A", 0
-    score = 0
-    ticker = resultado.get("Ticker", "")
-    justificaciones = []
-
-    # Métricas financieras
-    if (b := resultado.get("Beta")) is not None and b <= 1:
-        score += 1
-        justificaciones.append("Beta <= 1")
-    if (de := resultado.get("Debt/Equity")) and 0 < de < 1:
-        score += 1
-        justificaciones.append("Deuda/Equity < 1")
-    if (ev := resultado.get("EV/EBITDA")) and 0 < ev < 15:
-        score += 1
-        justificaciones.append("EV/EBITDA < 15")
-    if (roe := resultado.get("ROE")) and roe > 0.10:
-        score += 1
-        justificaciones.append("ROE > 10%")
-    if (roic := resultado.get("ROIC")) and roic > 0.08:
-        score += 1
-        justificaciones.append("ROIC > 8%")
-    if (peg := resultado.get("PEG Ratio")):
-        if 0 < peg < 1.5 or (peg > 1.5 and resultado.get("Forward Revenue Growth", 0) > 20):
-            score += 1
-            justificaciones.append("PEG Ratio razonable")
-    if (fcf := resultado.get("FCF Yield")):
-        if fcf > 0: score += 1; justificaciones.append("FCF positivo")
-        if fcf > 5: score += 1; justificaciones.append("FCF > 5%")
-    if (pe := resultado.get("P/E Ratio")) and 0 < pe < 20:
-        score += 1
-        justificaciones.append("P/E < 20")
-    if (pb := resultado.get("P/B Ratio")) and 0 < pb < 3:
-        score += 1
-        justificaciones.append("P/B < 3")
-    if (div := resultado.get("Dividend Yield")) and div > 0.02:
-        score += 1
-        justificaciones.append("Dividendo > 2%")
-    if (up := resultado.get("% Subida a Máx")) and up > 40:
-        score += 1
-        justificaciones.append("Potencial subida > 40%")
-    if (rev := resultado.get("Revenue Growth YoY")) and rev > 15:
-        score += 1
-        justificaciones.append("Crecimiento histórico > 15%")
-
-    # Proyecciones futuras
-    if (eps_fwd := resultado.get("Forward EPS")):
-        if eps_fwd > 0: score += 1; justificaciones.append("EPS futuro positivo")
-        elif eps_fwd < 0: score -= 1; justificaciones.append("EPS futuro negativo")
-    if (rev_fwd := resultado.get("Forward Revenue Growth")):
-        if rev_fwd > 10: score += 1; justificaciones.append("Crecimiento futuro > 10%")
-        elif rev_fwd < 0: score -= 1; justificaciones.append("Crecimiento futuro negativo")
-    if (margen := resultado.get("Margen Futuro")) and margen > 0.15:
-        score += 1
-        justificaciones.append("Margen futuro saludable")
-
-    # Técnicos (sin cambios)
-    try:
-        hist = resultado.get("Hist")
-        if isinstance(hist, dict):
-            df = pd.DataFrame(hist)
-            df = calcular_ema(df)
-            df = calcular_bollinger(df)
-            df["RSI"] = calcular_rsi(df)
-            df["MACD"], df["Signal"] = calcular_macd(df)
-            rsi = df["RSI"].dropna().iloc[-1]
-            macd = df["MACD"].iloc[-1]
-            signal = df["Signal"].iloc[-1]
-            precio = df['Close'].iloc[-1]
-            if 30 < rsi < 70: score += 1; justificaciones.append("RSI saludable")
-            if macd > signal: score += 1; justificaciones.append("MACD cruzado")
-            if df["EMA50"].iloc[-1] > df["EMA200"].iloc[-1]: score += 1; justificaciones.append("Tendencia EMA positiva")
-            if precio < df["Bollinger Lower"].iloc[-1]: score += 1; justificaciones.append("En banda inferior Bollinger")
-    except:
-        pass
-
-    # Penalizaciones
-    if (pe := resultado.get("P/E Ratio")) and pe > 60:
-        score -= 1
-        justificaciones.append("P/E > 60 (penaliza)")
-    if (roe := resultado.get("ROE")) and roe < 0:
-        score -= 1
-        justificaciones.append("ROE negativo")
-
-    # Sector estratégico
-    sector = str(resultado.get("Sector") or "").lower()
-    if any(x in sector for x in ["ai", "inteligencia", "energ", "defens", "cloud", "infra", "semic", "space", "uran", "aero"]):
-        score += 1
-        justificaciones.append("Sector estratégico")
-
-    # Penalización por ciclo macro-sectorial o riesgo regulatorio
-    pais = obtener_pais_ticker(ticker)
-    penal = penalizacion_sectorial(pais, sector)
-    score += penal
-    if penal < 0:
-        justificaciones.append(f"Penalización sectorial por {pais}/{sector} ({penal})")
-
-    # Contexto
-    contexto, bonus = obtener_contexto_mundial(ticker)
-    resultado["Contexto Global"] = contexto
-    score += bonus
-    if bonus > 0:
-        justificaciones.append(f"Contexto global favorable (+{bonus})")
-
-    # --- Precio objetivo ---
-    try:
-        actual = resultado.get("Actual")
-        eps_fwd = resultado.get("Forward EPS")
-        if eps_fwd and eps_fwd > 0 and actual and actual > 0:
-            target_base = eps_fwd * 18
-            target_bull = eps_fwd * 25
-            target_bear = eps_fwd * 12
-            resultado["Target Base 12M"] = round(target_base, 2)
-            resultado["Target Alcista 12M"] = round(target_bull, 2)
-            resultado["Target Conservador"] = round(target_bear, 2)
-            resultado["Proyección 12M (%)"] = round((target_base - actual) / actual * 100, 2)
-        else:
-            resultado["Target Base 12M"] = None
-            resultado["Target Alcista 12M"] = None
-            resultado["Target Conservador"] = None
-            resultado["Proyección 12M (%)"] = None
-            justificaciones.append("Sin proyección por EPS negativo o datos inválidos")
-    except:
-        resultado["Target Base 12M"] = None
-        resultado["Target Alcista 12M"] = None
-        resultado["Target Conservador"] = None
-        resultado["Proyección 12M (%)"] = None
-
-    resultado["Score Numérico Total"] = score
-    resultado["Justificación Score"] = justificaciones
-
-    if score >= 13:
-        return "⭐⭐⭐⭐⭐ (5/5 - Excelente)", 5
-    elif score >= 10:
-        return "⭐⭐⭐⭐ (4/5 - Muy Bueno)", 4
-    elif score >= 7:
-        return "⭐⭐⭐ (3/5 - Aceptable)", 3
-    elif score >= 4:
-        return "⭐⭐ (2/5 - Riesgoso)", 2
-    else:
-        return "⭐ (1/5 - Débil)", 1
\ No newline at end of file
+    from helpers.score_vectorizado import puntuar_portafolio, agregar_justificaciones
+    # "País" sólo se usa para el texto de la penalización sectorial
+    base = {"Ticker": "", **resultado}
+    base.setdefault("País", obtener_pais_ticker(base["Ticker"]))
+    fila = pd.DataFrame({clave: [valor] for clave, valor in base.items()})
+    fila = agregar_justificaciones(puntuar_portafolio(fila)).iloc[0]
+    for campo in CAMPOS_SCORE:
+        valor = fila[campo]
+        resultado[campo] = valor.item() if isinstance(valor, np.generic) else valor
+    return fila["Score Final"], int(fila["__orden_score"])
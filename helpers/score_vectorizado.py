@@ -0,0 +1,260 @@
+# helpers/score_vectorizado.py
+import numpy as np
+import pandas as pd
+from helpers.score import (
+    obtener_pais_ticker, obtener_vix, obtener_riesgo_pais, sectores_ciclicos,
+    riesgos_regulatorios
+)
+from helpers.indicadores import calcular_panel
+
+# Motor columnar del score (score.calcular_score es un envoltorio de una fila):
+# cada regla es una máscara booleana sobre todo el DataFrame de resultados. Las
+# justificaciones se guardan como un bitmask en "Reglas Score" y se decodifican
+# a texto sólo para mostrar. Igual que el score fila por fila original, las
+# reglas técnicas sólo se evalúan cuando Hist llega como dict: los proveedores
+# (Yahoo, Alpha Vantage, CoinGecko, Investpy, Rava) lo devuelven como DataFrame
+# y aplicarlas ahí cambiaría el score de casi todo el portafolio.
+
+# (bit, texto, puntos) en el orden en que se arma la justificación
+REGLAS = [
+    (0, "Beta <= 1", 1),
+    (1, "Deuda/Equity < 1", 1),
+    (2, "EV/EBITDA < 15", 1),
+    (3, "ROE > 10%", 1),
+    (4, "ROIC > 8%", 1),
+    (5, "PEG Ratio razonable", 1),
+    (6, "FCF positivo", 1),
+    (7, "FCF > 5%", 1),
+    (8, "P/E < 20", 1),
+    (9, "P/B < 3", 1),
+    (10, "Dividendo > 2%", 1),
+    (11, "Potencial subida > 40%", 1),
+    (12, "Crecimiento histórico > 15%", 1),
+    (13, "EPS futuro positivo", 1),
+    (14, "EPS futuro negativo", -1),
+    (15, "Crecimiento futuro > 10%", 1),
+    (16, "Crecimiento futuro negativo", -1),
+    (17, "Margen futuro saludable", 1),
+    (18, "RSI saludable", 1),
+    (19, "MACD cruzado", 1),
+    (20, "Tendencia EMA positiva", 1),
+    (21, "En banda inferior Bollinger", 1),
+    (22, "P/E > 60 (penaliza)", -1),
+    (23, "ROE negativo", -1),
+    (24, "Sector estratégico", 1),
+    (25, "Penalización sector cíclico", -1),
+    (26, "Penalización riesgo regulatorio", -1),
+    (27, "Contexto global favorable (+1)", 1),
+    (28, "Contexto global favorable (+2)", 2),
+    (29, "Sin proyección por EPS negativo o datos inválidos", 0),
+]
+PUNTOS = {bit: puntos for bit, _, puntos in REGLAS}
+BITS_TECNICOS = (18, 19, 20, 21)
+BITS_PENALIZACION = (25, 26)
+
+SECTORES_ESTRATEGICOS = ["ai", "inteligencia", "energ", "defens", "cloud", "infra", "semic", "space", "uran", "aero"]
+
+BANDAS = [
+    (13, "⭐⭐⭐⭐⭐ (5/5 - Excelente)", 5),
+    (10, "⭐⭐⭐⭐ (4/5 - Muy Bueno)", 4),
+    (7, "⭐⭐⭐ (3/5 - Aceptable)", 3),
+    (4, "⭐⭐ (2/5 - Riesgoso)", 2),
+]
+
+def _num(df, columna):
+    if columna not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[columna], errors="coerce").astype(float)
+
+def _texto(df, columna):
+    if columna not in df.columns:
+        return pd.Series("", index=df.index)
+    return df[columna].where(df[columna].notna(), "").astype(str).str.lower()
+
+def _contiene_alguno(serie, palabras):
+    mascara = pd.Series(False, index=serie.index)
+    for palabra in palabras:
+        mascara |= serie.str.contains(palabra, regex=False)
+    return mascara
+
+def _redondear(serie):
+    # round() de Python elemento a elemento, igual que el score fila por fila original
+    return serie.map(lambda v: round(v, 2) if pd.notna(v) else None)
+
+def _mascaras_tecnicas(df, indicadores=None):
+    """
+    Reglas técnicas a partir del último valor de cada indicador (helpers/indicadores).
+    Sólo para las filas con Hist dict y RSI válido; el resto no suma ninguna.
+    """
+    hist = df["Hist"] if "Hist" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    es_dict = hist.map(lambda h: isinstance(h, dict))
+    if indicadores is None:
+        indicadores = calcular_panel(hist[es_dict])["ultimos"]
+    ind = indicadores.reindex(df.index)
+    hay_rsi = es_dict & ind["RSI"].notna()
+    return {
+        18: hay_rsi & (ind["RSI"] > 30) & (ind["RSI"] < 70),
+        19: hay_rsi & (ind["MACD"] > ind["Signal"]),
+        20: hay_rsi & (ind["EMA50"] > ind["EMA200"]),
+        21: hay_rsi & (ind["Close"] < ind["Bollinger Lower"]),
+    }
+
+def calcular_mascaras(df, paises=None, indicadores=None):
+    """
+    Devuelve {bit: Series[bool]} con todas las reglas evaluadas sobre df.
+    indicadores: salida "ultimos" de calcular_panel indexada como df (se calcula si falta).
+    """
+    beta = _num(df, "Beta")
+    de = _num(df, "Debt/Equity")
+    ev = _num(df, "EV/EBITDA")
+    roe = _num(df, "ROE")
+    roic = _num(df, "ROIC")
+    peg = _num(df, "PEG Ratio")
+    fcf = _num(df, "FCF Yield")
+    pe = _num(df, "P/E Ratio")
+    pb = _num(df, "P/B Ratio")
+    div = _num(df, "Dividend Yield")
+    up = _num(df, "% Subida a Máx")
+    rev = _num(df, "Revenue Growth YoY")
+    eps_fwd = _num(df, "Forward EPS")
+    rev_fwd = _num(df, "Forward Revenue Growth")
+    margen = _num(df, "Margen Futuro")
+    actual = _num(df, "Actual")
+    sector = _texto(df, "Sector")
+    if paises is None:
+        paises = df["Ticker"].astype(str).map(obtener_pais_ticker)
+
+    m = {
+        0: beta <= 1,
+        1: (de > 0) & (de < 1),
+        2: (ev > 0) & (ev < 15),
+        3: roe > 0.10,
+        4: roic > 0.08,
+        5: ((peg > 0) & (peg < 1.5)) | ((peg > 1.5) & (rev_fwd > 20)),
+        6: fcf > 0,
+        7: fcf > 5,
+        8: (pe > 0) & (pe < 20),
+        9: (pb > 0) & (pb < 3),
+        10: div > 0.02,
+        11: up > 40,
+        12: rev > 15,
+        13: eps_fwd > 0,
+        14: eps_fwd < 0,
+        15: rev_fwd > 10,
+        16: rev_fwd < 0,
+        17: margen > 0.15,
+        22: pe > 60,
+        23: roe < 0,
+        24: _contiene_alguno(sector, SECTORES_ESTRATEGICOS),
+        25: _contiene_alguno(sector, sectores_ciclicos),
+    }
+    m.update(_mascaras_tecnicas(df, indicadores))
+
+    # Riesgo regulatorio: depende del par país/sector
+    regulatorio = pd.Series(False, index=df.index)
+    for pais, palabras in riesgos_regulatorios.items():
+        regulatorio |= (paises == pais) & _contiene_alguno(sector, palabras)
+    m[26] = regulatorio
+
+    # Contexto global: VIX único de la ejecución y riesgo por país desde el snapshot
+    vix = obtener_vix()
+    if vix is None:
+        m[27] = m[28] = pd.Series(False, index=df.index)
+    else:
+        riesgo = paises.map(lambda p: obtener_riesgo_pais(p)).astype(float)
+        favorable = (vix < 18) & (riesgo < 500)
+        moderado = ~favorable & (vix < 25) & (riesgo < 1000)
+        m[27], m[28] = moderado, favorable
+
+    m[29] = ~((eps_fwd > 0) & (actual > 0))
+    return {bit: m[bit].fillna(False).astype(bool) for bit in sorted(m)}
+
+def puntuar_portafolio(df, indicadores=None):
+    """
+    Score de todo el portafolio en una pasada. Agrega "Score Numérico Total",
+    "Reglas Score", "Contexto Global", precios objetivo, "Score Final",
+    "Recomendación" y "__orden_score". Los bonos quedan en "N/A".
+    Las reglas técnicas usan el panel de indicadores (ver helpers/indicadores).
+    """
+    df = df.copy()
+    if df.empty:
+        return df
+    es_bono = df["Tipo"].eq("Bono") if "Tipo" in df.columns else pd.Series(False, index=df.index)
+    filas = df.index[~es_bono]
+    sub = df.loc[filas]
+
+    paises = sub["Ticker"].astype(str).map(obtener_pais_ticker)
+    mascaras = calcular_mascaras(sub, paises=paises, indicadores=indicadores)
+
+    puntaje = pd.Series(0, index=filas, dtype="int64")
+    reglas = pd.Series(0, index=filas, dtype="int64")
+    for bit, mascara in mascaras.items():
+        puntaje += mascara.astype("int64") * PUNTOS[bit]
+        reglas += mascara.astype("int64") * (1 << bit)
+
+    if obtener_vix() is None:
+        contexto = "Contexto Global: DESCONOCIDO"
+    else:
+        contexto = np.select(
+            [mascaras[28], mascaras[27]],
+            ["Contexto Global: MUY FAVORABLE", "Contexto Global: MODERADO"],
+            default="Contexto Global: ADVERSO"
+        )
+
+    eps_fwd = _num(sub, "Forward EPS")
+    actual = _num(sub, "Actual")
+    valido = ~mascaras[29]
+    target_base = (eps_fwd * 18).where(valido)
+
+    # Las filas de bonos quedan sin valor (Score Final "N/A")
+    df["Score Numérico Total"] = puntaje.reindex(df.index)
+    df["Reglas Score"] = reglas.reindex(df.index, fill_value=0)
+    df.loc[filas, "Contexto Global"] = contexto
+    df.loc[filas, "Target Base 12M"] = _redondear(target_base)
+    df.loc[filas, "Target Alcista 12M"] = _redondear((eps_fwd * 25).where(valido))
+    df.loc[filas, "Target Conservador"] = _redondear((eps_fwd * 12).where(valido))
+    df.loc[filas, "Proyección 12M (%)"] = _redondear((target_base - actual) / actual * 100)
+
+    estrellas = pd.Series(0, index=df.index, dtype="int64")
+    texto = pd.Series("N/A", index=df.index, dtype=object)
+    estrellas.loc[filas] = np.select([puntaje >= umbral for umbral, _, _ in BANDAS], [n for _, _, n in BANDAS], default=1)
+    texto.loc[filas] = np.select([puntaje >= umbral for umbral, _, _ in BANDAS], [t for _, t, _ in BANDAS], default="⭐ (1/5 - Débil)")
+    df["Score Final"] = texto
+    df["__orden_score"] = estrellas
+
+    crecimiento = df["Crecimiento Futuro"] if "Crecimiento Futuro" in df.columns else pd.Series("", index=df.index)
+    df["Recomendación"] = np.select(
+        [estrellas >= 4, (estrellas == 3) & crecimiento.isin(["🟢 Alto", "🟡 Moderado"])],
+        ["✅ Comprar", "🙀 Revisar"],
+        default="❌ Evitar"
+    )
+    return df
+
+def decodificar_reglas(reglas, pais="", sector=""):
+    """Convierte el bitmask de "Reglas Score" en la lista de justificaciones."""
+    if pd.isna(reglas):
+        return []
+    reglas = int(reglas)
+    textos = []
+    for bit, texto, _ in REGLAS:
+        if not reglas & (1 << bit):
+            continue
+        if bit in BITS_PENALIZACION:
+            if bit == BITS_PENALIZACION[0] or not reglas & (1 << BITS_PENALIZACION[0]):
+                penal = -sum(1 for b in BITS_PENALIZACION if reglas & (1 << b))
+                textos.append(f"Penalización sectorial por {pais}/{sector} ({penal})")
+            continue
+        textos.append(texto)
+    return textos
+
+def agregar_justificaciones(df):
+    """Copia de df con la columna "Justificación Score" en texto, para mostrar o exportar."""
+    df = df.copy()
+    if "Reglas Score" not in df.columns:
+        return df
+    paises = df["País"] if "País" in df.columns else pd.Series("", index=df.index)
+    sectores = _texto(df, "Sector")
+    df["Justificación Score"] = [
+        decodificar_reglas(r, p, s) for r, p, s in zip(df["Reglas Score"], paises, sectores)
+    ]
+    return df
@@ -0,0 +1,115 @@
+# helpers/sesiones_http.py
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA, HTTP_REINTENTOS, HTTP_BACKOFF, HTTP_POOL
+
+# Cliente HTTP compartido por los helpers que usan requests (Finnhub, FMP, BYMA,
+# Rava, TradingEconomics): una Session por host con su pool de conexiones
+# keep-alive, así las llamadas repetidas al mismo host durante un análisis no
+# vuelven a pagar TCP + TLS. Todas usan los mismos timeouts, compresión gzip y
+# reintentos con backoff exponencial ante errores de conexión, 429 y 5xx.
+
+ESTADOS_REINTENTABLES = (429, 500, 502, 503, 504)
+CABECERAS = {"Accept-Encoding": "gzip, deflate", "User-Agent": "inversiones-activos/1.0"}
+
+_lock = threading.Lock()
+_sesiones = {}
+_solicitudes = {}
+# Contadores al arrancar la ejecución en curso: host -> (solicitudes, conexiones)
+_base = {}
+
+def _host(url):
+    partes = urlsplit(url)
+    return f"{partes.scheme}://{partes.netloc}"
+
+def _nueva_sesion():
+    reintentos = Retry(
+        total=HTTP_REINTENTOS, connect=HTTP_REINTENTOS, read=HTTP_REINTENTOS,
+        backoff_factor=HTTP_BACKOFF, status_forcelist=ESTADOS_REINTENTABLES,
+        allowed_methods=frozenset(["GET", "POST"]), respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL, max_retries=reintentos, pool_block=False)
+    sesion = requests.Session()
+    sesion.headers.update(CABECERAS)
+    sesion.mount("https://", adaptador)
+    sesion.mount("http://", adaptador)
+    return sesion
+
+def sesion(url):
+    """Session compartida del host de url (se crea la primera vez)."""
+    host = _host(url)
+    with _lock:
+        if host not in _sesiones:
+            _sesiones[host] = _nueva_sesion()
+            _solicitudes[host] = 0
+        _solicitudes[host] += 1
+        return _sesiones[host]
+
+def solicitar(metodo, url, timeout=None, **kwargs):
+    """requests.request con la Session del host y los timeouts uniformes por defecto."""
+    timeout = timeout if timeout is not None else (HTTP_TIMEOUT_CONEXION, HTTP_TIMEOUT_LECTURA)
+    return sesion(url).request(metodo, url, timeout=timeout, **kwargs)
+
+def get(url, **kwargs):
+    return solicitar("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return solicitar("POST", url, **kwargs)
+
+def _conexiones_abiertas(s):
+    # urllib3 cuenta las conexiones nuevas que abrió cada pool (num_connections)
+    total = 0
+    for adaptador in set(s.adapters.values()):
+        pools = getattr(getattr(adaptador, "poolmanager", None), "pools", None)
+        if pools is None:
+            continue
+        for clave in list(pools.keys()):
+            pool = pools.get(clave)
+            total += getattr(pool, "num_connections", 0) if pool is not None else 0
+    return total
+
+def iniciar_ejecucion():
+    """Toma los contadores actuales como base: estadisticas_http informa lo que pase desde acá."""
+    with _lock:
+        sesiones = dict(_sesiones)
+        solicitudes = dict(_solicitudes)
+    base = {host: (solicitudes.get(host, 0), _conexiones_abiertas(s)) for host, s in sesiones.items()}
+    with _lock:
+        _base.clear()
+        _base.update(base)
+
+def estadisticas_http():
+    """
+    Por host, desde iniciar_ejecucion(): solicitudes, conexiones abiertas y % de
+    solicitudes que reusaron una conexión (las sesiones viven todo el proceso).
+    """
+    with _lock:
+        sesiones = dict(_sesiones)
+        solicitudes = dict(_solicitudes)
+        base = dict(_base)
+    resumen = {}
+    for host, s in sesiones.items():
+        solicitudes_base, conexiones_base = base.get(host, (0, 0))
+        conexiones = max(0, _conexiones_abiertas(s) - conexiones_base)
+        n = solicitudes.get(host, 0) - solicitudes_base
+        if n <= 0:
+            continue
+        resumen[host] = {
+            "solicitudes": n,
+            "conexiones": conexiones,
+            "reuso": round(max(0.0, 1 - conexiones / n), 3),
+        }
+    return resumen
+
+def cerrar():
+    """Cierra todas las sesiones (libera los sockets del pool)."""
+    with _lock:
+        for s in _sesiones.values():
+            s.close()
+        _sesiones.clear()
+        _solicitudes.clear()
+        _base.clear()
@@ -0,0 +1,156 @@
+# helpers/sinteticos.py
+import zlib
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from helpers.proveedores import registrar_generador
+
+# Respuestas sintéticas y determinísticas (misma llamada -> mismos datos) para
+# cada proveedor. En modo replay responden lo que no tenga fixture grabado, así
+# el benchmark corre sin red y con cualquier tamaño de portafolio.
+
+PAISES = ["United States", "Argentina", "Brazil", "Mexico", "China", "Germany"]
+SECTORES = ["Technology", "Energy", "Financial Services", "Basic Materials", "Utilities", "Consumer Cyclical"]
+MONEDAS = [
+    {"id": "bitcoin", "symbol": "btc", "name": "Bitcoin"},
+    {"id": "ethereum", "symbol": "eth", "name": "Ethereum"},
+    {"id": "solana", "symbol": "sol", "name": "Solana"},
+    {"id": "cardano", "symbol": "ada", "name": "Cardano"},
+    {"id": "ripple", "symbol": "xrp", "name": "XRP"},
+]
+
+def _azar(*partes):
+    return np.random.default_rng(zlib.crc32("|".join(map(str, partes)).encode("utf-8")))
+
+# Caminata aleatoria fija por símbolo sobre un calendario común: el mismo día da
+# el mismo precio sin importar el rango pedido
+_CALENDARIO = pd.bdate_range("2000-01-03", "2031-12-31")
+
+@lru_cache(maxsize=4096)
+def _camino(simbolo):
+    rng = _azar("precio", simbolo)
+    pasos = rng.normal(0.0003, 0.018, len(_CALENDARIO))
+    return pd.Series(rng.uniform(5, 500) * np.exp(np.cumsum(pasos)), index=_CALENDARIO)
+
+def _serie(simbolo, indice):
+    dias = (indice.tz_localize(None) if indice.tz is not None else indice).normalize()
+    valores = _camino(simbolo).reindex(dias, method="ffill")
+    return valores.bfill().to_numpy()
+
+def _ohlcv(simbolo, indice):
+    cierre = _serie(simbolo, indice)
+    rng = _azar("volumen", simbolo, len(indice))
+    return pd.DataFrame({
+        "Open": cierre * 0.995, "High": cierre * 1.01, "Low": cierre * 0.99, "Close": cierre,
+        "Volume": rng.integers(1e5, 5e6, len(indice)), "Dividends": 0.0, "Stock Splits": 0.0,
+    }, index=indice)
+
+def history(simbolo, inicio, fin):
+    indice = pd.bdate_range(inicio, fin, inclusive="left", tz="America/New_York", name="Date")
+    return _ohlcv(simbolo, indice)
+
+def history_periodo(simbolo, periodo):
+    dias = int(str(periodo).rstrip("d") or 5)
+    indice = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=dias, tz="America/New_York", name="Date")
+    hist = _ohlcv(simbolo, indice)
+    if simbolo == "^VIX":
+        hist["Close"] = 15 + _azar("vix").uniform(-3, 8)
+    return hist
+
+def download(simbolos, inicio, fin):
+    return pd.concat({s: history(s, inicio, fin).drop(columns="Stock Splits") for s in simbolos}, axis=1)
+
+def info(simbolo):
+    rng = _azar("info", simbolo)
+    precio = float(rng.uniform(5, 500))
+    return {
+        "country": PAISES[int(rng.integers(len(PAISES)))],
+        "sector": SECTORES[int(rng.integers(len(SECTORES)))],
+        "beta": round(float(rng.uniform(0.3, 2.0)), 3),
+        "trailingPE": round(float(rng.uniform(5, 70)), 2),
+        "priceToBook": round(float(rng.uniform(0.5, 8)), 2),
+        "returnOnEquity": round(float(rng.uniform(-0.1, 0.4)), 4),
+        "returnOnAssets": round(float(rng.uniform(-0.05, 0.2)), 4),
+        "debtToEquity": round(float(rng.uniform(0, 3)), 2),
+        "enterpriseToEbitda": round(float(rng.uniform(2, 30)), 2),
+        "dividendYield": round(float(rng.uniform(0, 0.06)), 4),
+        "revenueGrowth": round(float(rng.uniform(-0.2, 0.5)), 4),
+        "earningsGrowth": round(float(rng.uniform(-0.2, 0.5)), 4),
+        "netMargins": round(float(rng.uniform(-0.1, 0.35)), 4),
+        "forwardEps": round(float(rng.uniform(-2, 15)), 2),
+        "freeCashflow": float(rng.uniform(-1e8, 5e9)),
+        "marketCap": float(rng.uniform(1e9, 1e12)),
+        "currentPrice": precio,
+        "fiftyTwoWeekHigh": precio * float(rng.uniform(1, 1.8)),
+        "longBusinessSummary": f"{simbolo} is a synthetic company used for offline benchmarks.",
+    }
+
+def paises_te():
+    return [{"country": p} for p in PAISES]
+
+def indicadores_te(paises):
+    filas = []
+    for pais in paises:
+        rng = _azar("te", pais)
+        filas.append({"Country": str(pais).title(), "Category": "Government Bond 10Y", "Value": float(rng.uniform(100, 1500))})
+        filas.append({"Country": str(pais).title(), "Category": "GDP Growth Rate", "Value": float(rng.uniform(-2, 5))})
+    return pd.DataFrame(filas)
+
+def market_chart(cg, coin_id, desde, hasta):
+    indice = pd.date_range(pd.Timestamp(desde, unit="s"), pd.Timestamp(hasta, unit="s"), freq="D")
+    precios = _serie(coin_id, indice)
+    return {"prices": [[int(f.timestamp() * 1000), float(p)] for f, p in zip(indice, precios)]}
+
+def diario_alphavantage(ticker):
+    indice = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=750, name="date")
+    cierre = _serie(ticker, indice)
+    return pd.DataFrame({"4. close": cierre, "5. adjusted close": cierre}, index=indice), {"2. Symbol": ticker}
+
+def historico_investpy(nombre, pais, desde, hasta):
+    indice = pd.bdate_range(pd.to_datetime(desde, dayfirst=True), pd.to_datetime(hasta, dayfirst=True), name="Date")
+    return pd.DataFrame({"Close": _serie(nombre, indice)}, index=indice)
+
+def metricas_finnhub(url):
+    return {"metric": {"freeCashFlowYieldAnnual": float(_azar("finnhub", url).uniform(-2, 10))}}
+
+def metricas_fmp(url):
+    rng = _azar("fmp", url)
+    return [{"evToEbitda": float(rng.uniform(2, 30)), "roe": float(rng.uniform(-0.1, 0.4)), "freeCashFlowYield": float(rng.uniform(-0.02, 0.1))}]
+
+def detalle_byma(symbol, token):
+    precio = float(_azar("byma", symbol).uniform(30, 90))
+    return {"price": {"last": precio, "low": precio * 0.9, "high": precio * 1.2}}
+
+def historial_rava(ticker):
+    rng = _azar("rava", ticker)
+    filas = "".join(
+        f"<tr><td>{dia:02d}/01/2025</td><td>1</td><td>1</td><td>1</td><td>{rng.uniform(30, 90):.2f}</td></tr>"
+        for dia in range(1, 21)
+    )
+    return 200, f"<table><tr><th>Fecha</th><th>A</th><th>M</th><th>m</th><th>Cierre</th></tr>{filas}</table>"
+
+def registrar():
+    """Registra todos los generadores en helpers/proveedores."""
+    generadores = {
+        ("yahoo", "history"): history,
+        ("yahoo", "history_periodo"): history_periodo,
+        ("yahoo", "download"): download,
+        ("yahoo", "info"): info,
+        ("tradingeconomics", "login"): lambda *a, **k: None,
+        ("tradingeconomics", "paises"): paises_te,
+        ("tradingeconomics", "indicadores"): indicadores_te,
+        ("coingecko", "coins_list"): lambda: list(MONEDAS),
+        ("coingecko", "market_chart"): market_chart,
+        ("alphavantage", "daily"): diario_alphavantage,
+        ("investpy", "historico"): historico_investpy,
+        ("finnhub", "metricas"): metricas_finnhub,
+        ("fmp", "metricas"): metricas_fmp,
+        ("byma", "token"): lambda: {"access_token": "sintetico", "expires_in": 3600},
+        ("byma", "detalle"): detalle_byma,
+        ("rava", "historial"): historial_rava,
+        ("iamc", "cotizaciones"): lambda path: pd.DataFrame(columns=["Ticker", "Precio"]),
+        ("traductor", "lote"): lambda textos, destino: [f"[{destino}] {t}" for t in textos],
+        ("traductor", "texto"): lambda texto, destino: f"[{destino}] {texto}",
+    }
+    for (proveedor, operacion), fn in generadores.items():
+        registrar_generador(proveedor, operacion, fn)
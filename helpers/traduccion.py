@@ -0,0 +1,88 @@
+# helpers/traduccion.py
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from deep_translator import GoogleTranslator
+from helpers.cache_disco import ruta_cache, leer_json, guardar_json
+from helpers.proveedores import llamar, registrar_cache
+from config import TRADUCCION_WORKERS
+
+# Caché persistente de traducciones direccionada por contenido: la clave es el hash
+# del texto original y del idioma destino, así un resumen que no cambió nunca se
+# vuelve a traducir.
+
+TAMANO_LOTE = 10
+COLUMNA_PENDIENTE = "__contexto_original"
+
+def _ruta(texto, destino):
+    clave = hashlib.sha256(f"{destino}\0{texto}".encode("utf-8")).hexdigest()
+    return ruta_cache("traducciones", destino, f"{clave}.json")
+
+def traduccion_cacheada(texto, destino="es"):
+    datos = leer_json(_ruta(texto, destino))
+    return datos.get("traduccion") if datos else None
+
+def _guardar(texto, destino, traduccion):
+    try:
+        guardar_json(_ruta(texto, destino), {"traduccion": traduccion})
+    except OSError as e:
+        print(f"[traducción] No se pudo guardar en caché: {e}")
+
+def _lote_upstream(textos, destino):
+    return GoogleTranslator(source='auto', target=destino).translate_batch(textos)
+
+def _texto_upstream(texto, destino):
+    return GoogleTranslator(source='auto', target=destino).translate(texto)
+
+def _traducir_bloque(textos, destino):
+    try:
+        return llamar("traductor", "lote", _lote_upstream, list(textos), destino)
+    except Exception as e:
+        print(f"[traducción] Falló el lote ({len(textos)} textos), se reintenta uno por uno: {e}")
+    traducidos = []
+    for texto in textos:
+        try:
+            traducidos.append(llamar("traductor", "texto", _texto_upstream, texto, destino))
+        except Exception as e:
+            print(f"[traducción] {texto[:40]}... -> {e}")
+            traducidos.append(None)
+    return traducidos
+
+def traducir_lote(textos, destino="es"):
+    """
+    Traduce una lista de textos devolviendo {original: traducción}. Los aciertos
+    salen de la caché; los faltantes se traducen en lotes y se persisten. Si un
+    texto no se puede traducir se devuelve el original.
+    """
+    resultado, pendientes = {}, []
+    for texto in dict.fromkeys(t for t in textos if t):
+        cacheado = traduccion_cacheada(texto, destino)
+        if cacheado is not None:
+            resultado[texto] = cacheado
+            registrar_cache("traductor", True)
+        else:
+            pendientes.append(texto)
+            registrar_cache("traductor", False)
+
+    bloques = [pendientes[i:i + TAMANO_LOTE] for i in range(0, len(pendientes), TAMANO_LOTE)]
+    if bloques:
+        with ThreadPoolExecutor(max_workers=max(1, min(TRADUCCION_WORKERS, len(bloques)))) as pool:
+            for bloque, traducidos in zip(bloques, pool.map(lambda b: _traducir_bloque(b, destino), bloques)):
+                for texto, traduccion in zip(bloque, traducidos):
+                    if traduccion:
+                        _guardar(texto, destino, traduccion)
+                    resultado[texto] = traduccion or texto
+    return resultado
+
+def traducir(texto, destino="es"):
+    return traducir_lote([texto], destino).get(texto, texto) if texto else texto
+
+def completar_traducciones(df, columna="Contexto", destino="es"):
+    """Traduce en lote los textos que quedaron pendientes (traducción diferida)."""
+    if COLUMNA_PENDIENTE not in df.columns:
+        return df
+    df = df.copy()
+    pendientes = df[COLUMNA_PENDIENTE].dropna()
+    if not pendientes.empty:
+        traducciones = traducir_lote(pendientes.tolist(), destino)
+        df.loc[pendientes.index, columna] = pendientes.map(traducciones)
+    return df.drop(columns=COLUMNA_PENDIENTE)
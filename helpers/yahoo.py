@@ -1,9 +1,9 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime
 import warnings
+from helpers.precios_store import obtener_historico
 
-def analizar_con_yfinance(ticker, fecha_inicio, fecha_fin):
+def analizar_con_yfinance(ticker, fecha_inicio, fecha_fin, hist=None):
     try:
         # Asegurar formatos de fecha tipo string (ISO 8601)
         if isinstance(fecha_inicio, datetime):
@@ -11,9 +11,10 @@ def analizar_con_yfinance(ticker, fecha_inicio, fecha_fin):
         if isinstance(fecha_fin, datetime):
             fecha_fin = fecha_fin.strftime('%Y-%m-%d')
 
-        # Obtener datos históricos
-        data = yf.Ticker(ticker)
-        hist = data.history(start=fecha_inicio, end=fecha_fin)
+        # Obtener datos históricos (store local + descarga incremental del tramo faltante),
+        # salvo que ya vengan de la descarga agrupada
+        if hist is None:
+            hist = obtener_historico(ticker, fecha_inicio, fecha_fin)
 
         if hist.empty or 'Close' not in hist.columns:
             warnings.warn(f"No hay datos históricos válidos para {ticker} en Yahoo Finance.")
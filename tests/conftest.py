@@ -0,0 +1,36 @@
+# tests/conftest.py
+import os
+import sys
+import time
+import tempfile
+import pytest
+
+# Los tests importan helpers/ y config.py desde la raíz del repo
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Estado en disco (circuit breaker, cachés) en una carpeta propia, no en la del usuario
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="inversiones_tests_"))
+
+
+class Reloj:
+    """Reloj falso para time.time/time.monotonic/time.sleep: sólo avanza a mano (o con sleep)."""
+
+    def __init__(self, inicio):
+        self.ahora = inicio
+
+    def time(self):
+        return self.ahora
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.ahora += segundos
+
+    def avanzar(self, segundos):
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj():
+    return Reloj(time.time())
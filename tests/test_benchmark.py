@@ -0,0 +1,23 @@
+# tests/test_benchmark.py
+# Smoke test del benchmark: el pipeline completo en modo replay, sin red, sobre
+# fixtures vacíos (todo lo responde helpers/sinteticos.py). Necesita las
+# dependencias del pipeline (requirements.txt); sin ellas se saltea.
+import pytest
+
+for _modulo in ("streamlit", "yfinance", "investpy", "pycoingecko", "alpha_vantage", "tradingeconomics", "sklearn"):
+    pytest.importorskip(_modulo)
+
+
+def test_benchmark_replay(tmp_path, monkeypatch):
+    monkeypatch.setenv("CACHE_DIR", str(tmp_path / "cache"))
+    from helpers import benchmark
+
+    reporte = benchmark.main(["--tamanos", "10", "--repeticiones", "1", "--fixtures", str(tmp_path / "fixtures")])
+
+    assert reporte["config"]["modo"] == "replay"
+    [resultado] = reporte["resultados"]
+    assert resultado["tickers"] == 10
+    for etapa in ("precios_lote", "lote_bonos", "contexto", "tickers", "indicadores", "score", "total"):
+        assert resultado["etapas"][etapa]["n"] == 1
+    assert resultado["por_ticker"]["n"] == 10
+    assert len(resultado["errores_por_corrida"]) == 1
@@ -0,0 +1,160 @@
+# tests/test_circuito.py
+# Circuit breaker con reloj falso: apertura, prueba en semiabierto, enfriamiento
+# que se duplica y estado compartido entre procesos por CACHE_DIR/circuito.
+import os
+import pytest
+
+from helpers import cache_disco, circuito
+from helpers.fixtures import ErrorGrabado
+
+
+@pytest.fixture
+def circ(reloj, tmp_path, monkeypatch):
+    monkeypatch.setattr(circuito, "time", reloj)
+    monkeypatch.setattr(cache_disco, "time", reloj)
+    monkeypatch.setattr(cache_disco, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(circuito, "CIRCUITO_ACTIVO", True)
+    monkeypatch.setattr(circuito, "CIRCUITO_FALLAS", 3)
+    monkeypatch.setattr(circuito, "CIRCUITO_ENFRIAMIENTO", 60.0)
+    monkeypatch.setattr(circuito, "CIRCUITO_ENFRIAMIENTO_MAX", 200.0)
+    monkeypatch.setattr(circuito, "CIRCUITO_LENTO", 20.0)
+    circuito.reiniciar()
+    yield circuito
+    circuito.reiniciar()
+
+
+def _abrir(circ, proveedor="yahoo"):
+    for _ in range(circ.CIRCUITO_FALLAS):
+        circ.permitir(proveedor)
+        circ.registrar(proveedor, 0.1, ok=False)
+
+
+def test_abre_despues_de_fallas_seguidas(circ):
+    for _ in range(2):
+        circ.permitir("yahoo")
+        circ.registrar("yahoo", 0.1, ok=False)
+    circ.permitir("yahoo")
+    circ.registrar("yahoo", 0.1, ok=True)
+    # Un éxito reinicia la cuenta: hacen falta otras tres fallas seguidas
+    _abrir(circ)
+
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("yahoo")
+    assert circ.salud("yahoo")[0] is False
+    assert circ.estados_circuito()["yahoo"]["estado"] == circuito.ABIERTO
+
+
+def test_llamada_lenta_cuenta_como_falla(circ):
+    for _ in range(3):
+        circ.permitir("rava")
+        circ.registrar("rava", 25.0, ok=True)
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("rava")
+
+
+def test_semiabierto_deja_pasar_una_sola_prueba(circ, reloj):
+    _abrir(circ)
+    reloj.avanzar(59)
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("yahoo")
+
+    reloj.avanzar(1)
+    assert circ.salud("yahoo")[0] is True
+    circ.permitir("yahoo")
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("yahoo")
+
+    circ.registrar("yahoo", 0.1, ok=True)
+    circ.permitir("yahoo")
+    circ.permitir("yahoo")
+    estado = circ.estados_circuito()["yahoo"]
+    assert estado["estado"] == circuito.CERRADO
+    assert estado["enfriamiento"] == 60.0
+
+
+def test_prueba_fallida_duplica_el_enfriamiento(circ, reloj):
+    _abrir(circ)
+    reloj.avanzar(60)
+    circ.permitir("yahoo")
+    circ.registrar("yahoo", 0.1, ok=False)
+
+    reloj.avanzar(119)
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("yahoo")
+    reloj.avanzar(1)
+    circ.permitir("yahoo")
+    circ.registrar("yahoo", 0.1, ok=False)
+
+    # 240 s recortados a CIRCUITO_ENFRIAMIENTO_MAX
+    estado = circ.estados_circuito()["yahoo"]
+    assert estado["enfriamiento"] == 200.0
+    assert estado["abierto_hasta"] == pytest.approx(reloj.ahora + 200.0)
+
+
+def test_liberar_devuelve_la_prueba(circ, reloj):
+    _abrir(circ)
+    reloj.avanzar(60)
+    circ.permitir("yahoo")
+    circ.liberar("yahoo")
+    circ.permitir("yahoo")
+
+
+def test_es_falla():
+    class ReadTimeout(Exception):
+        pass
+
+    class RateLimitError(Exception):
+        pass
+
+    def con_status(status):
+        error = Exception(f"HTTP {status}")
+        error.response = type("Respuesta", (), {"status_code": status})()
+        return error
+
+    grabado = ErrorGrabado("429 Too Many Requests")
+    grabado.response = type("Respuesta", (), {"status_code": 429})()
+
+    assert circuito.es_falla(TimeoutError())
+    assert circuito.es_falla(ConnectionError())
+    assert circuito.es_falla(ReadTimeout())
+    assert circuito.es_falla(RateLimitError())
+    assert circuito.es_falla(con_status(503))
+    assert circuito.es_falla(grabado)
+    assert not circuito.es_falla(con_status(404))
+    assert not circuito.es_falla(ValueError("símbolo inválido"))
+
+
+def test_otro_proceso_ve_el_circuito_abierto(circ):
+    _abrir(circ)
+    # Proceso nuevo: memoria vacía, mismo CACHE_DIR
+    circuito.reiniciar()
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("yahoo")
+
+
+def test_sincroniza_lo_mas_nuevo_de_cada_proveedor(circ, reloj):
+    circ.permitir("yahoo")
+    circ.registrar("yahoo", 0.1, ok=True)
+    circ.permitir("byma")
+    circ.registrar("byma", 0.1, ok=True)
+
+    # Otro proceso abrió yahoo después y tiene un byma más viejo
+    reloj.avanzar(1)
+    path = cache_disco.ruta_cache("circuito", "estado.json")
+    ajeno = {
+        "yahoo": {**circuito._estado_inicial(), "estado": circuito.ABIERTO, "abierto_hasta": reloj.ahora + 60, "actualizado": reloj.ahora},
+        "byma": {**circuito._estado_inicial(), "estado": circuito.ABIERTO, "abierto_hasta": reloj.ahora + 60, "actualizado": reloj.ahora - 100},
+    }
+    cache_disco.guardar_json(path, ajeno)
+    os.utime(path, (reloj.ahora, reloj.ahora))
+
+    # Hasta SINCRONIZAR_CADA no se relee el disco
+    circ.permitir("yahoo")
+    reloj.avanzar(circuito.SINCRONIZAR_CADA)
+    with pytest.raises(circuito.CircuitoAbierto):
+        circ.permitir("yahoo")
+    circ.permitir("byma")
+
+    guardado = cache_disco.leer_json(path)
+    assert guardado["yahoo"]["estado"] == circuito.ABIERTO
+    assert guardado["byma"]["estado"] == circuito.CERRADO
@@ -0,0 +1,177 @@
+# tests/test_fallback.py
+# Cadena de fuentes con hedging (obtener_primero) sobre fuentes falsas y orden
+# adaptativo (ordenar) con la salud de los proveedores simulada.
+import threading
+import time
+import pytest
+
+from helpers import fallback, planificador
+from helpers.fallback import Fuente
+
+
+@pytest.fixture(autouse=True)
+def sin_esperas(monkeypatch):
+    esperas = {}
+    monkeypatch.setattr(fallback, "espera_estimada", lambda proveedor: esperas.get(proveedor, 0.0))
+    fallback.iniciar_ejecucion()
+    return esperas
+
+
+@pytest.fixture
+def liberar():
+    # Las fuentes "colgadas" esperan este evento; al terminar el test se sueltan
+    evento = threading.Event()
+    yield evento
+    evento.set()
+
+
+def _fuente(clave, fn, proveedor=None):
+    return Fuente(clave, clave.upper(), proveedor or clave, fn)
+
+
+def _precio(valor):
+    return lambda: {"Actual": valor}
+
+
+def _colgada(liberar, valor=None):
+    def fn():
+        liberar.wait(5)
+        return {"Actual": valor} if valor is not None else None
+    return fn
+
+
+def test_la_primera_gana_sin_hedge():
+    probadas = []
+    resultado, fuente = fallback.obtener_primero(
+        [_fuente("a", _precio(10)), _fuente("b", _precio(20))], demora=1.0, probadas=probadas)
+
+    assert resultado == {"Actual": 10} and fuente.clave == "a"
+    assert probadas == ["A"]
+
+
+def test_hedge_despues_de_la_demora(liberar):
+    probadas = []
+    resultado, fuente = fallback.obtener_primero(
+        [_fuente("a", _colgada(liberar, 10)), _fuente("b", _precio(20))], demora=0.05, probadas=probadas)
+
+    assert fuente.clave == "b" and resultado == {"Actual": 20}
+    assert probadas == ["A", "B"]
+    stats = fallback.estadisticas_fallback()
+    assert stats["por_demora"] == 1
+    assert stats["descartadas"] == 1
+    assert stats["ganadoras"] == {"b": 1}
+
+
+def test_una_falla_lanza_la_siguiente_sin_esperar_la_demora():
+    def falla():
+        raise ConnectionError("sin red")
+
+    errores = []
+    inicio = time.perf_counter()
+    resultado, fuente = fallback.obtener_primero(
+        [_fuente("a", falla), _fuente("b", _precio(0)), _fuente("c", _precio(5))],
+        demora=10.0, errores=errores, ticker="GGAL")
+
+    assert time.perf_counter() - inicio < 2
+    # Un precio en 0 no gana: sigue a la próxima fuente
+    assert fuente.clave == "c"
+    assert errores == ["[A] GGAL: sin red"]
+
+
+def test_sin_resultado_devuelve_none():
+    probadas = []
+    assert fallback.obtener_primero([_fuente("a", lambda: None), _fuente("b", lambda: {})], probadas=probadas) == (None, None)
+    assert probadas == ["A", "B"]
+    assert fallback.estadisticas_fallback()["sin_resultado"] == 1
+
+
+def test_no_hay_hedge_a_un_proveedor_con_espera_larga(liberar, sin_esperas):
+    sin_esperas["b"] = 10.0
+    probadas = []
+    resultado, fuente = fallback.obtener_primero(
+        [_fuente("a", _colgada(liberar, 10)), _fuente("b", _precio(20)), _fuente("c", _precio(30))],
+        demora=0.05, probadas=probadas)
+
+    assert fuente.clave == "c"
+    assert probadas == ["A", "C"]
+
+
+def test_la_perdedora_en_cola_de_turno_se_cancela(monkeypatch):
+    monkeypatch.setattr(planificador, "LIMITES_TASA", {"lento": (1, 1)})
+    monkeypatch.setattr(planificador, "_baldes", {})
+    planificador.esperar_turno("lento")
+    salida = {}
+    salio = threading.Event()
+
+    def en_cola():
+        try:
+            planificador.esperar_turno("lento")
+            return {"Actual": 1}
+        except planificador.TurnoCancelado:
+            salida["cancelada"] = True
+            raise
+        finally:
+            salio.set()
+
+    errores = []
+    resultado, fuente = fallback.obtener_primero(
+        [_fuente("a", en_cola, "lento"), _fuente("b", _precio(20))], demora=0.05, errores=errores)
+
+    assert fuente.clave == "b"
+    # La espera de ~60 s por el turno termina apenas gana b, sin reportar error
+    assert salio.wait(5)
+    assert salida == {"cancelada": True}
+    assert errores == []
+    assert planificador.estado_colas()["lento"] == 0
+
+
+def test_sin_hedge_espera_a_cada_fuente(monkeypatch):
+    orden = []
+
+    def fuente(clave, valor):
+        def fn():
+            orden.append(clave)
+            time.sleep(0.05)
+            return {"Actual": valor} if valor else None
+        return _fuente(clave, fn)
+
+    monkeypatch.setattr(fallback, "PRECIOS_HEDGE", False)
+    resultado, ganadora = fallback.obtener_primero([fuente("a", None), fuente("b", 2), fuente("c", 3)])
+    assert ganadora.clave == "b"
+    assert orden == ["a", "b"]
+
+
+# --- Orden adaptativo ---
+
+def _fuentes(*claves):
+    return {clave: _fuente(clave, _precio(1)) for clave in claves}
+
+
+def test_ordenar_respeta_el_tipo_sin_adaptativo():
+    fuentes = _fuentes("yahoo", "investpy", "byma", "rava", "coingecko", "alphavantage")
+    assert [f.clave for f in fallback.ordenar(fuentes, "bono", adaptativo=False)] == ["byma", "rava", "yahoo", "investpy"]
+    assert [f.clave for f in fallback.ordenar(fuentes, "cripto", adaptativo=False)] == ["coingecko", "yahoo", "alphavantage"]
+    assert [f.clave for f in fallback.ordenar(_fuentes("investpy", "yahoo"), "accion", adaptativo=False)] == ["yahoo", "investpy"]
+
+
+def test_ordenar_adapta_por_salud(monkeypatch, sin_esperas):
+    salud = {
+        "byma": (False, 0.0, None),      # circuito abierto: al final
+        "rava": (True, 0.2, 300.0),      # falla seguido: cae detrás de yahoo
+        "yahoo": (True, 1.0, 500.0),
+        "investpy": (True, 1.0, 100.0),
+    }
+    monkeypatch.setattr(fallback, "salud", lambda proveedor: salud[proveedor])
+    fuentes = _fuentes("byma", "rava", "yahoo", "investpy")
+    assert [f.clave for f in fallback.ordenar(fuentes, "bono", adaptativo=True)] == ["yahoo", "investpy", "rava", "byma"]
+
+    # Una espera larga por límite de tasa también la corre hacia atrás
+    sin_esperas["yahoo"] = 10.0
+    assert [f.clave for f in fallback.ordenar(fuentes, "bono", adaptativo=True)] == ["investpy", "rava", "yahoo", "byma"]
+
+
+def test_tipo_instrumento():
+    assert fallback.tipo_instrumento("AL30", True, False) == "bono"
+    assert fallback.tipo_instrumento("ALUA.BA", True, False) == "accion"
+    assert fallback.tipo_instrumento("BTC-USD", False, True) == "cripto"
+    assert fallback.tipo_instrumento("AAPL", False, False) == "accion"
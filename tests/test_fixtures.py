@@ -0,0 +1,100 @@
+# tests/test_fixtures.py
+# Fixtures de proveedores: ida y vuelta por JSON + Parquet y record/replay en
+# helpers/proveedores, sin red ni streamlit.
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import fixtures, proveedores
+
+
+def _ida_y_vuelta(tmp_path, resultado):
+    path = str(tmp_path / "fixture.json")
+    fixtures.grabar(path, "clave", resultado=resultado)
+    return fixtures.leer(path)
+
+
+def test_tipos_basicos(tmp_path):
+    resultado = {
+        "precio": 10.5, "volumen": np.int64(3), "nombre": "GGAL", "activo": True, "nada": None,
+        "lista": [1, "a", None], "par": (200, "<html>"), "fecha": pd.Timestamp("2024-05-02"),
+        "claves_numericas": {1: "uno", 2: "dos"},
+    }
+    leido = _ida_y_vuelta(tmp_path, resultado)
+    assert leido == {**resultado, "volumen": 3}
+    assert isinstance(leido["par"], tuple)
+    assert isinstance(leido["volumen"], int)
+
+
+def test_dataframes_y_series_van_a_parquet(tmp_path):
+    fechas = pd.date_range("2024-01-01", periods=5, name="Date")
+    historia = pd.DataFrame({"Close": np.linspace(1, 2, 5), "Volume": np.arange(5)}, index=fechas)
+    lote = pd.concat({"AAPL": historia, "MSFT": historia * 2}, axis=1)
+    serie = historia["Close"]
+
+    leido = _ida_y_vuelta(tmp_path, (historia, {"meta": "x", "lote": lote, "serie": serie}))
+
+    pd.testing.assert_frame_equal(leido[0], historia, check_freq=False)
+    pd.testing.assert_frame_equal(leido[1]["lote"], lote, check_freq=False)
+    pd.testing.assert_series_equal(leido[1]["serie"], serie, check_freq=False)
+    assert sorted(p.suffix for p in tmp_path.iterdir()) == [".json", ".parquet", ".parquet", ".parquet"]
+
+
+def test_el_json_no_contiene_objetos_ejecutables(tmp_path):
+    path = tmp_path / "fixture.json"
+    fixtures.grabar(str(path), "clave", resultado={"a": (1, 2)})
+    assert json.loads(path.read_text(encoding="utf-8"))["resultado"] == {"a": {"__tipo__": "tuple", "items": [1, 2]}}
+
+
+def test_tipo_no_soportado(tmp_path):
+    with pytest.raises(fixtures.FormatoNoSoportado):
+        fixtures.grabar(str(tmp_path / "fixture.json"), "clave", resultado=object())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_error_grabado_conserva_clase_y_status(tmp_path):
+    class HTTPError(Exception):
+        pass
+
+    error = HTTPError("503 Server Error")
+    error.response = type("Respuesta", (), {"status_code": 503})()
+    path = str(tmp_path / "fixture.json")
+    fixtures.grabar(path, "clave", error=error)
+
+    with pytest.raises(fixtures.ErrorGrabado) as info:
+        fixtures.leer(path)
+    assert type(info.value).__name__ == "HTTPError"
+    assert str(info.value) == "503 Server Error"
+    assert info.value.response.status_code == 503
+
+
+@pytest.fixture
+def modo_proveedores(tmp_path):
+    previa = proveedores.configuracion()
+
+    def configurar(modo):
+        proveedores.configurar(modo=modo, fixtures=str(tmp_path / "fixtures"), latencia=0, tasa_fallas=0)
+
+    yield configurar
+    proveedores.configurar(**previa)
+
+
+def test_record_y_replay(modo_proveedores):
+    historia = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.date_range("2024-01-01", periods=2))
+    modo_proveedores("record")
+    grabado = proveedores.llamar("prueba", "historia", lambda ticker, period: historia, "GGAL", period="1y")
+
+    modo_proveedores("replay")
+    repetido = proveedores.llamar("prueba", "historia", lambda ticker, period: pytest.fail("llamó en vivo"), "GGAL", period="1y")
+
+    pd.testing.assert_frame_equal(repetido, grabado, check_freq=False)
+    with pytest.raises(proveedores.FixtureFaltante):
+        proveedores.llamar("prueba", "historia", lambda ticker, period: None, "YPF", period="1y")
+
+
+def test_record_sin_formato_no_rompe_la_llamada(modo_proveedores, tmp_path):
+    respuesta = object()
+    modo_proveedores("record")
+    assert proveedores.llamar("prueba", "sdk", lambda: respuesta) is respuesta
+    assert list((tmp_path / "fixtures").rglob("*.json")) == []
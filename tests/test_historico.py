@@ -0,0 +1,23 @@
+# tests/test_historico.py
+import os
+import pandas as pd
+
+from helpers import historico
+
+
+def test_snapshot_sin_columnas_excluidas(tmp_path):
+    df = pd.DataFrame({
+        "Ticker": ["GGAL", "AAPL"], "Score Final": [7, 5],
+        "Contexto": ["Descripción larga de la empresa..."] * 2, "Hist": [{}, {}],
+        "Justificación": [["a", "b"], []],
+    })
+    historico.guardar_snapshot(df, carpeta=str(tmp_path))
+
+    leido = historico.ultimo_snapshot(carpeta=str(tmp_path))
+    assert list(leido.columns) == ["Fecha", "Corrida", "Ticker", "Score Final", "Justificación"]
+    assert historico.cargar_manifest(str(tmp_path))["archivos"][0]["tickers"] == ["AAPL", "GGAL"]
+
+
+def test_carpeta_relativa_al_repo():
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert historico.CARPETA_HISTORICOS == os.path.join(raiz, "historicos")
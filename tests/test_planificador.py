@@ -0,0 +1,83 @@
+# tests/test_planificador.py
+# Token bucket por proveedor con reloj falso: ráfaga, espaciado de turnos,
+# espera estimada y cancelación de una espera en cola.
+import threading
+import pytest
+
+from helpers import planificador
+
+
+@pytest.fixture
+def plan(reloj, monkeypatch):
+    monkeypatch.setattr(planificador, "time", reloj)
+    # 60 por minuto = un token por segundo, ráfaga de 2
+    monkeypatch.setattr(planificador, "LIMITES_TASA", {"prueba": (60, 2)})
+    monkeypatch.setattr(planificador, "_baldes", {})
+    monkeypatch.setattr(planificador, "_activo", True)
+    return planificador
+
+
+def test_rafaga_y_espaciado(plan, reloj):
+    assert plan.esperar_turno("prueba") == 0.0
+    assert plan.esperar_turno("prueba") == 0.0
+    assert plan.espera_estimada("prueba") == pytest.approx(1.0)
+
+    reloj.avanzar(0.5)
+    assert plan.espera_estimada("prueba") == pytest.approx(0.5)
+    inicio = reloj.ahora
+    assert plan.esperar_turno("prueba") == pytest.approx(0.5)
+    assert reloj.ahora - inicio == pytest.approx(0.5)
+    # El turno siguiente queda un segundo más atrás
+    assert plan.esperar_turno("prueba") == pytest.approx(1.0)
+
+    reloj.avanzar(10)
+    assert plan.espera_estimada("prueba") == 0.0
+
+
+def test_sin_limite_no_espera(plan):
+    for _ in range(100):
+        assert plan.esperar_turno("otro") == 0.0
+    assert plan.espera_estimada("otro") == 0.0
+
+
+def test_cancelada_devuelve_el_turno(plan):
+    plan.esperar_turno("prueba")
+    plan.esperar_turno("prueba")
+    antes = plan.espera_estimada("prueba")
+
+    evento = threading.Event()
+    evento.set()
+    with plan.cancelable(evento), pytest.raises(planificador.TurnoCancelado):
+        plan.esperar_turno("prueba")
+
+    assert plan.espera_estimada("prueba") == pytest.approx(antes)
+    assert plan.estado_colas()["prueba"] == 0
+
+
+def test_cancelar_despierta_la_espera(plan):
+    plan.configurar(limites={"prueba": (1, 1)})
+    plan.esperar_turno("prueba")
+    evento = threading.Event()
+    resultado = {}
+
+    def _esperar():
+        with plan.cancelable(evento):
+            try:
+                resultado["espera"] = plan.esperar_turno("prueba")
+            except planificador.TurnoCancelado:
+                resultado["cancelada"] = True
+
+    hilo = threading.Thread(target=_esperar)
+    hilo.start()
+    for _ in range(200):
+        if plan.estado_colas().get("prueba"):
+            break
+        threading.Event().wait(0.01)
+    assert plan.estado_colas()["prueba"] == 1
+
+    # La espera es de 60 s: el evento tiene que cortarla enseguida
+    evento.set()
+    hilo.join(timeout=5)
+    assert not hilo.is_alive()
+    assert resultado == {"cancelada": True}
+    assert plan.estado_colas()["prueba"] == 0
@@ -0,0 +1,248 @@
+# tests/test_score.py
+# El motor columnar (score_vectorizado.puntuar_portafolio, envuelto por
+# score.calcular_score) tiene que dar lo mismo que el calcular_score fila por
+# fila original. Abajo queda una copia congelada de esas reglas para comparar.
+import random
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers import score, score_vectorizado
+from helpers.indicadores import calcular_panel
+from helpers.score import (
+    calcular_ema, calcular_bollinger, calcular_rsi, calcular_macd,
+    sectores_ciclicos, riesgos_regulatorios
+)
+
+PAISES = ["united states", "argentina", "china", "venezuela", "default"]
+SECTORES = ["Technology", "Semiconductors", "Financial Services", "Energy", "Real Estate", "Internet", "", None]
+RIESGOS = {"united states": 400, "argentina": 1500, "china": 700, "venezuela": 3000, "default": 600}
+
+
+# --- Copia congelada del calcular_score original (no modificar) ---
+def _penalizacion_sectorial_original(pais, sector):
+    sector = sector.lower()
+    penalizacion = 0
+    if any(sc in sector for sc in sectores_ciclicos):
+        penalizacion -= 1
+    if pais in riesgos_regulatorios:
+        if any(r in sector for r in riesgos_regulatorios[pais]):
+            penalizacion -= 1
+    return penalizacion
+
+def _contexto_original(vix, riesgo):
+    try:
+        if vix < 18 and riesgo < 500:
+            return "Contexto Global: MUY FAVORABLE", 2
+        elif vix < 25 and riesgo < 1000:
+            return "Contexto Global: MODERADO", 1
+        else:
+            return "Contexto Global: ADVERSO", 0
+    except:
+        return "Contexto Global: DESCONOCIDO", 0
+
+def calcular_score_original(resultado, pais, vix, riesgo):
+    if resultado.get("Tipo") == "Bono":
+        return "N/A", 0
+    score = 0
+    justificaciones = []
+
+    if (b := resultado.get("Beta")) is not None and b <= 1:
+        score += 1; justificaciones.append("Beta <= 1")
+    if (de := resultado.get("Debt/Equity")) and 0 < de < 1:
+        score += 1; justificaciones.append("Deuda/Equity < 1")
+    if (ev := resultado.get("EV/EBITDA")) and 0 < ev < 15:
+        score += 1; justificaciones.append("EV/EBITDA < 15")
+    if (roe := resultado.get("ROE")) and roe > 0.10:
+        score += 1; justificaciones.append("ROE > 10%")
+    if (roic := resultado.get("ROIC")) and roic > 0.08:
+        score += 1; justificaciones.append("ROIC > 8%")
+    if (peg := resultado.get("PEG Ratio")):
+        if 0 < peg < 1.5 or (peg > 1.5 and resultado.get("Forward Revenue Growth", 0) > 20):
+            score += 1; justificaciones.append("PEG Ratio razonable")
+    if (fcf := resultado.get("FCF Yield")):
+        if fcf > 0: score += 1; justificaciones.append("FCF positivo")
+        if fcf > 5: score += 1; justificaciones.append("FCF > 5%")
+    if (pe := resultado.get("P/E Ratio")) and 0 < pe < 20:
+        score += 1; justificaciones.append("P/E < 20")
+    if (pb := resultado.get("P/B Ratio")) and 0 < pb < 3:
+        score += 1; justificaciones.append("P/B < 3")
+    if (div := resultado.get("Dividend Yield")) and div > 0.02:
+        score += 1; justificaciones.append("Dividendo > 2%")
+    if (up := resultado.get("% Subida a Máx")) and up > 40:
+        score += 1; justificaciones.append("Potencial subida > 40%")
+    if (rev := resultado.get("Revenue Growth YoY")) and rev > 15:
+        score += 1; justificaciones.append("Crecimiento histórico > 15%")
+
+    if (eps_fwd := resultado.get("Forward EPS")):
+        if eps_fwd > 0: score += 1; justificaciones.append("EPS futuro positivo")
+        elif eps_fwd < 0: score -= 1; justificaciones.append("EPS futuro negativo")
+    if (rev_fwd := resultado.get("Forward Revenue Growth")):
+        if rev_fwd > 10: score += 1; justificaciones.append("Crecimiento futuro > 10%")
+        elif rev_fwd < 0: score -= 1; justificaciones.append("Crecimiento futuro negativo")
+    if (margen := resultado.get("Margen Futuro")) and margen > 0.15:
+        score += 1; justificaciones.append("Margen futuro saludable")
+
+    try:
+        hist = resultado.get("Hist")
+        if isinstance(hist, dict):
+            df = pd.DataFrame(hist)
+            df = calcular_ema(df)
+            df = calcular_bollinger(df)
+            df["RSI"] = calcular_rsi(df)
+            df["MACD"], df["Signal"] = calcular_macd(df)
+            rsi = df["RSI"].dropna().iloc[-1]
+            macd = df["MACD"].iloc[-1]
+            signal = df["Signal"].iloc[-1]
+            precio = df['Close'].iloc[-1]
+            if 30 < rsi < 70: score += 1; justificaciones.append("RSI saludable")
+            if macd > signal: score += 1; justificaciones.append("MACD cruzado")
+            if df["EMA50"].iloc[-1] > df["EMA200"].iloc[-1]: score += 1; justificaciones.append("Tendencia EMA positiva")
+            if precio < df["Bollinger Lower"].iloc[-1]: score += 1; justificaciones.append("En banda inferior Bollinger")
+    except:
+        pass
+
+    if (pe := resultado.get("P/E Ratio")) and pe > 60:
+        score -= 1; justificaciones.append("P/E > 60 (penaliza)")
+    if (roe := resultado.get("ROE")) and roe < 0:
+        score -= 1; justificaciones.append("ROE negativo")
+
+    sector = str(resultado.get("Sector") or "").lower()
+    if any(x in sector for x in ["ai", "inteligencia", "energ", "defens", "cloud", "infra", "semic", "space", "uran", "aero"]):
+        score += 1; justificaciones.append("Sector estratégico")
+
+    penal = _penalizacion_sectorial_original(pais, sector)
+    score += penal
+    if penal < 0:
+        justificaciones.append(f"Penalización sectorial por {pais}/{sector} ({penal})")
+
+    contexto, bonus = _contexto_original(vix, riesgo)
+    resultado["Contexto Global"] = contexto
+    score += bonus
+    if bonus > 0:
+        justificaciones.append(f"Contexto global favorable (+{bonus})")
+
+    actual = resultado.get("Actual")
+    eps_fwd = resultado.get("Forward EPS")
+    if eps_fwd and eps_fwd > 0 and actual and actual > 0:
+        target_base = eps_fwd * 18
+        resultado["Target Base 12M"] = round(target_base, 2)
+        resultado["Target Alcista 12M"] = round(eps_fwd * 25, 2)
+        resultado["Target Conservador"] = round(eps_fwd * 12, 2)
+        resultado["Proyección 12M (%)"] = round((target_base - actual) / actual * 100, 2)
+    else:
+        resultado["Target Base 12M"] = None
+        resultado["Target Alcista 12M"] = None
+        resultado["Target Conservador"] = None
+        resultado["Proyección 12M (%)"] = None
+        justificaciones.append("Sin proyección por EPS negativo o datos inválidos")
+
+    resultado["Score Numérico Total"] = score
+    resultado["Justificación Score"] = justificaciones
+
+    if score >= 13:
+        return "⭐⭐⭐⭐⭐ (5/5 - Excelente)", 5
+    elif score >= 10:
+        return "⭐⭐⭐⭐ (4/5 - Muy Bueno)", 4
+    elif score >= 7:
+        return "⭐⭐⭐ (3/5 - Aceptable)", 3
+    elif score >= 4:
+        return "⭐⭐ (2/5 - Riesgoso)", 2
+    else:
+        return "⭐ (1/5 - Débil)", 1
+
+
+# --- Datos de prueba ---
+def _valor(azar, opciones):
+    return azar.choice([None, 0, -1.0] + opciones)
+
+def _hist(azar):
+    cierres = list(100 + np.cumsum(np.random.default_rng(azar.randint(0, 10**6)).normal(0, 2, azar.randint(5, 320))))
+    tipo = azar.choice(["dict", "frame", None])
+    if tipo == "dict":
+        return {"Close": cierres}
+    if tipo == "frame":
+        return pd.DataFrame({"Close": cierres}, index=pd.date_range("2023-01-02", periods=len(cierres), freq="B"))
+    return None
+
+def _fila(azar, i):
+    fila = {
+        "Ticker": f"T{i}",
+        "Tipo": "Bono" if azar.random() < 0.05 else "Acción",
+        "Beta": _valor(azar, [0.5, 1.0, 1.8]),
+        "Debt/Equity": _valor(azar, [0.4, 2.0]),
+        "EV/EBITDA": _valor(azar, [8.0, 30.0]),
+        "ROE": _valor(azar, [0.05, 0.25]),
+        "ROIC": _valor(azar, [0.05, 0.12]),
+        "PEG Ratio": _valor(azar, [1.0, 2.5]),
+        "FCF Yield": _valor(azar, [2.0, 8.0]),
+        "P/E Ratio": _valor(azar, [12.0, 40.0, 90.0]),
+        "P/B Ratio": _valor(azar, [1.5, 6.0]),
+        "Dividend Yield": _valor(azar, [0.01, 0.05]),
+        "% Subida a Máx": _valor(azar, [10.0, 60.0]),
+        "Revenue Growth YoY": _valor(azar, [5.0, 25.0]),
+        "Forward EPS": _valor(azar, [3.3, 7.1]),
+        "Forward Revenue Growth": _valor(azar, [5.0, 15.0, 30.0]),
+        "Margen Futuro": _valor(azar, [0.1, 0.3]),
+        "Actual": _valor(azar, [55.5, 140.25]),
+        "Sector": azar.choice(SECTORES),
+        "Hist": _hist(azar),
+    }
+    # Divergencia conocida: con PEG > 1.5 y sin Forward Revenue Growth el original lanzaba TypeError
+    if fila["PEG Ratio"] and fila["PEG Ratio"] > 1.5 and fila["Forward Revenue Growth"] is None:
+        fila["Forward Revenue Growth"] = 0
+    return fila
+
+CAMPOS = ["Score Numérico Total", "Justificación Score", "Contexto Global",
+          "Target Base 12M", "Target Alcista 12M", "Target Conservador", "Proyección 12M (%)"]
+
+
+def _parchear(monkeypatch, vix, paises):
+    pais_de = lambda ticker: paises.get(ticker, "default")
+    for modulo in (score, score_vectorizado):
+        monkeypatch.setattr(modulo, "obtener_pais_ticker", pais_de)
+        monkeypatch.setattr(modulo, "obtener_vix", lambda: vix)
+        monkeypatch.setattr(modulo, "obtener_riesgo_pais", lambda pais: RIESGOS[pais])
+
+def _filas_y_esperados(vix, paises, n=100):
+    azar = random.Random(int(vix or 0))
+    filas, esperados = [], []
+    for i in range(n):
+        fila = _fila(azar, i)
+        pais = paises[fila["Ticker"]] = azar.choice(PAISES)
+        esperado_fila = dict(fila)
+        esperados.append((calcular_score_original(esperado_fila, pais, vix, RIESGOS[pais]), esperado_fila))
+        filas.append(fila)
+    return filas, esperados
+
+
+@pytest.mark.parametrize("vix", [15.0, 20.0, 30.0, None])
+def test_calcular_score_igual_al_original(monkeypatch, vix):
+    paises = {}
+    _parchear(monkeypatch, vix, paises)
+    filas, esperados = _filas_y_esperados(vix, paises)
+    for fila, (esperado, esperado_fila) in zip(filas, esperados):
+        obtenido_fila = dict(fila)
+        assert score.calcular_score(obtenido_fila) == esperado, fila
+        if fila["Tipo"] == "Bono":
+            continue
+        for campo in CAMPOS:
+            assert obtenido_fila[campo] == esperado_fila[campo], (campo, fila)
+
+
+@pytest.mark.parametrize("vix", [15.0, 30.0])
+def test_puntuar_portafolio_con_panel_igual_al_original(monkeypatch, vix):
+    # Como motor.analizar_portafolio: el panel de indicadores se calcula para todos
+    # los Hist (también los DataFrame, para los gráficos) y se pasa ya hecho
+    paises = {}
+    _parchear(monkeypatch, vix, paises)
+    filas, esperados = _filas_y_esperados(vix, paises)
+    df = pd.DataFrame(filas)
+    df["País"] = df["Ticker"].map(paises)
+    panel = calcular_panel(df["Hist"])
+    df = score_vectorizado.agregar_justificaciones(score_vectorizado.puntuar_portafolio(df, indicadores=panel["ultimos"]))
+    for (_, fila), ((texto, _), esperado_fila) in zip(df.iterrows(), esperados):
+        assert fila["Score Final"] == texto, fila["Ticker"]
+        if fila["Tipo"] != "Bono":
+            assert fila["Score Numérico Total"] == esperado_fila["Score Numérico Total"], fila["Ticker"]
+            assert fila["Justificación Score"] == esperado_fila["Justificación Score"], fila["Ticker"]